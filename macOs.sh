@@ -82,6 +82,13 @@ registry:
       - name: run_kali_tool
       - name: run_kali_tool_stream
       - name: export_run_history
+      - name: server_stats
+      - name: reload_dataset
+      - name: autocomplete_tools
+      - name: submit_kali_job
+      - name: job_status
+      - name: job_output
+      - name: cancel_job
     env:
       - name: KALI_TOOL_DATA
         example: /mnt/datasets/custom_kali_tools.json
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the Kali tool dataset.
+
+Builds a synthetic catalog of the requested size so the numbers reflect what a
+full `sync_tools.py` run produces, not the 15-tool fallback dataset.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import asyncio
+import gc
+import json
+import random
+import shlex
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_PATH = REPO_ROOT / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
+
+from rapidfuzz import fuzz  # noqa: E402
+
+from kali_mcp_server.compiled import CompiledDataset, compile_dataset  # noqa: E402
+from kali_mcp_server import executor  # noqa: E402
+from kali_mcp_server.dataset import Tool, ToolDataset, _load_tools, _load_tools_from_json  # noqa: E402
+from kali_mcp_server.loaders import load_tools  # noqa: E402
+from kali_mcp_server.offload import LoopLagMonitor, QueryOffloader  # noqa: E402
+
+WORDS = (
+    "network scanner port web application sql injection wireless password cracker hash "
+    "dns enumeration subdomain exploit payload brute force wifi wpa handshake forensic "
+    "memory dump reverse engineering binary fuzzing http proxy sniffing spoofing bluetooth "
+    "radio voip database audit vulnerability report credential harvesting smb ldap"
+).split()
+CATEGORIES = (
+    "Information Gathering",
+    "Vulnerability Analysis",
+    "Web Applications",
+    "Wireless Attacks",
+    "Password Attacks",
+    "Forensics",
+)
+SEARCH_QUERIES = (
+    "nmap",
+    "aircrak",
+    "sql injection",
+    "wireless password",
+    "enumerate subdomains for a web app",
+    "theharvest",
+)
+TASK_QUERIES = (
+    "enumerate subdomains for a web app",
+    "find sql injection in a login form",
+    "crack a wpa handshake from a wireless capture",
+    "dump memory for forensic analysis",
+)
+
+
+def synthetic_records(count: int, seed: int = 0) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    records = []
+    for index in range(count):
+        name = "".join(rng.sample("abcdefghijklmnopqrstuvwxyz", rng.randint(3, 10)))
+        name = f"{name}{rng.choice(['', '-ng', 'map', str(index)])}"
+        package = f"kali-tools-{rng.choice(WORDS)}"
+        records.append(
+            {
+                "name": name,
+                "package": package,
+                "category": rng.choice(CATEGORIES),
+                "summary": " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))),
+                "binary_path": f"/usr/bin/{name}",
+                "default_args": "",
+            }
+        )
+    return records
+
+
+def synthetic_tools(count: int, seed: int = 0) -> List[Tool]:
+    return [Tool(**record) for record in synthetic_records(count, seed)]
+
+
+@dataclass(frozen=True)
+class _DictTool:
+    """The pre-slots record layout, kept for memory comparisons."""
+
+    name: str
+    package: str
+    category: str
+    summary: str
+    binary_path: str
+    default_args: str
+
+
+def _dict_tools_with_search_strings(text: str) -> object:
+    """Old layout plus the lowercase strings search keeps, for a like-for-like total."""
+    tools = [_DictTool(**entry) for entry in json.loads(text)]
+    blobs = [
+        " ".join([t.name.lower(), t.package.lower(), t.category.lower(), t.summary.lower()])
+        for t in tools
+    ]
+    return tools, blobs, [tool.name.lower() for tool in tools]
+
+
+def _retained_bytes(build: Callable[[], object]) -> int:
+    """Bytes still allocated after ``build`` returns, while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return retained
+
+
+def _peak_bytes(build: Callable[[], object]) -> int:
+    """Highest allocation total while ``build`` runs, relative to its start."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def _full_scan(tools: Sequence[Tool], query: str, limit: int) -> List[Tool]:
+    """The pre-index scorer: every tool, one at a time, then a full sort."""
+    scored = []
+    query_lc = query.lower()
+    for tool in tools:
+        blob_score = fuzz.token_set_ratio(query, tool.searchable_blob)
+        name_score = fuzz.ratio(query_lc, tool.name.lower())
+        scored.append((max(blob_score, name_score), tool))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    filtered = [tool for score, tool in scored if score > 40]
+    return filtered[:limit]
+
+
+def _time_per_call(
+    func: Callable[[], object], repeat: int, before: Optional[Callable[[], object]] = None
+) -> float:
+    """Mean seconds per call of ``func``; ``before`` runs untimed ahead of each call."""
+    total = 0.0
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        func()
+        total += time.perf_counter() - start
+    return total / repeat
+
+
+def bench_search(args: argparse.Namespace) -> Dict[str, object]:
+    tools = synthetic_tools(args.size)
+    build_start = time.perf_counter()
+    dataset = ToolDataset(tools)
+    build_seconds = time.perf_counter() - build_start
+
+    results = {}
+    for query in SEARCH_QUERIES:
+        search = lambda: dataset.fuzzy_search(query, limit=5)  # noqa: E731
+        # Repeats of one query hit the QueryCache; time scoring and hits apart.
+        uncached = _time_per_call(search, args.repeat, before=dataset.clear_cache)
+        cached = _time_per_call(search, args.repeat)
+        entry = {"uncached_ms": round(uncached * 1000, 3), "cached_ms": round(cached * 1000, 3)}
+        if args.compare:
+            baseline = _time_per_call(lambda: _full_scan(tools, query, 5), 1)
+            entry["full_scan_ms"] = round(baseline * 1000, 3)
+            entry["speedup"] = round(baseline / uncached, 1) if uncached else None
+        results[query] = entry
+    return {
+        "benchmark": "search",
+        "tools": args.size,
+        "build_ms": round(build_seconds * 1000, 1),
+        "queries": results,
+    }
+
+
+def bench_suggest(args: argparse.Namespace) -> Dict[str, object]:
+    dataset = ToolDataset(synthetic_tools(args.size))
+    results = {}
+    for task in TASK_QUERIES:
+        suggest = lambda: dataset.suggest(task, limit=5)  # noqa: E731
+        ranked = _time_per_call(suggest, args.repeat, before=dataset.clear_cache)
+        cached = _time_per_call(suggest, args.repeat)
+        entry = {"uncached_ms": round(ranked * 1000, 3), "cached_ms": round(cached * 1000, 3)}
+        if args.compare:
+            fuzzy = _time_per_call(
+                lambda: dataset.fuzzy_search(task, limit=5), args.repeat, before=dataset.clear_cache
+            )
+            entry["fuzzy_uncached_ms"] = round(fuzzy * 1000, 3)
+        results[task] = entry
+    return {"benchmark": "suggest", "tools": args.size, "queries": results}
+
+
+def bench_load(args: argparse.Namespace) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "kali_tools.json"
+        records = synthetic_records(args.size)
+        json_path.write_text(json.dumps(records, indent=2), encoding="utf-8")
+        jsonl_path = json_path.with_suffix(".jsonl")
+        jsonl_path.write_text("".join(json.dumps(record) + "\n" for record in records))
+        csv_path = json_path.with_suffix(".csv")
+        with csv_path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(records[0]))
+            writer.writeheader()
+            writer.writerows(records)
+        del records
+        compiled_path = compile_dataset(json_path)
+        results = {
+            "json_parse_ms": _time_per_call(lambda: _load_tools_from_json(json_path), args.repeat),
+            "compiled_open_ms": _time_per_call(lambda: CompiledDataset(compiled_path), args.repeat),
+            "compiled_tools_ms": _time_per_call(
+                lambda: CompiledDataset(compiled_path).tools(), args.repeat
+            ),
+            "load_with_hash_check_ms": _time_per_call(lambda: _load_tools(json_path), args.repeat),
+            "jsonl_stream_ms": _time_per_call(lambda: load_tools(jsonl_path), args.repeat),
+            "csv_stream_ms": _time_per_call(lambda: load_tools(csv_path), args.repeat),
+        }
+        final = _retained_bytes(lambda: _load_tools_from_json(json_path))
+        peaks = {
+            f"{label}_peak_over_final": round(_peak_bytes(load) / final, 2)
+            for label, load in (
+                ("json_parse", lambda: _load_tools_from_json(json_path)),
+                ("jsonl_stream", lambda: load_tools(jsonl_path)),
+                ("csv_stream", lambda: load_tools(csv_path)),
+            )
+        }
+        sizes = {
+            "json_bytes": json_path.stat().st_size,
+            "compiled_bytes": compiled_path.stat().st_size,
+        }
+    return {
+        "benchmark": "load",
+        "tools": args.size,
+        **{key: round(value * 1000, 3) for key, value in results.items()},
+        **peaks,
+        **sizes,
+    }
+
+
+async def _searches_under_lag_monitor(
+    dataset: ToolDataset, offloader: QueryOffloader, rounds: int
+) -> Dict[str, object]:
+    monitor = LoopLagMonitor(interval=0.005)
+    sampler = asyncio.create_task(monitor.run())
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(
+            *(
+                offloader.run(len(dataset), dataset.fuzzy_search, query, limit=5)
+                for query in SEARCH_QUERIES + TASK_QUERIES
+            )
+        )
+        dataset.clear_cache()
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    offloader.shutdown()
+    return {"wall_ms": round(elapsed * 1000, 1), **monitor.stats()}
+
+
+def bench_loop_lag(args: argparse.Namespace) -> Dict[str, object]:
+    dataset = ToolDataset(synthetic_tools(args.size))
+    results = {}
+    for label, threshold in (("inline", -1), ("offloaded", 0)):
+        offloader = QueryOffloader(threshold=threshold, threads=args.threads)
+        results[label] = asyncio.run(_searches_under_lag_monitor(dataset, offloader, args.repeat))
+    return {"benchmark": "loop-lag", "tools": args.size, **results}
+
+
+STREAM_SCRIPT = (
+    "import sys\n"
+    "write = sys.stdout.write\n"
+    "for number in range({lines}): write('[+] line %d of synthetic scanner output\\n' % number)\n"
+)
+
+
+async def _line_per_message_stream(command: Sequence[str]) -> Dict[str, int]:
+    """The previous readline pump: one queue item and one message per line."""
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump(reader: asyncio.StreamReader, label: str) -> None:
+        try:
+            while True:
+                chunk = await reader.readline()
+                if not chunk:
+                    break
+                await queue.put(f"[{label}] {chunk.decode('utf-8', errors='replace').rstrip()}")
+        finally:
+            await queue.put(None)
+
+    tasks = [
+        asyncio.create_task(pump(process.stdout, "stdout")),
+        asyncio.create_task(pump(process.stderr, "stderr")),
+    ]
+    messages = lines = done = 0
+    while done < len(tasks):
+        item = await queue.get()
+        if item is None:
+            done += 1
+            continue
+        messages += 1
+        lines += 1
+    await process.wait()
+    return {"messages": messages, "lines": lines}
+
+
+async def _framed_stream(command: Sequence[str]) -> Dict[str, int]:
+    tool = Tool("bench-stream", "kali-tools-bench", "Benchmark", "", command[0], "")
+    arguments = " ".join(shlex.quote(arg) for arg in command[1:])
+    messages = lines = 0
+    async for frame in executor.stream_tool(
+        tool.name, arguments, timeout=600, dataset=ToolDataset([tool])
+    ):
+        if frame.startswith("[meta]"):
+            continue
+        messages += 1
+        lines += frame.count("\n") + 1
+    return {"messages": messages, "lines": lines}
+
+
+def bench_stream(args: argparse.Namespace) -> Dict[str, object]:
+    command = [sys.executable, "-c", STREAM_SCRIPT.format(lines=args.lines)]
+    results = {}
+    for label, consume in (
+        ("line_per_message", _line_per_message_stream),
+        ("framed", _framed_stream),
+    ):
+        best = float("inf")
+        counts: Dict[str, int] = {}
+        for _ in range(args.repeat):
+            executor.reset_runtime_limits()
+            start = time.perf_counter()
+            counts = asyncio.run(consume(command))
+            best = min(best, time.perf_counter() - start)
+        results[label] = {
+            "wall_ms": round(best * 1000, 1),
+            "lines_per_sec": round(counts["lines"] / best),
+            **counts,
+        }
+    return {"benchmark": "stream", "lines": args.lines, **results}
+
+
+def bench_memory(args: argparse.Namespace) -> Dict[str, object]:
+    results = {}
+    for size in args.sizes:
+        text = json.dumps(synthetic_records(size))
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = Path(tmp) / "kali_tools.json"
+            json_path.write_text(text, encoding="utf-8")
+            compiled_path = compile_dataset(json_path)
+            layouts = {
+                "dict_dataclass": lambda: _dict_tools_with_search_strings(text),
+                "slotted_from_json": lambda: _load_tools_from_json(json_path),
+                "slotted_from_compiled": lambda: CompiledDataset(compiled_path).tools(),
+                "dataset_with_indexes": lambda: ToolDataset(_load_tools(json_path)),
+            }
+            results[size] = {
+                f"{label}_bytes_per_tool": round(_retained_bytes(build) / size)
+                for label, build in layouts.items()
+            }
+    return {"benchmark": "memory", "sizes": results}
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    search = subparsers.add_parser("search", help="Time ToolDataset.fuzzy_search.")
+    search.add_argument("--size", type=int, default=10000, help="Synthetic tool count.")
+    search.add_argument("--repeat", type=int, default=20, help="Calls per query.")
+    search.add_argument(
+        "--compare",
+        action="store_true",
+        help="Also time the unindexed per-tool scoring loop.",
+    )
+    search.set_defaults(func=bench_search)
+
+    suggest = subparsers.add_parser("suggest", help="Time ToolDataset.suggest on task sentences.")
+    suggest.add_argument("--size", type=int, default=10000, help="Synthetic tool count.")
+    suggest.add_argument("--repeat", type=int, default=20, help="Calls per query.")
+    suggest.add_argument(
+        "--compare",
+        action="store_true",
+        help="Also time fuzzy_search on the same sentences.",
+    )
+    suggest.set_defaults(func=bench_suggest)
+
+    load = subparsers.add_parser(
+        "load", help="Compare JSON parsing with the compiled and streaming loaders."
+    )
+    load.add_argument("--size", type=int, default=10000, help="Synthetic tool count.")
+    load.add_argument("--repeat", type=int, default=5, help="Loads per variant.")
+    load.set_defaults(func=bench_load)
+
+    loop_lag = subparsers.add_parser(
+        "loop-lag", help="Event-loop lag while searches run inline versus on the thread pool."
+    )
+    loop_lag.add_argument("--size", type=int, default=10000, help="Synthetic tool count.")
+    loop_lag.add_argument("--repeat", type=int, default=5, help="Rounds of concurrent queries.")
+    loop_lag.add_argument("--threads", type=int, default=2, help="Offload pool size.")
+    loop_lag.set_defaults(func=bench_loop_lag)
+
+    stream = subparsers.add_parser(
+        "stream", help="Lines/sec and message count for streamed tool output."
+    )
+    stream.add_argument("--lines", type=int, default=200000, help="Lines the tool prints.")
+    stream.add_argument("--repeat", type=int, default=3, help="Runs per variant (best is kept).")
+    stream.set_defaults(func=bench_stream)
+
+    memory = subparsers.add_parser("memory", help="Report retained bytes per tool.")
+    memory.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 50000],
+        help="Synthetic catalog sizes to measure.",
+    )
+    memory.set_defaults(func=bench_memory)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    print(json.dumps(args.func(args), indent=2))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI behaviour
+    raise SystemExit(main())
@@ -1,31 +1,54 @@
-"""Utility script to generate the Kali tool metadata dataset.
-
-This is a placeholder that will be expanded in later roadmap tasks.
+#!/usr/bin/env python3
+"""Prebuild the search indexes for a Kali tool dataset.
+
+Writes a versioned ``.index`` file next to ``kali_tools.json`` holding the
+token postings, name index (prefix ranges and typo deletes), BM25 impact lists
+and the name ordering ``ToolDataset`` would otherwise build on every start.
+The file carries the SHA-256 of the JSON it was built from; the server falls
+back to building indexes itself whenever the two no longer match.
 """
 
 from __future__ import annotations
 
 import argparse
+import sys
+import time
 from pathlib import Path
+from typing import Optional, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_PATH = REPO_ROOT / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
 
+from kali_mcp_server.snapshot import build_index_snapshot  # noqa: E402
 
-def parse_args() -> argparse.Namespace:
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dataset",
+        type=Path,
+        default=REPO_ROOT / "data" / "kali_tools.json",
+        help="Path to the kali_tools.json dataset to index.",
+    )
     parser.add_argument(
         "--output",
         type=Path,
-        default=Path("data/kali_tools.json"),
-        help="Path to write the generated tool index.",
+        default=None,
+        help="Path to write the index; defaults to a .index sibling of the dataset.",
     )
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
-def main() -> None:  # pragma: no cover - placeholder
-    args = parse_args()
-    raise SystemExit(
-        f"Tool index generation is not implemented yet. Intended output: {args.output}"
-    )
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    start = time.perf_counter()
+    output = build_index_snapshot(args.dataset, args.output)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {output} ({output.stat().st_size} bytes) in {elapsed:.2f}s")
+    return 0
 
 
 if __name__ == "__main__":  # pragma: no cover - manual execution helper
-    main()
+    raise SystemExit(main())
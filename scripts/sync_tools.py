@@ -18,7 +18,7 @@ import shutil
 import subprocess
 import sys
 from collections import Counter
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Sequence
@@ -35,6 +35,16 @@ try:
 except Exception:  # pragma: no cover - fallback import failure
     catalog = None  # type: ignore
 
+try:
+    compiled = importlib.import_module("kali_mcp_server.compiled")  # type: ignore
+except Exception:  # pragma: no cover - runtime dependencies missing
+    compiled = None  # type: ignore
+
+try:
+    sqlite_backend = importlib.import_module("kali_mcp_server.sqlite_backend")  # type: ignore
+except Exception:  # pragma: no cover - runtime dependencies missing
+    sqlite_backend = None  # type: ignore
+
 DEFAULT_OUTPUT = REPO_ROOT / "data" / "kali_tools.json"
 READ_ME_PATH = REPO_ROOT / "README.md"
 
@@ -99,9 +109,11 @@ class ToolRecord:
     summary: str
     binary_path: str
     default_args: str = ""
+    packages: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
 
-    def to_dict(self) -> Dict[str, str]:
-        return {
+    def to_dict(self) -> Dict[str, object]:
+        data: Dict[str, object] = {
             "name": self.name,
             "package": self.package,
             "category": self.category,
@@ -109,6 +121,11 @@ class ToolRecord:
             "binary_path": self.binary_path,
             "default_args": self.default_args,
         }
+        # Only binaries shipped by several meta-packages carry owner lists.
+        if len(self.packages) > 1 or len(self.categories) > 1:
+            data["packages"] = list(self.packages)
+            data["categories"] = list(self.categories)
+        return data
 
 
 def run_command(cmd: Sequence[str]) -> subprocess.CompletedProcess[str]:
@@ -204,25 +221,55 @@ def build_dataset_from_system(packages: Iterable[str]) -> List[ToolRecord]:
     return dataset
 
 
+def merge_duplicate_records(dataset: Iterable[ToolRecord]) -> List[ToolRecord]:
+    """Emit one record per binary, listing every meta-package that ships it.
+
+    Overlapping ``kali-tools-*`` packages (``top10`` and the category packages,
+    for instance) list the same binaries. The first package by
+    ``catalog.owner_order`` keeps the canonical summary and category, as it
+    does when the server loads the dataset.
+    """
+    if catalog is None:
+        raise RuntimeError("Merging records requires kali_mcp_server.catalog")
+    groups: Dict[tuple, List[ToolRecord]] = {}
+    for record in dataset:
+        groups.setdefault((record.name, record.binary_path), []).append(record)
+    merged: List[ToolRecord] = []
+    for group in groups.values():
+        group.sort(key=lambda record: catalog.owner_order(record.package, record.category))
+        primary = group[0]
+        packages = list(dict.fromkeys(record.package for record in group))
+        categories = list(dict.fromkeys(record.category for record in group))
+        merged.append(
+            ToolRecord(
+                name=primary.name,
+                package=primary.package,
+                category=primary.category,
+                summary=primary.summary,
+                binary_path=primary.binary_path,
+                default_args=primary.default_args,
+                packages=packages,
+                categories=categories,
+            )
+        )
+    return merged
+
+
 def build_dataset_from_catalog() -> List[ToolRecord]:
     if catalog is None:
         raise RuntimeError(
             "Fallback dataset requested but kali_mcp_server.catalog could not be imported"
         )
-    dataset: List[ToolRecord] = []
-    for category, tools in catalog.KALI_TOOL_LIBRARY.items():
-        for name, description in tools.items():
-            binary = catalog.KALI_TOOL_BINARIES.get(catalog.normalize(name), name)
-            dataset.append(
-                ToolRecord(
-                    name=binary,
-                    package="kali-tools-sample",
-                    category=category.title(),
-                    summary=description,
-                    binary_path=f"/usr/bin/{binary}",
-                )
-            )
-    return dataset
+    return [
+        ToolRecord(
+            name=entry.binary,
+            package="kali-tools-sample",
+            category=entry.category.title(),
+            summary=entry.description,
+            binary_path=f"/usr/bin/{entry.binary}",
+        )
+        for entry in catalog.catalog_entries()
+    ]
 
 
 def ensure_output_dir(path: Path) -> None:
@@ -240,17 +287,30 @@ def serialize_dataset(
     if csv_path is not None:
         ensure_output_dir(csv_path)
         with csv_path.open("w", newline="", encoding="utf-8") as handle:
-            if data:
-                fieldnames = list(data[0].keys())
-            else:
-                fieldnames = ["name", "package", "category", "summary", "binary_path", "default_args"]
+            fieldnames = [
+                "name",
+                "package",
+                "category",
+                "summary",
+                "binary_path",
+                "default_args",
+                "packages",
+                "categories",
+            ]
             writer = csv.DictWriter(handle, fieldnames=fieldnames)
             writer.writeheader()
-            writer.writerows(data)
+            for row in data:
+                owners = {
+                    key: catalog.CSV_OWNER_SEPARATOR.join(row.get(key, ()))  # type: ignore[arg-type]
+                    for key in ("packages", "categories")
+                }
+                writer.writerow({**row, **owners})
 
 
 def compute_metrics(dataset: List[ToolRecord]) -> Dict[str, object]:
-    category_counts = Counter(record.category for record in dataset)
+    category_counts = Counter(
+        category for record in dataset for category in (record.categories or [record.category])
+    )
     return {
         "total_tools": len(dataset),
         "category_counts": dict(sorted(category_counts.items())),
@@ -313,6 +373,16 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default=None,
         help="Optional path to also write the dataset as CSV.",
     )
+    parser.add_argument(
+        "--skip-compiled",
+        action="store_true",
+        help="Do not write the memory-mappable .bin sibling of the dataset.",
+    )
+    parser.add_argument(
+        "--sqlite",
+        action="store_true",
+        help="Also write a kali_tools.sqlite FTS5 catalog for KALI_DATASET_BACKEND=sqlite.",
+    )
     return parser.parse_args(argv)
 
 
@@ -323,7 +393,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         dataset = build_dataset_from_catalog()
     else:
         packages = discover_meta_packages()
-        dataset = build_dataset_from_system(packages)
+        dataset = merge_duplicate_records(build_dataset_from_system(packages))
         if not dataset:
             dataset = build_dataset_from_catalog()
 
@@ -339,6 +409,16 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     except FileNotFoundError:
         pass
 
+    if not args.skip_compiled and compiled is not None:
+        for json_path in (args.output, packaged_dataset):
+            if json_path.exists():
+                compiled.compile_dataset(json_path)
+
+    if args.sqlite:
+        if sqlite_backend is None:
+            raise RuntimeError("--sqlite requested but kali_mcp_server.sqlite_backend is unavailable")
+        sqlite_backend.build_sqlite_dataset(args.output)
+
     print(json.dumps({"output": str(args.output), **metrics}, indent=2))
     return 0
 
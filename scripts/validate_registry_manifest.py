@@ -31,6 +31,13 @@ def main() -> int:
         "run_kali_tool",
         "run_kali_tool_stream",
         "export_run_history",
+        "server_stats",
+        "reload_dataset",
+        "autocomplete_tools",
+        "submit_kali_job",
+        "job_status",
+        "job_output",
+        "cancel_job",
     }
     missing_tools = sorted(required_tools - tool_names)
     if missing_tools:
@@ -0,0 +1,195 @@
+"""Bounded capture of tool output.
+
+``run_tool`` used to hold everything a tool printed in memory before decoding
+it, so a verbose ``nikto`` or ``sqlmap`` run could exhaust the container.
+``OutputCapture`` keeps output in memory only up to ``KALI_CAPTURE_MEMORY_BYTES``
+per stream. Past that it writes the output to a spill file under
+``KALI_CAPTURE_DIR`` and keeps just a head and a tail excerpt in memory, so
+memory use stays flat however much the tool prints.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from .env import env_int
+
+ENV_CAPTURE_MEMORY_BYTES = "KALI_CAPTURE_MEMORY_BYTES"
+ENV_CAPTURE_EXCERPT_BYTES = "KALI_CAPTURE_EXCERPT_BYTES"
+ENV_CAPTURE_DIR = "KALI_CAPTURE_DIR"
+DEFAULT_MEMORY_BYTES = 1024 * 1024
+DEFAULT_EXCERPT_BYTES = 16 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+MAX_SPILL_FILES = 32
+
+
+def capture_dir() -> Path:
+    configured = os.environ.get(ENV_CAPTURE_DIR)
+    if configured:
+        return Path(configured).expanduser()
+    return Path(tempfile.gettempdir()) / "kali-mcp-runs"
+
+
+def _prune_spills(keep: Path) -> None:
+    """Drop all but the most recently written spill files next to ``keep``."""
+
+    def mtime(path: Path) -> int:
+        # Other server processes share the directory and prune it too.
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    spills = sorted(keep.parent.glob("*.log"), key=mtime, reverse=True)
+    for stale in spills[MAX_SPILL_FILES:]:
+        if stale != keep:
+            with suppress(OSError):
+                stale.unlink(missing_ok=True)
+
+
+def _decode(data: bytes, *, tail: bool = False) -> str:
+    if tail:
+        # Start the tail on a character boundary rather than mid-sequence.
+        start = 0
+        while start < min(len(data), 3) and 0x80 <= data[start] < 0xC0:
+            start += 1
+        data = data[start:]
+    return data.decode("utf-8", errors="replace")
+
+
+class OutputCapture:
+    """Collect one output stream within a fixed memory budget.
+
+    Up to ``memory_bytes`` are buffered and returned verbatim. Beyond that the
+    whole stream goes to a spill file, and ``text()`` returns the first and
+    last ``excerpt_bytes`` around an omission marker naming the file.
+
+    Spill files go to ``capture_dir()``, which keeps only the newest
+    ``MAX_SPILL_FILES``; pass ``directory`` to keep them elsewhere, with their
+    lifetime left to the caller (``discard``).
+    """
+
+    def __init__(
+        self,
+        label: str,
+        memory_bytes: Optional[int] = None,
+        excerpt_bytes: Optional[int] = None,
+        directory: Optional[Path] = None,
+    ):
+        if memory_bytes is None:
+            memory_bytes = env_int(ENV_CAPTURE_MEMORY_BYTES, DEFAULT_MEMORY_BYTES)
+        if excerpt_bytes is None:
+            excerpt_bytes = env_int(ENV_CAPTURE_EXCERPT_BYTES, DEFAULT_EXCERPT_BYTES)
+        self.label = label
+        self.directory = directory
+        self.memory_bytes = max(0, memory_bytes)
+        self.excerpt_bytes = max(1, excerpt_bytes)
+        self.total_bytes = 0
+        self.spill_path: Optional[Path] = None
+        self._buffer = bytearray()
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._spill: Optional[BinaryIO] = None
+
+    @property
+    def spilled(self) -> bool:
+        return self.spill_path is not None
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.total_bytes += len(chunk)
+        if len(self._head) < self.excerpt_bytes:
+            self._head += chunk[: self.excerpt_bytes - len(self._head)]
+        self._tail += chunk[-self.excerpt_bytes :]
+        del self._tail[: -self.excerpt_bytes]
+        if self._spill is None and self.spill_path is None:
+            if self.total_bytes <= self.memory_bytes:
+                self._buffer += chunk
+                return
+            self._open_spill()
+        if self._spill is not None:
+            self._spill.write(chunk)
+
+    def _open_spill(self) -> None:
+        directory = self.directory or capture_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=directory, prefix=f"{self.label}-", suffix=".log")
+        self._spill = os.fdopen(fd, "wb")
+        self.spill_path = Path(name)
+        self._spill.write(self._buffer)
+        self._buffer = bytearray()
+        if self.directory is None:
+            _prune_spills(self.spill_path)
+
+    async def drain(self, reader: Optional[asyncio.StreamReader]) -> None:
+        """Copy ``reader`` into the capture until EOF."""
+        if reader is None:
+            return
+        while True:
+            chunk = await reader.read(READ_CHUNK_BYTES)
+            if not chunk:
+                return
+            self.write(chunk)
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Up to ``length`` bytes of the stream from ``offset``, spilled or not."""
+        offset = max(0, offset)
+        if self.spill_path is None:
+            return bytes(self._buffer[offset : offset + max(0, length)])
+        if self._spill is not None:
+            self._spill.flush()
+        with self.spill_path.open("rb") as handle:
+            handle.seek(offset)
+            return handle.read(max(0, length))
+
+    def spill(self) -> None:
+        """Move a buffer larger than the excerpts to a spill file and close it.
+
+        For captures kept around after the run: only the head and tail stay in
+        memory, and ``read`` and ``text`` work as before.
+        """
+        if self.spill_path is None and len(self._buffer) > 2 * self.excerpt_bytes:
+            self._open_spill()
+        self.close()
+
+    def close(self) -> None:
+        """Flush and close the spill file; it stays on disk for later reading."""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def discard(self) -> None:
+        """Close and delete the spill file."""
+        self.close()
+        if self.spill_path is not None:
+            self.spill_path.unlink(missing_ok=True)
+
+    def text(self) -> str:
+        if not self.spilled:
+            return _decode(bytes(self._buffer))
+        omitted = self.total_bytes - len(self._head) - len(self._tail)
+        if omitted <= 0:  # the excerpts overlap; the tail alone is the rest
+            rest = self.total_bytes - len(self._head)
+            return _decode(bytes(self._head) + bytes(self._tail[len(self._tail) - rest :]))
+        return "\n".join(
+            (
+                _decode(bytes(self._head)),
+                f"... [{omitted} bytes omitted; full output in {self.spill_path}] ...",
+                _decode(bytes(self._tail), tail=True),
+            )
+        )
+
+    def summary(self) -> str:
+        """Section header: byte count, and how much is shown when truncated."""
+        if not self.spilled:
+            return f"--- {self.label} ({self.total_bytes} bytes) ---"
+        return (
+            f"--- {self.label} ({self.total_bytes} bytes; first {len(self._head)} and "
+            f"last {len(self._tail)} shown) ---"
+        )
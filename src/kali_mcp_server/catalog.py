@@ -2,9 +2,24 @@
 
 from __future__ import annotations
 
-from typing import Dict, Iterable, Tuple
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Tuple
 
 ToolLibrary = Dict[str, Dict[str, str]]
+TaskIntents = Dict[str, Tuple[str, ...]]
+
+ENV_TASK_INTENTS = "KALI_TOOL_INTENTS"
+
+logger = logging.getLogger("kali-security-server")
+
+# Meta-packages that bundle tools from other categories; a binary they share
+# with a category package takes its canonical record from the latter.
+AGGREGATE_META_PACKAGES = frozenset({"kali-tools-top10"})
+# CSV exports join owner lists with this separator (see scripts/sync_tools.py).
+CSV_OWNER_SEPARATOR = ";"
 
 KALI_TOOL_LIBRARY: ToolLibrary = {
     "information gathering": {
@@ -45,25 +60,179 @@ KALI_TOOL_BINARIES = {
 }
 
 
+# Task phrases and the tools that answer them, preferred tool first. Phrases
+# are matched after stemming and stopword removal, so "scanning ports" also
+# hits "scan port". Extend or override with a KALI_TOOL_INTENTS file.
+KALI_TASK_INTENTS: TaskIntents = {
+    "port scan": ("nmap",),
+    "scan port": ("nmap",),
+    "open ports": ("nmap",),
+    "host discovery": ("nmap",),
+    "ping sweep": ("nmap",),
+    "service version": ("nmap",),
+    "os fingerprint": ("nmap",),
+    "email harvest": ("theHarvester",),
+    "osint": ("theHarvester",),
+    "subdomain": ("theHarvester", "dnsenum"),
+    "dns enumeration": ("dnsenum",),
+    "dns records": ("dnsenum",),
+    "zone transfer": ("dnsenum",),
+    "web server scan": ("nikto",),
+    "web vulnerability": ("nikto", "sqlmap"),
+    "vulnerability scan": ("openvas", "nikto"),
+    "vulnerability assessment": ("openvas",),
+    "sql injection": ("sqlmap",),
+    "sqli": ("sqlmap",),
+    "database dump": ("sqlmap",),
+    "wpa handshake": ("aircrack-ng", "cowpatty"),
+    "wpa psk": ("cowpatty", "aircrack-ng"),
+    "crack wifi": ("aircrack-ng", "cowpatty"),
+    "wifi password": ("aircrack-ng", "cowpatty"),
+    "wep key": ("aircrack-ng",),
+    "wps": ("reaver",),
+    "wps pin": ("reaver",),
+    "exploit module": ("metasploit-framework",),
+    "reverse shell": ("metasploit-framework",),
+    "meterpreter": ("metasploit-framework",),
+    "payload": ("metasploit-framework",),
+    "exploit db": ("searchsploit",),
+    "search exploit": ("searchsploit",),
+    "find exploit": ("searchsploit",),
+    "xss": ("beef",),
+    "hook browser": ("beef",),
+    "browser exploitation": ("beef",),
+    "dump credentials": ("mimikatz", "crackmapexec"),
+    "windows password": ("mimikatz",),
+    "lsass": ("mimikatz",),
+    "kerberos ticket": ("mimikatz",),
+    "pass hash": ("crackmapexec", "mimikatz"),
+    "active directory": ("crackmapexec",),
+    "smb": ("crackmapexec",),
+    "password spray": ("crackmapexec",),
+    "powershell agent": ("empire",),
+    "command and control": ("empire", "metasploit-framework"),
+}
+
+
+def load_task_intents() -> TaskIntents:
+    """``KALI_TASK_INTENTS`` merged with the optional ``KALI_TOOL_INTENTS`` file.
+
+    The file (YAML or JSON) maps phrases to tool lists; a phrase it maps to an
+    empty list is dropped. The file is parsed once per modification time, and
+    an unreadable file or malformed entry is logged and skipped rather than
+    failing the dataset build.
+    """
+    path = os.environ.get(ENV_TASK_INTENTS)
+    if not path:
+        return dict(KALI_TASK_INTENTS)
+    resolved = Path(path).expanduser()
+    try:
+        mtime_ns = resolved.stat().st_mtime_ns
+    except OSError as exc:
+        logger.warning("Ignoring intents file %s: %s", resolved, exc)
+        return dict(KALI_TASK_INTENTS)
+    return dict(_load_intents_file(str(resolved), mtime_ns))
+
+
+@lru_cache(maxsize=4)
+def _load_intents_file(path: str, mtime_ns: int) -> TaskIntents:
+    import yaml  # only needed for an intents file; keeps this module stdlib-only
+
+    intents = dict(KALI_TASK_INTENTS)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            extra = yaml.safe_load(handle) or {}
+    except (OSError, UnicodeDecodeError, yaml.YAMLError) as exc:
+        logger.warning("Ignoring intents file %s: %s", path, exc)
+        return intents
+    if not isinstance(extra, dict):
+        logger.warning("Ignoring intents file %s: it must map phrases to tool lists", path)
+        return intents
+    for phrase, tools in extra.items():
+        if isinstance(tools, str):
+            tools = [tools]
+        if not isinstance(tools, list):
+            logger.warning("%s: skipping intent '%s'; it must list tool names", path, phrase)
+            continue
+        if tools:
+            intents[str(phrase).strip().lower()] = tuple(str(tool) for tool in tools)
+        else:
+            intents.pop(str(phrase).strip().lower(), None)
+    return intents
+
+
 def normalize(text: str) -> str:
     """Normalize free-form text for lookup."""
     return text.strip().lower()
 
 
+def owner_order(package: str, category: str) -> Tuple[bool, str, str]:
+    """Sort key for a binary's owners; the first is canonical.
+
+    Category packages come before aggregates, then packages sort lexically.
+    Both ``sync_tools.py`` and ``dataset.deduplicate_tools`` merge with it.
+    """
+    return (package in AGGREGATE_META_PACKAGES, package, category)
+
+
+class CatalogEntry(NamedTuple):
+    name: str
+    category: str
+    description: str
+    binary: str
+
+
 def iter_tools() -> Iterable[Tuple[str, str, str]]:
     """Yield (name, category, description) tuples for every known tool."""
-    for category, tools in KALI_TOOL_LIBRARY.items():
-        for name, description in tools.items():
-            yield name, category, description
+    for entry in catalog_entries():
+        yield entry.name, entry.category, entry.description
+
+
+@lru_cache(maxsize=None)
+def catalog_entries() -> Tuple[CatalogEntry, ...]:
+    """Every curated tool with its executable, in library order, built once."""
+    return tuple(
+        CatalogEntry(name, category, description, KALI_TOOL_BINARIES.get(normalize(name), name))
+        for category, tools in KALI_TOOL_LIBRARY.items()
+        for name, description in tools.items()
+    )
+
+
+@lru_cache(maxsize=None)
+def _entries_by_alias() -> Dict[str, CatalogEntry]:
+    """Normalised name, spaced name (``aircrack ng``) and binary -> entry."""
+    aliases: Dict[str, CatalogEntry] = {}
+    for entry in catalog_entries():
+        for alias in (entry.name, entry.name.replace("-", " "), entry.binary):
+            aliases.setdefault(normalize(alias), entry)
+    return aliases
+
+
+@lru_cache(maxsize=None)
+def _entries_by_category() -> Dict[str, Tuple[CatalogEntry, ...]]:
+    grouped: Dict[str, List[CatalogEntry]] = {}
+    for entry in catalog_entries():
+        grouped.setdefault(normalize(entry.category), []).append(entry)
+    return {category: tuple(entries) for category, entries in grouped.items()}
+
+
+def lookup_tool(tool_name: str) -> CatalogEntry:
+    """Return the catalog entry for a tool name, alias or binary."""
+    try:
+        return _entries_by_alias()[normalize(tool_name)]
+    except KeyError:
+        raise KeyError(f"Unknown tool: {tool_name}") from None
 
 
 def find_tool(tool_name: str) -> Tuple[str, str]:
     """Return category and description for a known tool."""
-    normalized = normalize(tool_name)
-    for name, category, description in iter_tools():
-        if normalized in {name.lower(), name.replace("-", " ").lower()}:
-            return category, description
-    raise KeyError(f"Unknown tool: {tool_name}")
+    entry = lookup_tool(tool_name)
+    return entry.category, entry.description
+
+
+def tools_in_category(category: str) -> Tuple[CatalogEntry, ...]:
+    """Entries filed under ``category`` (case-insensitive); empty if unknown."""
+    return _entries_by_category().get(normalize(category), ())
 
 
 def list_categories() -> Iterable[str]:
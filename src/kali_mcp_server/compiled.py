@@ -0,0 +1,278 @@
+"""Compact, pre-parsed binary form of the Kali tool dataset.
+
+``kali_tools.json`` stays the source of truth; ``compile_dataset`` turns it into
+a ``kali_tools.bin`` sibling that the server reads instead of parsing JSON.
+Strings are stored once (interned), so repeated package/category values cost a
+single entry and decode in one UTF-8 pass. Loading maps the file only while
+the ``Tool`` records are built and then closes it: the records are ordinary
+Python objects, so the saving is JSON parsing, not shared pages.
+
+Layout (little-endian, every section 4-byte aligned)::
+
+    header    magic, version, tool/string counts, source SHA-256, section offsets
+    offsets   u32[string_count + 1] code point offsets into the decoded strings
+    strings   UTF-8 data for every distinct string, concatenated
+    columns   u32[FIELD_COUNT][tool_count] string ids, one column per field;
+              owner lists (packages, categories) are stored newline-joined
+    names     u32[tool_count] tool indices sorted by lowercase name
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .dataset import Tool
+
+MAGIC = b"KMDS"
+FORMAT_VERSION = 2
+COMPILED_SUFFIX = ".bin"
+FIELDS = (
+    "name",
+    "package",
+    "category",
+    "summary",
+    "binary_path",
+    "default_args",
+    "packages",
+    "categories",
+)
+LIST_FIELDS = frozenset({"packages", "categories"})
+_LIST_SEPARATOR = "\n"
+_HEADER = struct.Struct("<4sHHII32sIIIII")
+
+
+def dataset_digest(path: Path) -> bytes:
+    """SHA-256 of the JSON dataset, used to detect stale compiled files."""
+    return hashlib.sha256(Path(path).read_bytes()).digest()
+
+
+def compiled_path_for(json_path: Path) -> Path:
+    return Path(json_path).with_suffix(COMPILED_SUFFIX)
+
+
+def _align(buffer: bytearray) -> None:
+    buffer.extend(b"\0" * (-len(buffer) % 4))
+
+
+def compile_dataset(json_path: Path, output_path: Optional[Path] = None) -> Path:
+    """Compile ``json_path`` into the binary format and return the output path."""
+    json_path = Path(json_path)
+    output_path = Path(output_path) if output_path else compiled_path_for(json_path)
+    raw = json_path.read_bytes()
+    entries = json.loads(raw)
+
+    string_ids: Dict[str, int] = {}
+    strings: List[str] = []
+    columns: List[List[int]] = [[] for _ in FIELDS]
+    for entry in entries:
+        for column, field in zip(columns, FIELDS):
+            if field in LIST_FIELDS:
+                value = _LIST_SEPARATOR.join(entry.get(field, ()))
+            elif field == "default_args":
+                value = entry.get(field, "")
+            else:
+                value = entry[field]
+            string_id = string_ids.get(value)
+            if string_id is None:
+                string_id = string_ids[value] = len(strings)
+                strings.append(value)
+            column.append(string_id)
+    name_order = sorted(range(len(entries)), key=lambda i: (entries[i]["name"].lower(), i))
+
+    body = bytearray()
+    offsets_at = _HEADER.size
+    position = 0
+    offsets = [0]
+    for data in strings:
+        position += len(data)
+        offsets.append(position)
+    body += struct.pack(f"<{len(offsets)}I", *offsets)
+    data_at = offsets_at + len(body)
+    body += "".join(strings).encode("utf-8")
+    data_end = offsets_at + len(body)
+    _align(body)
+    columns_at = offsets_at + len(body)
+    for column in columns:
+        body += struct.pack(f"<{len(column)}I", *column)
+    names_at = offsets_at + len(body)
+    body += struct.pack(f"<{len(name_order)}I", *name_order)
+
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(FIELDS),
+        len(entries),
+        len(strings),
+        hashlib.sha256(raw).digest(),
+        offsets_at,
+        data_at,
+        data_end,
+        columns_at,
+        names_at,
+    )
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, prefix=output_path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(header)
+            handle.write(body)
+        os.replace(tmp_name, output_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return output_path
+
+
+class CompiledDataset:
+    """Read-only view over a compiled dataset file mapped into memory.
+
+    Use it as a context manager (or call ``close``) to unmap the file; records
+    returned before that stay valid.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with self.path.open("rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            self._map.close()
+            raise ValueError(f"{self.path} is not a compiled Kali dataset")
+        (
+            magic,
+            version,
+            field_count,
+            self.tool_count,
+            string_count,
+            self.source_digest,
+            offsets_at,
+            data_at,
+            data_end,
+            columns_at,
+            names_at,
+        ) = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != FORMAT_VERSION or field_count != len(FIELDS):
+            self._map.close()
+            raise ValueError(f"{self.path} has an unsupported compiled dataset format")
+
+        view = memoryview(self._map)
+        self._offsets = view[offsets_at : offsets_at + 4 * (string_count + 1)].cast("I")
+        self._data = (data_at, data_end)
+        column_bytes = 4 * self.tool_count
+        self._columns = [
+            view[start : start + column_bytes].cast("I")
+            for start in range(columns_at, columns_at + column_bytes * len(FIELDS), column_bytes)
+        ]
+        self._name_order = view[names_at : names_at + column_bytes].cast("I")
+        self._strings: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return self.tool_count
+
+    def __enter__(self) -> "CompiledDataset":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the views into the map, then unmap the file."""
+        for view in (self._offsets, self._name_order, *self._columns):
+            view.release()
+        self._map.close()
+
+    @property
+    def strings(self) -> List[str]:
+        """Every distinct string, decoded with a single UTF-8 pass on first use."""
+        if self._strings is None:
+            start, stop = self._data
+            text = self._map[start:stop].decode("utf-8")
+            offsets = self._offsets
+            self._strings = [text[offsets[i] : offsets[i + 1]] for i in range(len(offsets) - 1)]
+        return self._strings
+
+    def _string(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+    def _owner_lists(self, column: Sequence[int]) -> Dict[int, Tuple[str, ...]]:
+        """Split each distinct owner-list string once; most ids are the empty list."""
+        lists: Dict[int, Tuple[str, ...]] = {}
+        for string_id in set(column):
+            value = self.strings[string_id]
+            lists[string_id] = tuple(value.split(_LIST_SEPARATOR)) if value else ()
+        return lists
+
+    def _values(self, field: str, column: Sequence[int]) -> Iterator[object]:
+        lookup = self._owner_lists(column) if field in LIST_FIELDS else self.strings
+        return map(lookup.__getitem__, column)
+
+    def tool(self, index: int) -> Tool:
+        return Tool(
+            *(
+                next(self._values(field, column[index : index + 1]))
+                for field, column in zip(FIELDS, self._columns)
+            )
+        )
+
+    def tools(self) -> List[Tool]:
+        """Materialise every record; equal strings share one ``str`` object."""
+        return list(
+            map(Tool, *(self._values(field, column) for field, column in zip(FIELDS, self._columns)))
+        )
+
+    def find(self, name: str) -> Optional[Tool]:
+        """Case-insensitive exact name lookup through the prebuilt name index."""
+        key = name.strip().lower()
+        names = self._columns[0]
+        position = bisect_left(
+            self._name_order, key, key=lambda index: self._string(names[index]).lower()
+        )
+        if position < self.tool_count:
+            index = self._name_order[position]
+            if self._string(names[index]).lower() == key:
+                return self.tool(index)
+        return None
+
+    def is_current(self, json_path: Path) -> bool:
+        return self.source_digest == dataset_digest(json_path)
+
+
+def load_compiled_tools(json_path: Path, digest: Optional[bytes] = None) -> Optional[List[Tool]]:
+    """Return tools from an up-to-date compiled sibling of ``json_path``, if any.
+
+    ``digest`` is the JSON's ``dataset_digest`` when the caller already has it.
+    """
+    compiled_path = compiled_path_for(json_path)
+    if not compiled_path.exists():
+        return None
+    try:
+        compiled = CompiledDataset(compiled_path)
+    except (OSError, ValueError):
+        return None
+    with compiled:
+        if compiled.source_digest != (digest or dataset_digest(json_path)):
+            return None
+        return compiled.tools()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile kali_tools.json into the binary format.")
+    parser.add_argument("dataset", type=Path, help="Path to kali_tools.json.")
+    parser.add_argument("--output", type=Path, default=None, help="Defaults to a .bin sibling.")
+    args = parser.parse_args(argv)
+    output = compile_dataset(args.dataset, args.output)
+    print(output, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - module CLI
+    raise SystemExit(main())
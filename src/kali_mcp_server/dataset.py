@@ -2,101 +2,708 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
+import heapq
 import json
+import logging
 import os
-from dataclasses import dataclass
-from functools import lru_cache
+import sys
+import threading
+from dataclasses import dataclass, field
 from importlib import resources
 from importlib.resources import abc as resources_abc
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence, Union
+from bisect import bisect_right
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 from rapidfuzz import fuzz
 
+from .cache import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL, QueryCache
+from .catalog import load_task_intents, owner_order
+from .env import env_float, env_int
+from .policy import get_policy
+from .index import (
+    BM25Index,
+    FacetIndex,
+    IntentIndex,
+    NameIndex,
+    TokenIndex,
+    analyze,
+    bit_positions,
+    joined_length,
+    name_aliases,
+    score_batch,
+)
+
+ENV_DATASET_BACKEND = "KALI_DATASET_BACKEND"
+ENV_DATASET_OVERLAYS = "KALI_TOOL_OVERLAYS"
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+
+logger = logging.getLogger("kali-security-server")
+
 DEFAULT_DATASET_PATHS: Sequence[Union[Path, resources_abc.Traversable]] = (
     Path(os.environ.get("KALI_TOOL_DATA", "")),
     Path(__file__).resolve().parents[2] / "data" / "kali_tools.json",
     resources.files("kali_mcp_server.assets") / "kali_tools.json",
 )
 
+# Fuzzy matches at or below this score are only returned when nothing beats it.
+MATCH_THRESHOLD = 40
+# Task descriptions with at least this many content terms are ranked by BM25.
+SUGGEST_MIN_TERMS = 2
+ENV_CACHE_SIZE = "KALI_SEARCH_CACHE_SIZE"
+ENV_CACHE_TTL = "KALI_SEARCH_CACHE_TTL"
+# Facets accepted by ``ToolDataset.facet_mask`` and the search_tools filters.
+FACETS = ("category", "package", "binary", "policy")
+BINARY_AVAILABLE = "available"
+BINARY_MISSING = "missing"
+POLICY_ALLOWED = "allowed"
+POLICY_TARGET_CONFIRMATION = "target_confirmation"
+# Filtered searches over at most this many tools score them all directly.
+FACET_DIRECT_SCORE_MAX = 512
+# Page sizes for list_tools / list_categories.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Tool:
+    """One catalog entry.
+
+    Slotted so large catalogs carry no per-record ``__dict__``. The strings
+    that repeat across thousands of records (package, category, default args)
+    are interned, and the lowercase forms used by search are computed once.
+
+    ``package``/``category`` are the canonical owner; ``packages`` and
+    ``categories`` list every owner of a binary shipped by several
+    meta-packages (see ``deduplicate_tools``) and default to the canonical one.
+    """
+
     name: str
     package: str
     category: str
     summary: str
     binary_path: str
     default_args: str
+    packages: Tuple[str, ...] = ()
+    categories: Tuple[str, ...] = ()
+    name_lc: str = field(init=False, repr=False, compare=False)
+    searchable_blob: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        assign = object.__setattr__
+        assign(self, "package", sys.intern(self.package))
+        assign(self, "category", sys.intern(self.category))
+        assign(self, "default_args", sys.intern(self.default_args))
+        assign(self, "packages", _owners(self.package, self.packages))
+        assign(self, "categories", _owners(self.category, self.categories))
+        name_lc = self.name.lower()
+        assign(self, "name_lc", name_lc)
+        assign(
+            self,
+            "searchable_blob",
+            " ".join(
+                [
+                    name_lc,
+                    " ".join(self.packages).lower(),
+                    " ".join(self.categories).lower(),
+                    self.summary.lower(),
+                ]
+            ),
+        )
 
     @property
-    def searchable_blob(self) -> str:
-        return " ".join(
-            [
-                self.name.lower(),
-                self.package.lower(),
-                self.category.lower(),
-                self.summary.lower(),
-            ]
+    def sort_key(self) -> Tuple[str, str, str]:
+        """Stable listing order: case-insensitive name, then exact name and path."""
+        return (self.name_lc, self.name, self.binary_path)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "package": self.package,
+            "category": self.category,
+            "summary": self.summary,
+            "binary_path": self.binary_path,
+            "default_args": self.default_args,
+            "packages": list(self.packages),
+            "categories": list(self.categories),
+        }
+
+
+_SINGLE_OWNERS: Dict[str, Tuple[str]] = {}
+
+
+def _owners(primary: str, owners: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Interned, de-duplicated owners with the canonical one first.
+
+    Almost every record has a single owner, so those tuples are shared.
+    """
+    if not owners or owners == (primary,):
+        single = _SINGLE_OWNERS.get(primary)
+        if single is None:
+            single = _SINGLE_OWNERS.setdefault(primary, (primary,))
+        return single
+    return tuple(dict.fromkeys(sys.intern(owner) for owner in (primary, *owners)))
+
+
+def deduplicate_tools(tools: Iterable[Tool]) -> List[Tool]:
+    """Collapse records for the same binary into one canonical record.
+
+    ``sync_tools.py`` emits a record per (package, binary), and overlapping
+    ``kali-tools-*`` meta-packages ship the same binaries. Records sharing a
+    name and binary path are merged: the first package by ``owner_order``
+    supplies the summary and defaults, and every owning package and category
+    is attached.
+    First-seen order is kept so positions stay stable across loads.
+    """
+    groups: Dict[Tuple[str, str], List[Tool]] = {}
+    for tool in tools:
+        groups.setdefault((tool.name, tool.binary_path), []).append(tool)
+    merged: List[Tool] = []
+    for group in groups.values():
+        if len(group) == 1:
+            merged.append(group[0])
+            continue
+        group.sort(key=lambda tool: owner_order(tool.package, tool.category))
+        primary = group[0]
+        merged.append(
+            Tool(
+                name=primary.name,
+                package=primary.package,
+                category=primary.category,
+                summary=primary.summary,
+                binary_path=primary.binary_path,
+                default_args=primary.default_args,
+                packages=tuple(owner for tool in group for owner in tool.packages),
+                categories=tuple(owner for tool in group for owner in tool.categories),
+            )
         )
+    return merged
+
+
+@dataclass(frozen=True)
+class Page:
+    """One slice of a listing plus the cursor that continues it."""
+
+    items: List
+    total: int
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(key: Sequence[str]) -> str:
+    """Opaque cursor naming the last listed entry; pages resume just after it."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, ...]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError(f"Invalid cursor '{cursor}'.") from exc
+    if not isinstance(key, list) or not all(isinstance(part, str) for part in key):
+        raise ValueError(f"Invalid cursor '{cursor}'.")
+    return tuple(key)
+
+
+def _paginate(
+    keys: Sequence[Tuple[str, ...]], items: Sequence, limit: int, cursor: str = ""
+) -> Page:
+    """Slice ``items`` (ordered by ``keys``) after ``cursor`` in O(log n + limit).
+
+    Cursors carry the last key rather than an offset, so a page fetched after
+    a dataset reload resumes at the right entry instead of skipping or
+    repeating tools.
+    """
+    limit = min(max(1, limit), MAX_PAGE_SIZE)
+    start = bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+    stop = min(start + limit, len(items))
+    next_cursor = encode_cursor(keys[stop - 1]) if stop < len(items) else None
+    return Page(items=list(items[start:stop]), total=len(items), next_cursor=next_cursor)
+
+
+@dataclass(frozen=True)
+class Overlay:
+    """Site changes layered over a dataset.
+
+    ``tools`` add entries or replace every lower-layer entry with the same
+    (case-insensitive) name; ``hide`` removes names from the layers below.
+    """
+
+    tools: Tuple[Tool, ...] = ()
+    hide: FrozenSet[str] = frozenset()
+    source: Optional[Path] = None
+
+
+def _relevance_document(tool: Tool) -> Tuple[str, str, str, str]:
+    return (tool.name, " ".join(tool.packages), " ".join(tool.categories), tool.summary)
+
+
+def _intent_first(
+    dataset: "ToolDataset",
+    intents: IntentIndex,
+    task: str,
+    limit: int,
+    ranked: Callable[[int], List[Tool]],
+) -> List[Tool]:
+    """Tools named by intent phrases in ``task``, topped up with ``ranked(n)``."""
+    hits = [tool for name in intents.tools_for(task) for tool in dataset.get_all(name)]
+    if len(hits) < limit:
+        hits.extend(ranked(limit + len(hits)))
+    return list(dict.fromkeys(hits))[:limit]
+
+
+def _normalize_query(query: str) -> str:
+    """Collapse whitespace; case is kept because token matching is case-sensitive.
+
+    Queries are scored in this form, not only cached under it, so ``"ma "``
+    and ``"ma"`` return the same tools. Name ratios used to count the padding.
+    """
+    return " ".join(query.split())
+
+
+def _default_cache() -> QueryCache:
+    return QueryCache(
+        maxsize=env_int(ENV_CACHE_SIZE, DEFAULT_CACHE_SIZE),
+        ttl=env_float(ENV_CACHE_TTL, DEFAULT_CACHE_TTL),
+    )
+
+
+def _binary_available(tool: Tool) -> bool:
+    return os.access(tool.binary_path, os.X_OK)
 
 
 class ToolDataset:
-    def __init__(self, tools: Iterable[Tool]):
-        self._tools: List[Tool] = list(tools)
-        self._tools_by_name: Dict[str, Tool] = {tool.name.lower(): tool for tool in self._tools}
+    def __init__(
+        self,
+        tools: Iterable[Tool],
+        cache: Optional[QueryCache] = None,
+        source: Optional[Path] = None,
+        state: Optional[Mapping[str, object]] = None,
+        overlays: Sequence[Path] = (),
+        binaries: Optional[Sequence[bool]] = None,
+    ):
+        """Build (or, given a matching ``state`` snapshot, restore) every index.
+
+        ``state`` comes from ``to_state`` on a dataset built from the same
+        records; a snapshot that does not fit is ignored and indexes are built.
+        ``overlays`` lists the overlay files applied on top of ``source``, and
+        ``binaries`` the already probed availability of each tool's binary.
+        """
+        self.source = source
+        self.overlays: Tuple[Path, ...] = tuple(overlays)
+        self._cache = cache if cache is not None else _default_cache()
+        self._tools: List[Tool] = deduplicate_tools(tools)
+        if state is not None and state.get("tool_count") != len(self._tools):
+            state = None
+        if state is None:
+            order = sorted(
+                range(len(self._tools)), key=lambda position: self._tools[position].sort_key
+            )
+        else:
+            order = state["order"]  # type: ignore[assignment]
+        self._order: List[int] = order
+        self._tools_by_name: Dict[str, Tuple[Tool, ...]] = {}
         self._categories: Dict[str, List[Tool]] = {}
-        for tool in self._tools:
-            category_key = tool.category.strip()
-            self._categories.setdefault(category_key, []).append(tool)
+        for tool in map(self._tools.__getitem__, order):
+            self._tools_by_name[tool.name_lc] = self._tools_by_name.get(tool.name_lc, ()) + (tool,)
+            for category in tool.categories:
+                self._categories.setdefault(category.strip(), []).append(tool)
+        self._category_keys = {
+            category: [tool.sort_key for tool in tools]
+            for category, tools in self._categories.items()
+        }
+        self._category_names = sorted(self._categories.keys())
+        self._category_name_keys = [(name,) for name in self._category_names]
         self._category_lookup = {
             category.lower(): category for category in self._categories.keys()
         }
+        self._blobs = [tool.searchable_blob for tool in self._tools]
+        self._names = [tool.name_lc for tool in self._tools]
+        if state is None:
+            self._index = TokenIndex(self._blobs, self._names)
+            self._name_index = NameIndex(
+                [name_aliases(tool.name, tool.binary_path) for tool in self._tools]
+            )
+            self._relevance = BM25Index([_relevance_document(tool) for tool in self._tools])
+        else:
+            self._index = TokenIndex.from_state(state["token_index"])  # type: ignore[arg-type]
+            self._name_index = NameIndex.from_state(state["name_index"])  # type: ignore[arg-type]
+            self._relevance = BM25Index.from_state(state["relevance"])  # type: ignore[arg-type]
+        # Facets are cheap, and binary availability depends on the host, so
+        # they are never snapshotted. Binaries are probed once per load;
+        # overlays reuse the probes of the tools they keep.
+        if binaries is None or len(binaries) != len(self._tools):
+            binaries = [_binary_available(tool) for tool in self._tools]
+        self._binaries: List[bool] = list(binaries)
+        self._facets = FacetIndex(len(self._tools))
+        self._facets.add("category", [tool.categories for tool in self._tools])
+        self._facets.add("package", [tool.packages for tool in self._tools])
+        self._facets.add(
+            "binary",
+            [(BINARY_AVAILABLE if available else BINARY_MISSING,) for available in self._binaries],
+        )
+        self._policy_seen: Optional[Mapping] = None
+        self._policy_lock = threading.Lock()
+        self._intents = IntentIndex(load_task_intents())
+
+    def overlay(self, overlay: Overlay) -> "ToolDataset":
+        """Return a new dataset with ``overlay`` applied on top of this one.
+
+        Only the overlay's entries are analysed; the indexes of the entries
+        kept from this dataset are renumbered and reused, so a large base
+        restored from the index cache stays cheap to extend.
+        """
+        removed = overlay.hide | {tool.name_lc for tool in overlay.tools}
+        kept = [
+            position for position, tool in enumerate(self._tools) if tool.name_lc not in removed
+        ]
+        added = deduplicate_tools(overlay.tools)
+        tools = [self._tools[position] for position in kept] + added
+        state = {
+            "tool_count": len(tools),
+            "order": sorted(range(len(tools)), key=lambda position: tools[position].sort_key),
+            "token_index": self._index.overlay(
+                kept, [tool.searchable_blob for tool in added], [tool.name_lc for tool in added]
+            ).to_state(),
+            "name_index": self._name_index.overlay(
+                kept, [name_aliases(tool.name, tool.binary_path) for tool in added]
+            ).to_state(),
+            "relevance": self._relevance.overlay(
+                kept, [_relevance_document(tool) for tool in added]
+            ).to_state(),
+        }
+        overlays = self.overlays + ((overlay.source,) if overlay.source else ())
+        binaries = [self._binaries[position] for position in kept]
+        binaries += [_binary_available(tool) for tool in added]
+        return ToolDataset(
+            tools, source=self.source, state=state, overlays=overlays, binaries=binaries
+        )
+
+    def to_state(self) -> Dict[str, object]:
+        """Plain-data snapshot of the built indexes, restorable via ``state=``."""
+        return {
+            "tool_count": len(self._tools),
+            "order": self._order,
+            "token_index": self._index.to_state(),
+            "name_index": self._name_index.to_state(),
+            "relevance": self._relevance.to_state(),
+        }
+
+    def __len__(self) -> int:
+        return len(self._tools)
 
     @property
     def categories(self) -> List[str]:
-        return sorted(self._categories.keys())
+        return list(self._category_names)
 
     def iter_tools(self) -> Iterable[Tool]:
         return iter(self._tools)
 
     def by_category(self, category: str) -> List[Tool]:
+        """Tools in ``category`` (case-insensitive), ordered by name."""
         key = self._category_lookup.get(category.lower(), category)
         return list(self._categories.get(key, []))
 
+    def page_category(
+        self, category: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str = ""
+    ) -> Page:
+        """One page of ``by_category``; raises ``ValueError`` for a malformed cursor."""
+        key = self._category_lookup.get(category.lower(), category)
+        return _paginate(
+            self._category_keys.get(key, []), self._categories.get(key, []), limit, cursor
+        )
+
+    def page_categories(self, limit: int = DEFAULT_PAGE_SIZE, cursor: str = "") -> Page:
+        return _paginate(self._category_name_keys, self._category_names, limit, cursor)
+
     def get(self, name: str) -> Optional[Tool]:
+        """Case-insensitive lookup; the first of ``get_all`` when names collide."""
+        matches = self.get_all(name)
+        return matches[0] if matches else None
+
+    def get_all(self, name: str) -> List[Tool]:
+        """Every record named ``name``, ordered by binary path."""
         key = name.lower().strip()
-        tool = self._tools_by_name.get(key)
-        if tool:
-            return tool
-        alt_key = key.replace(" ", "-")
-        return self._tools_by_name.get(alt_key)
-
-    def fuzzy_search(self, query: str, limit: int = 10) -> List[Tool]:
-        if not query.strip():
+        matches = self._tools_by_name.get(key)
+        if not matches:
+            matches = self._tools_by_name.get(key.replace(" ", "-"), ())
+        return list(matches)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Tool]:
+        """Tools whose name (or binary name) starts with ``prefix``, alphabetically."""
+        positions = self._name_index.complete(prefix, max(1, limit))
+        return [self._tools[position] for position in positions]
+
+    def did_you_mean(self, name: str, limit: int = 5) -> List[Tool]:
+        """Suggestions for an unknown tool name, closest spelling first.
+
+        Near misses and truncations come straight from the name index; only
+        names that resemble nothing fall back to a full ``fuzzy_search``.
+        """
+        positions = self._name_index.lookup(name, max(1, limit))
+        if not positions:
+            return self.fuzzy_search(name, limit)
+        return [self._tools[position] for position in positions]
+
+    def facet_mask(self, filters: Mapping[str, str]) -> int:
+        """Bitset of positions matching every ``facet: value`` pair in ``filters``.
+
+        Raises ``ValueError`` for a facet outside ``FACETS``.
+        """
+        self._check_filters(filters)
+        mask = self._facets.all
+        for facet, value in filters.items():
+            mask &= self._facets.mask(facet, value)
+        return mask
+
+    def _check_filters(self, filters: Mapping[str, str]) -> None:
+        """Reject unknown facets and bring the policy facet up to date."""
+        for facet in filters:
+            if facet not in FACETS:
+                raise ValueError(f"Unknown filter '{facet}'. Use one of: {', '.join(FACETS)}.")
+        if "policy" in filters:
+            self._refresh_policy_facet()
+
+    def filter_tools(self, filters: Mapping[str, str]) -> List[Tool]:
+        """Every tool matching ``filters``, ordered by name."""
+        tools = [self._tools[position] for position in bit_positions(self.facet_mask(filters))]
+        return sorted(tools, key=lambda tool: tool.sort_key)
+
+    def facet_counts(
+        self, facet: str, filters: Optional[Mapping[str, str]] = None
+    ) -> Dict[str, int]:
+        """Tools per value of ``facet``, within the tools matching ``filters``."""
+        if facet not in FACETS:
+            raise ValueError(f"Unknown facet '{facet}'. Use one of: {', '.join(FACETS)}.")
+        if facet == "policy":
+            self._refresh_policy_facet()
+        return self._facets.counts(facet, self.facet_mask(filters or {}))
+
+    def _refresh_policy_facet(self) -> None:
+        """(Re)build the policy facet when the execution policy was reloaded."""
+        policy = get_policy()
+        if policy is self._policy_seen:
+            return
+        with self._policy_lock:
+            if policy is self._policy_seen:
+                return
+            rules = policy.get("tools", {}) or {}
+            self._facets.add(
+                "policy",
+                [
+                    (
+                        POLICY_TARGET_CONFIRMATION
+                        if (rules.get(tool.name_lc) or {}).get("requires_target_confirmation")
+                        else POLICY_ALLOWED,
+                    )
+                    for tool in self._tools
+                ],
+            )
+            # Cached filtered searches may depend on the previous policy.
+            if self._policy_seen is not None:
+                self._cache.clear()
+            self._policy_seen = policy
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def cache_stats(self) -> Dict[str, Optional[float]]:
+        """Hit/miss counters for the search and suggestion cache."""
+        return self._cache.stats()
+
+    def fuzzy_search(
+        self, query: str, limit: int = 10, filters: Optional[Mapping[str, str]] = None
+    ) -> List[Tool]:
+        """Best fuzzy matches for ``query``, optionally restricted by facet ``filters``.
+
+        Filters are intersected as bitsets before anything is scored; an
+        unknown facet raises ``ValueError``. Runs of whitespace in ``query``
+        count as one space, and surrounding whitespace is ignored.
+        """
+        query = _normalize_query(query)
+        if not query:
             return []
 
         limit = max(1, limit)
-        scored = []
+        filters = {facet: value.strip().lower() for facet, value in (filters or {}).items()}
+        # A policy reload clears the cache, so check before looking it up;
+        # the mask itself is only needed on a miss.
+        self._check_filters(filters)
+
+        def compute() -> Tuple[Tool, ...]:
+            allowed: Optional[Set[int]] = None
+            if filters:
+                allowed = set(bit_positions(self.facet_mask(filters)))
+            return tuple(self._fuzzy_search(query, limit, allowed))
+
+        return list(
+            self._cache.get_or_compute(
+                ("search", query, limit, tuple(sorted(filters.items()))), compute
+            )
+        )
+
+    def _fuzzy_search(
+        self, query: str, limit: int, allowed: Optional[Set[int]] = None
+    ) -> List[Tool]:
         query_lc = query.lower()
-        for tool in self._tools:
-            blob_score = fuzz.token_set_ratio(query, tool.searchable_blob)
-            name_score = fuzz.ratio(query_lc, tool.name.lower())
-            scored.append((max(blob_score, name_score), tool))
-        scored.sort(key=lambda item: item[0], reverse=True)
+        query_tokens = set(query.split())
+        if allowed is not None and len(allowed) <= FACET_DIRECT_SCORE_MAX:
+            return self._scan(query, query_lc, limit, sorted(allowed))
+
+        # Score tools sharing a query token first; the k-th best of those is a
+        # lower bound for the final cutoff, so the length windows in the index
+        # only need to surface tools that could still reach it. With filters,
+        # every candidate set is intersected with the allowed positions.
+        scores: Dict[int, float] = {}
+        sharing = self._index.sharing_tokens(query_tokens)
+        if allowed is not None:
+            sharing &= allowed
+        self._score_batch(sorted(sharing), query, query_lc, scores)
+        top = heapq.nlargest(limit, scores.values())
+        cutoff: float = MATCH_THRESHOLD
+        if len(top) >= limit and top[-1] > cutoff:
+            cutoff = top[-1]
 
-        filtered = [tool for score, tool in scored if score > 40]
+        # A tool scores at least its name ratio, so the k-th best name is also a
+        # valid lower bound and usually tightens the cutoff considerably.
+        named = self._index.name_candidates(query_lc, cutoff)
+        if allowed is not None:
+            named = [(position, score) for position, score in named if position in allowed]
+        top_names = heapq.nlargest(limit, (score for _position, score in named))
+        if len(top_names) >= limit and top_names[-1] > cutoff:
+            cutoff = top_names[-1]
+
+        extra = set(self._index.blob_candidates(joined_length(query_tokens), cutoff))
+        extra.update(position for position, score in named if score >= cutoff)
+        extra.difference_update(scores)
+        if allowed is not None:
+            extra &= allowed
+        self._score_batch(sorted(extra), query, query_lc, scores)
+
+        matches = heapq.nsmallest(
+            limit,
+            (position for position, score in scores.items() if score > MATCH_THRESHOLD),
+            key=lambda position: (-scores[position], position),
+        )
+        if not matches:
+            return self._scan(query, query_lc, limit, None if allowed is None else sorted(allowed))
+        return [self._tools[position] for position in matches]
+
+    def suggest(self, task: str, limit: int = 5) -> List[Tool]:
+        """Rank tools for a free-form task description.
+
+        Tools named by curated intent phrases found in the task come first.
+        The rest are ranked by BM25 term relevance for multi-word descriptions
+        and by fuzzy_search for short, name-like ones (or ones sharing no
+        indexed term).
+        """
+        task = _normalize_query(task)
+        limit = max(1, limit)
+        return list(
+            self._cache.get_or_compute(
+                ("suggest", task, limit),
+                lambda: tuple(_intent_first(self, self._intents, task, limit, self._ranked(task))),
+            )
+        )
+
+    def _ranked(self, task: str) -> Callable[[int], List[Tool]]:
+        if len(analyze(task)) < SUGGEST_MIN_TERMS:
+            return lambda limit: self.fuzzy_search(task, limit)
+        return lambda limit: self._suggest(task, limit)
+
+    def _suggest(self, task: str, limit: int) -> List[Tool]:
+        ranked = self._relevance.search(task, limit)
+        if ranked:
+            return [self._tools[document] for document, _score in ranked]
+        return self.fuzzy_search(task, limit)
+
+    def _score_batch(
+        self,
+        positions: Sequence[int],
+        query: str,
+        query_lc: str,
+        scores: Dict[int, float],
+        score_cutoff: float = MATCH_THRESHOLD,
+    ) -> None:
+        """Record ``max(token_set_ratio, ratio)`` for ``positions`` into ``scores``.
+
+        Scores below ``score_cutoff`` are recorded as 0.
+        """
+        if not positions:
+            return
+        batch = dict.fromkeys(positions, 0.0)
+        blobs = [self._blobs[position] for position in positions]
+        names = [self._names[position] for position in positions]
+        for offset, score in score_batch(query, blobs, fuzz.token_set_ratio, score_cutoff):
+            batch[positions[offset]] = score
+        for offset, score in score_batch(query_lc, names, fuzz.ratio, score_cutoff):
+            position = positions[offset]
+            if score > batch[position]:
+                batch[position] = score
+        scores.update(batch)
+
+    def _scan(
+        self,
+        query: str,
+        query_lc: str,
+        limit: int,
+        positions: Optional[Sequence[int]] = None,
+    ) -> List[Tool]:
+        """Score every tool (or just ``positions``) without the index.
+
+        Used for small filtered subsets and when no tool clears
+        ``MATCH_THRESHOLD``; weaker matches are returned only in that case.
+        """
+        scores: Dict[int, float] = {}
+        if positions is None:
+            positions = range(len(self._tools))
+        self._score_batch(positions, query, query_lc, scores, score_cutoff=0)
+        ranked = sorted(scores, key=lambda position: (-scores[position], position))
+
+        filtered = [position for position in ranked if scores[position] > MATCH_THRESHOLD]
         if not filtered:
-            filtered = [tool for score, tool in scored if score > 0]
+            filtered = [position for position in ranked if scores[position] > 0]
         if not filtered:
-            filtered = [tool for _score, tool in scored]
+            filtered = ranked
+
+        return [self._tools[position] for position in filtered[:limit]]
 
-        return filtered[:limit]
+
+def overlay_paths() -> List[Path]:
+    """Overlay files named by ``KALI_TOOL_OVERLAYS`` (``os.pathsep``-separated)."""
+    raw = os.environ.get(ENV_DATASET_OVERLAYS, "")
+    return [Path(part).expanduser() for part in raw.split(os.pathsep) if part.strip()]
 
 
 def load_dataset(
     paths: Iterable[Union[Path, resources_abc.Traversable]] = DEFAULT_DATASET_PATHS,
+    overlays: Optional[Sequence[Path]] = None,
 ) -> ToolDataset:
+    """Open the first dataset found in ``paths`` and apply ``overlays`` in order.
+
+    ``overlays`` defaults to ``overlay_paths()``. Overlays need the in-memory
+    backend, which is used whenever any are configured.
+    """
+    if overlays is None:
+        overlays = overlay_paths()
+    backend = BACKEND_MEMORY if overlays else None
     for candidate in paths:
         if not candidate:
             continue
@@ -105,32 +712,165 @@ def load_dataset(
             if candidate.is_dir():
                 json_path = candidate / "kali_tools.json"
             if json_path.exists():
-                tools = _load_tools_from_json(json_path)
-                return ToolDataset(tools)
+                return _apply_overlays(_open_dataset(json_path, backend), overlays)
         else:
             with resources.as_file(candidate) as tmp:
-                tools = _load_tools_from_json(tmp)
-                return ToolDataset(tools)
+                return _apply_overlays(_open_dataset(tmp, backend), overlays)
     raise FileNotFoundError("No kali tool dataset found; run scripts/sync_tools.py")
 
 
-@lru_cache(maxsize=1)
+def _apply_overlays(dataset: ToolDataset, overlays: Sequence[Path]) -> ToolDataset:
+    for path in overlays:
+        dataset = dataset.overlay(load_overlay(path, dataset))
+    return dataset
+
+
+def load_overlay(path: Path, below: ToolDataset) -> Overlay:
+    """Read an overlay file.
+
+    The file holds either a list of tool entries or an object with ``tools``
+    and ``hide`` (a list of names). An entry for a tool that exists in
+    ``below`` may give only the fields it changes.
+    """
+    payload = json.loads(Path(path).read_text())
+    if isinstance(payload, list):
+        payload = {"tools": payload}
+    if not isinstance(payload, dict):
+        raise ValueError(f"{path}: an overlay must be a list of tools or an object")
+    hide = frozenset(str(name).strip().lower() for name in payload.get("hide", ()))
+    tools = tuple(
+        _overlay_tool(entry, below, path) for entry in payload.get("tools", ())
+    )
+    return Overlay(tools=tools, hide=hide, source=Path(path))
+
+
+def _overlay_tool(entry: Mapping[str, object], below: ToolDataset, path: Path) -> Tool:
+    if "name" not in entry:
+        raise ValueError(f"{path}: overlay entry without a name: {entry!r}")
+    current = below.get(str(entry["name"]))
+    if current is None:
+        try:
+            return _tool_from_entry(entry)
+        except KeyError as exc:
+            raise ValueError(
+                f"{path}: new tool '{entry['name']}' is missing the {exc.args[0]} field"
+            ) from None
+    fields: Dict[str, object] = current.to_dict()
+    # Owner lists describe the replaced owners; keep them only if those stay.
+    if "package" in entry:
+        fields.pop("packages")
+    if "category" in entry:
+        fields.pop("categories")
+    fields.update(entry)
+    return _tool_from_entry(fields)
+
+
+def _open_dataset(json_path: Path, backend: Optional[str] = None) -> ToolDataset:
+    """Open ``json_path`` with the backend chosen by ``KALI_DATASET_BACKEND``.
+
+    The SQLite backend needs an up-to-date ``.sqlite`` sibling written by
+    ``sync_tools.py --sqlite``; without one the in-memory backend is used. The
+    in-memory backend restores its indexes from a current ``.index`` sibling
+    (see ``scripts/build_tool_index.py``) or the ``KALI_INDEX_CACHE_DIR``
+    cache, and builds (and caches) them otherwise.
+    """
+    requested = os.environ.get(ENV_DATASET_BACKEND, BACKEND_MEMORY).strip().lower()
+    if backend is not None and requested != backend:
+        logger.warning("Dataset overlays need the %s backend; ignoring %s", backend, requested)
+    backend = backend or requested
+    if backend == BACKEND_SQLITE:
+        from .sqlite_backend import open_sqlite_dataset  # circular import: needs Tool
+
+        dataset = open_sqlite_dataset(json_path)
+        if dataset is not None:
+            return dataset  # type: ignore[return-value]
+        logger.warning(
+            "No current SQLite catalog next to %s; using the in-memory backend", json_path
+        )
+    elif backend != BACKEND_MEMORY:
+        logger.warning("Unknown %s '%s'; using the in-memory backend", ENV_DATASET_BACKEND, backend)
+    from .snapshot import load_indexed_dataset  # circular import: snapshot needs ToolDataset
+
+    return load_indexed_dataset(json_path)
+
+
+_DATASET: Optional[ToolDataset] = None
+_DATASET_LOCK = threading.Lock()
+
+
 def get_dataset() -> ToolDataset:
-    return load_dataset()
+    """Return the current dataset snapshot, loading it on first use.
+
+    Callers should fetch the snapshot once per request and keep using it;
+    ``reload_dataset`` swaps in a new one without touching snapshots in use.
+    """
+    dataset = _DATASET
+    if dataset is None:
+        with _DATASET_LOCK:
+            if _DATASET is None:
+                _swap_dataset(load_dataset())
+            dataset = _DATASET
+    assert dataset is not None
+    return dataset
+
+
+def current_dataset() -> Optional[ToolDataset]:
+    """Return the current snapshot without loading one, or ``None``."""
+    return _DATASET
+
+
+def reload_dataset(
+    paths: Iterable[Union[Path, resources_abc.Traversable]] = DEFAULT_DATASET_PATHS,
+) -> ToolDataset:
+    """Build a fresh dataset with all of its indexes, then swap it in atomically.
+
+    Safe to call from a worker thread. If loading fails the current snapshot
+    stays in place and the exception propagates.
+    """
+    with _DATASET_LOCK:
+        fresh = load_dataset(paths)
+        previous = _swap_dataset(fresh)
+    if previous is not None:
+        previous.clear_cache()
+    return fresh
+
+
+def _swap_dataset(dataset: ToolDataset) -> Optional[ToolDataset]:
+    global _DATASET
+    previous, _DATASET = _DATASET, dataset
+    return previous
+
+
+def _load_tools(json_path: Path, digest: Optional[bytes] = None) -> List[Tool]:
+    """Read a dataset file; JSONL and CSV are streamed, JSON may come precompiled.
+
+    For JSON an up-to-date compiled sibling is preferred over parsing; pass the
+    file's ``dataset_digest`` as ``digest`` if it is already known.
+    """
+    from .compiled import load_compiled_tools  # circular import: compiled needs Tool
+    from .loaders import STREAMING_SUFFIXES, load_tools
+
+    if json_path.suffix.lower() in STREAMING_SUFFIXES:
+        return load_tools(json_path)
+    tools = load_compiled_tools(json_path, digest)
+    if tools is None:
+        tools = _load_tools_from_json(json_path)
+    return tools
 
 
 def _load_tools_from_json(path: Path) -> List[Tool]:
     payload = json.loads(path.read_text())
-    tools = []
-    for entry in payload:
-        tools.append(
-            Tool(
-                name=entry["name"],
-                package=entry["package"],
-                category=entry["category"],
-                summary=entry["summary"],
-                binary_path=entry["binary_path"],
-                default_args=entry.get("default_args", ""),
-            )
-        )
-    return tools
+    return [_tool_from_entry(entry) for entry in payload]
+
+
+def _tool_from_entry(entry: Mapping) -> Tool:
+    return Tool(
+        name=entry["name"],
+        package=entry["package"],
+        category=entry["category"],
+        summary=entry["summary"],
+        binary_path=entry["binary_path"],
+        default_args=entry.get("default_args", ""),
+        packages=tuple(entry.get("packages", ())),
+        categories=tuple(entry.get("categories", ())),
+    )
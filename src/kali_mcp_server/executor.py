@@ -6,12 +6,24 @@ import asyncio
 import os
 import shlex
 from collections import deque
+from contextlib import suppress
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Deque, Dict, Iterable, List, Optional, Tuple
 
+from .capture import OutputCapture
 from .dataset import Tool, ToolDataset, get_dataset
 from .policy import get_global_setting, get_policy, get_tool_policy
+from .scheduler import DEFAULT_PRIORITY, RunScheduler
+from .streaming import (
+    DEFAULT_QUEUE_SIZE,
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_OLDEST,
+    OVERFLOW_MODES,
+    OutputFramer,
+    StreamQueue,
+    read_chunks,
+)
 
 try:  # pragma: no cover - platform specific
     import resource as _resource
@@ -21,7 +33,7 @@ except ImportError:  # pragma: no cover - non-Unix platforms
 DEFAULT_TIMEOUT_SECONDS = 60.0
 RUN_HISTORY_LIMIT = 100
 RUN_HISTORY: Deque[Dict[str, object]] = deque(maxlen=RUN_HISTORY_LIMIT)
-_RUN_SEMAPHORE: Optional[asyncio.Semaphore] = None
+_RUN_SCHEDULER: Optional[RunScheduler] = None
 
 
 def get_run_history() -> List[Dict[str, object]]:
@@ -40,16 +52,17 @@ def _record_run(entry: Dict[str, object]) -> None:
 
 def reset_runtime_limits() -> None:
     """Reset cached concurrency controls (used when policy changes)."""
-    global _RUN_SEMAPHORE
-    _RUN_SEMAPHORE = None
+    global _RUN_SCHEDULER
+    _RUN_SCHEDULER = None
 
 
-def _get_semaphore() -> asyncio.Semaphore:
-    global _RUN_SEMAPHORE
-    if _RUN_SEMAPHORE is None:
+def get_scheduler() -> RunScheduler:
+    """The run scheduler for the current policy, created on first use."""
+    global _RUN_SCHEDULER
+    if _RUN_SCHEDULER is None:
         max_runs = get_global_setting("max_concurrent_runs", 1) or 1
-        _RUN_SEMAPHORE = asyncio.Semaphore(max(1, int(max_runs)))
-    return _RUN_SEMAPHORE
+        _RUN_SCHEDULER = RunScheduler(max(1, int(max_runs)))
+    return _RUN_SCHEDULER
 
 
 @dataclass
@@ -58,6 +71,21 @@ class ExecutionPlan:
     command: List[str]
     timeout: float
     resource_limits: Dict[str, float]
+    stream_queue_size: int = DEFAULT_QUEUE_SIZE
+    stream_overflow: str = OVERFLOW_BLOCK
+    priority: str = DEFAULT_PRIORITY
+    weight: float = 1.0
+    max_concurrent: Optional[int] = None
+
+    def slot(self, client: Optional[str] = None):
+        """Wait for a run slot under this plan's priority, weight and cap."""
+        return get_scheduler().slot(
+            self.tool.name,
+            self.priority,
+            weight=self.weight,
+            cap=self.max_concurrent,
+            client=client,
+        )
 
 
 def _parse_arguments(arguments: str) -> List[str]:
@@ -98,7 +126,7 @@ def _resolve_execution(
 
     tool = dataset.get(tool_name)
     if not tool:
-        suggestions = dataset.fuzzy_search(tool_name, limit=5)
+        suggestions = dataset.did_you_mean(tool_name, limit=5)
         if suggestions:
             lines = [f"Error: Unknown tool '{tool_name}'. Suggestions:"]
             lines.extend(f"- {suggestion.name}" for suggestion in suggestions)
@@ -143,6 +171,7 @@ def _resolve_execution(
         timeout = min(timeout, float(max_timeout))
 
     resource_limits = _compute_resource_limits(global_policy, policy)
+    queue_size, overflow = _stream_settings(global_policy, policy)
 
     return (
         ExecutionPlan(
@@ -150,11 +179,48 @@ def _resolve_execution(
             command=[binary, *extra_args],
             timeout=timeout,
             resource_limits=resource_limits,
+            stream_queue_size=queue_size,
+            stream_overflow=overflow,
+            priority=str(policy.get("priority", DEFAULT_PRIORITY)),
+            weight=_positive_float(policy.get("weight"), 1.0),
+            max_concurrent=_positive_int(policy.get("max_concurrent_runs")),
         ),
         None,
     )
 
 
+def _positive_float(value: object, default: float) -> float:
+    try:
+        number = float(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return default
+    return number if number > 0 else default
+
+
+def _positive_int(value: object) -> Optional[int]:
+    try:
+        number = int(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def _stream_settings(
+    global_policy: Dict[str, object], tool_policy: Dict[str, object]
+) -> Tuple[int, str]:
+    """``stream_queue_size`` and ``stream_overflow``, tool policy first."""
+    global_policy = global_policy or {}
+    size = tool_policy.get("stream_queue_size", global_policy.get("stream_queue_size"))
+    try:
+        queue_size = max(1, int(size)) if size is not None else DEFAULT_QUEUE_SIZE
+    except (TypeError, ValueError):
+        queue_size = DEFAULT_QUEUE_SIZE
+    overflow = str(
+        tool_policy.get("stream_overflow", global_policy.get("stream_overflow", OVERFLOW_BLOCK))
+    ).lower()
+    return queue_size, overflow if overflow in OVERFLOW_MODES else OVERFLOW_BLOCK
+
+
 def _compute_resource_limits(
     global_policy: Dict[str, object], tool_policy: Dict[str, object]
 ) -> Dict[str, float]:
@@ -200,37 +266,73 @@ def _build_preexec_fn(resource_limits: Dict[str, float]):
     return _limit_resources
 
 
+async def _spawn(plan: ExecutionPlan) -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec(
+        *plan.command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        preexec_fn=_build_preexec_fn(plan.resource_limits),
+    )
+
+
+async def _capture(
+    plan: ExecutionPlan,
+    process: asyncio.subprocess.Process,
+    stdout: OutputCapture,
+    stderr: OutputCapture,
+) -> int:
+    """Drain ``process`` into the captures and return its exit code.
+
+    The process is killed if ``plan.timeout`` passes (``asyncio.TimeoutError``
+    is raised), the caller is cancelled or capturing the output fails.
+    """
+
+    async def collect() -> int:
+        await asyncio.gather(stdout.drain(process.stdout), stderr.drain(process.stderr))
+        return await process.wait()
+
+    try:
+        return await asyncio.wait_for(collect(), timeout=plan.timeout)
+    except BaseException:
+        with suppress(ProcessLookupError):
+            process.kill()
+        await process.wait()
+        raise
+
+
 async def run_tool(
     tool_name: str,
     arguments: str = "",
     timeout: float = DEFAULT_TIMEOUT_SECONDS,
     dataset: Optional[ToolDataset] = None,
+    client: Optional[str] = None,
 ) -> str:
-    """Execute a Kali tool and capture stdout/stderr."""
+    """Execute a Kali tool and capture stdout/stderr.
+
+    Each stream is captured with ``OutputCapture``: small outputs are returned
+    whole, large ones as head and tail excerpts with the full text spilled to
+    a file named in the response.
+    """
     dataset = dataset or get_dataset()
     plan, error = _resolve_execution(tool_name, arguments, timeout, dataset)
     if error:
         return error
     assert plan is not None  # for type checkers
 
-    semaphore = _get_semaphore()
     start = datetime.now(timezone.utc)
-    async with semaphore:
+    async with plan.slot(client):
         try:
-            process = await asyncio.create_subprocess_exec(
-                *plan.command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                preexec_fn=_build_preexec_fn(plan.resource_limits),
-            )
+            process = await _spawn(plan)
         except FileNotFoundError:  # pragma: no cover - defensive
             return f"Error: Executable '{plan.command[0]}' not found inside the container."
 
+        stdout = OutputCapture("stdout")
+        stderr = OutputCapture("stderr")
         try:
-            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=plan.timeout)
+            returncode = await _capture(plan, process, stdout, stderr)
         except asyncio.TimeoutError:
-            process.kill()
-            await process.communicate()
+            stdout.discard()
+            stderr.discard()
             _record_run(
                 {
                     "tool": plan.tool.name,
@@ -240,25 +342,30 @@ async def run_tool(
                 }
             )
             return f"Error: Tool execution timed out after {int(plan.timeout)} seconds."
+        finally:
+            stdout.close()
+            stderr.close()
 
     duration = (datetime.now(timezone.utc) - start).total_seconds()
     _record_run(
         {
             "tool": plan.tool.name,
             "arguments": arguments,
-            "exit_code": process.returncode,
+            "exit_code": returncode,
             "duration": duration,
             "mode": "batch",
+            "stdout_bytes": stdout.total_bytes,
+            "stderr_bytes": stderr.total_bytes,
         }
     )
 
     output_lines = [
         f"Command: {' '.join(plan.command)}",
-        f"Exit code: {process.returncode}",
-        "--- stdout ---",
-        stdout.decode("utf-8", errors="replace") or "<no output>",
-        "--- stderr ---",
-        stderr.decode("utf-8", errors="replace") or "<no output>",
+        f"Exit code: {returncode}",
+        stdout.summary(),
+        stdout.text() or "<no output>",
+        stderr.summary(),
+        stderr.text() or "<no output>",
     ]
     return "\n".join(output_lines)
 
@@ -268,8 +375,13 @@ async def stream_tool(
     arguments: str = "",
     timeout: float = DEFAULT_TIMEOUT_SECONDS,
     dataset: Optional[ToolDataset] = None,
+    client: Optional[str] = None,
 ):
-    """Async generator that streams tool output line-by-line."""
+    """Async generator that streams tool output as coalesced frames.
+
+    Each frame holds one or more ``[stdout]``/``[stderr]`` lines (see
+    ``OutputFramer``); the last item is ``[meta] exit_code=N``.
+    """
     dataset = dataset or get_dataset()
     plan, error = _resolve_execution(tool_name, arguments, timeout, dataset)
     if error:
@@ -277,47 +389,56 @@ async def stream_tool(
         return
     assert plan is not None
 
-    semaphore = _get_semaphore()
     start = datetime.now(timezone.utc)
-    async with semaphore:
+    async with plan.slot(client):
         try:
-            process = await asyncio.create_subprocess_exec(
-                *plan.command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                preexec_fn=_build_preexec_fn(plan.resource_limits),
-            )
+            process = await _spawn(plan)
         except FileNotFoundError:
             yield f"Error: Executable '{plan.command[0]}' not found inside the container."
             return
 
-        queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        # A full queue stops the pumps reading, so the pipe fills and the OS
+        # throttles the child, unless the policy prefers dropping old output.
+        queue = StreamQueue(
+            plan.stream_queue_size, drop_oldest=plan.stream_overflow == OVERFLOW_DROP_OLDEST
+        )
 
         async def pump(reader: asyncio.StreamReader, label: str) -> None:
             try:
-                while True:
-                    chunk = await reader.readline()
-                    if not chunk:
-                        break
-                    await queue.put(f"[{label}] {chunk.decode('utf-8', errors='replace').rstrip()}")
+                async for text in read_chunks(reader):
+                    await queue.put(label, text)
             finally:
-                await queue.put(None)
+                await queue.put(label, None)
 
         tasks = [
             asyncio.create_task(pump(process.stdout, "stdout")),
             asyncio.create_task(pump(process.stderr, "stderr")),
         ]
 
+        loop = asyncio.get_running_loop()
+        framer = OutputFramer()
         completed_streams = 0
+        last_output = loop.time()
         try:
             while completed_streams < len(tasks):
+                idle_left = plan.timeout - (loop.time() - last_output)
+                window = framer.time_left(loop.time())
                 try:
-                    item = await asyncio.wait_for(queue.get(), timeout=plan.timeout)
+                    label, text = await asyncio.wait_for(
+                        queue.get(), timeout=idle_left if window is None else min(window, idle_left)
+                    )
                 except asyncio.TimeoutError:
-                    process.kill()
-                    await process.communicate()
+                    if framer.pending:
+                        yield framer.flush(loop.time(), partials=True)
+                    if loop.time() - last_output < plan.timeout:
+                        continue
+                    # The pumps own the pipes; stop them before reaping the child.
+                    with suppress(ProcessLookupError):
+                        process.kill()
                     for task in tasks:
                         task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    await process.wait()
                     _record_run(
                         {
                             "tool": plan.tool.name,
@@ -328,10 +449,18 @@ async def stream_tool(
                     )
                     yield f"Error: Tool execution timed out after {int(plan.timeout)} seconds."
                     return
-                if item is None:
+                last_output = loop.time()
+                for dropped_label, lines in queue.take_dropped():
+                    framer.dropped(dropped_label, lines, last_output)
+                if text is None:
                     completed_streams += 1
-                    continue
-                yield item
+                    framer.finish(label, last_output)
+                else:
+                    framer.add(label, text, last_output)
+                if framer.ready(last_output):
+                    yield framer.flush(last_output)
+            if framer.pending:
+                yield framer.flush(loop.time(), partials=True)
             returncode = await asyncio.wait_for(process.wait(), timeout=1)
         finally:
             for task in tasks:
@@ -345,6 +474,10 @@ async def stream_tool(
             "exit_code": returncode,
             "duration": duration,
             "mode": "stream",
+            "frames": framer.frames,
+            "lines": framer.lines,
+            "dropped_lines": queue.dropped_lines,
+            "queue_high_water": queue.high_water,
         }
     )
     yield f"[meta] exit_code={returncode}"
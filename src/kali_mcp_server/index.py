@@ -0,0 +1,686 @@
+"""Search indexes that narrow dataset queries before fuzzy scoring."""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import OSA
+
+try:  # pragma: no cover - optional dependency
+    import numpy as _numpy
+except ImportError:  # pragma: no cover - numpy is not a hard dependency
+    _numpy = None
+
+# rapidfuzz converts score cutoffs into distances, which can drop a result that
+# lands exactly on the cutoff; candidates are rescored, so undershoot a little.
+_CUTOFF_SLACK = 0.5
+
+# ``process.cdist`` can spread a batch across threads (rapidfuzz releases the
+# GIL) but needs numpy; batches smaller than this are not worth the hand-off.
+SEARCH_WORKERS = int(os.environ.get("KALI_SEARCH_WORKERS", "1") or 1)
+PARALLEL_BATCH_MIN = 2000
+
+
+def joined_length(tokens: Iterable[str]) -> int:
+    """Length of ``" ".join(tokens)`` without building the string."""
+    total = 0
+    count = 0
+    for token in tokens:
+        total += len(token)
+        count += 1
+    return total + max(0, count - 1)
+
+
+def score_batch(
+    query: str,
+    choices: Sequence[str],
+    scorer: Callable[..., float],
+    score_cutoff: float = 0,
+    workers: int = SEARCH_WORKERS,
+) -> Iterator[Tuple[int, float]]:
+    """Yield ``(offset, score)`` for every choice scoring at least ``score_cutoff``.
+
+    Uses a single ``process.extract`` call, or a multi-threaded
+    ``process.cdist`` when numpy is available and the batch is large enough.
+    """
+    if not choices:
+        return
+    score_cutoff = max(0.0, score_cutoff - _CUTOFF_SLACK) if score_cutoff else 0
+    if workers != 1 and _numpy is not None and len(choices) >= PARALLEL_BATCH_MIN:
+        row = process.cdist(
+            [query],
+            choices,
+            scorer=scorer,
+            score_cutoff=score_cutoff,
+            dtype=_numpy.float64,
+            workers=workers,
+        )[0]
+        for offset in _numpy.flatnonzero(row >= score_cutoff):
+            yield int(offset), float(row[offset])
+        return
+    for _choice, score, offset in process.extract(
+        query, choices, scorer=scorer, score_cutoff=score_cutoff, limit=None
+    ):
+        yield offset, score
+
+
+class _Snapshotable:
+    """State round-trip used by ``snapshot`` to persist built indexes."""
+
+    def to_state(self) -> Dict[str, object]:
+        return dict(vars(self))
+
+    @classmethod
+    def from_state(cls, state: Dict[str, object]):
+        index = cls.__new__(cls)
+        vars(index).update(state)
+        return index
+
+
+def position_table(kept: Sequence[int], size: int) -> List[int]:
+    """Map old positions to their index in ``kept``; dropped positions map to -1."""
+    table = [-1] * size
+    for new, old in enumerate(kept):
+        table[old] = new
+    return table
+
+
+def _merge_sorted(
+    kept: Iterable[Tuple[int, int, str]], added: Iterable[Tuple[int, int, str]]
+) -> List[Tuple[int, int, str]]:
+    """Merge two ``(key, position, payload)`` runs already sorted by key then position."""
+    return list(heapq.merge(kept, sorted(added)))
+
+
+def _length_window(length: int, cutoff: float) -> tuple:
+    """Return the (lo, hi) lengths whose indel ratio against ``length`` can reach ``cutoff``.
+
+    ``200 * min(a, b) / (a + b)`` is the best ratio two strings of lengths ``a``
+    and ``b`` can score, so anything outside the window is skipped safely. The
+    bounds are widened by one to absorb floating point rounding.
+    """
+    if cutoff <= 0:
+        return 0, math.inf
+    low = math.floor(length * cutoff / (200 - cutoff)) - 1
+    high = math.ceil(length * (200 - cutoff) / cutoff) + 1
+    return max(0, low), high
+
+
+class TokenIndex(_Snapshotable):
+    """Inverted token index plus length orderings over the searchable blobs.
+
+    ``fuzz.token_set_ratio`` only rewards blobs that share a whitespace token
+    with the query; for every other blob the score collapses to a plain indel
+    ratio that is bounded by the joined token lengths. ``fuzz.ratio`` on names
+    is bounded the same way, so keeping both sorted by length lets a query skip
+    every tool that cannot reach the current top-k cutoff.
+    """
+
+    def __init__(self, blobs: Sequence[str], names: Sequence[str]):
+        self._postings: Dict[str, List[int]] = {}
+        blob_lengths: List[int] = []
+        for position, blob in enumerate(blobs):
+            tokens = set(blob.split())
+            for token in tokens:
+                self._postings.setdefault(token, []).append(position)
+            blob_lengths.append(joined_length(tokens))
+
+        self._blob_order = sorted(range(len(blobs)), key=blob_lengths.__getitem__)
+        self._blob_lengths = [blob_lengths[position] for position in self._blob_order]
+        self._name_order = sorted(range(len(names)), key=lambda position: len(names[position]))
+        self._name_lengths = [len(names[position]) for position in self._name_order]
+        self._names_by_length = [names[position] for position in self._name_order]
+
+    def overlay(
+        self, kept: Sequence[int], blobs: Sequence[str], names: Sequence[str]
+    ) -> "TokenIndex":
+        """Index over the ``kept`` positions (renumbered) followed by new entries.
+
+        Only the new blobs are tokenised; existing postings and length orders
+        are renumbered, giving the same index a full build would.
+        """
+        table = position_table(kept, len(self._blob_order))
+        start = len(kept)
+        index = TokenIndex.__new__(TokenIndex)
+        index._postings = {}
+        for token, positions in self._postings.items():
+            moved = [table[position] for position in positions if table[position] >= 0]
+            if moved:
+                index._postings[token] = moved
+        added_blobs = []
+        for position, blob in enumerate(blobs, start):
+            tokens = set(blob.split())
+            for token in tokens:
+                index._postings.setdefault(token, []).append(position)
+            added_blobs.append((joined_length(tokens), position, ""))
+        by_blob = _merge_sorted(
+            (
+                (length, table[position], "")
+                for length, position in zip(self._blob_lengths, self._blob_order)
+                if table[position] >= 0
+            ),
+            added_blobs,
+        )
+        index._blob_order = [position for _length, position, _name in by_blob]
+        index._blob_lengths = [length for length, _position, _name in by_blob]
+        by_name = _merge_sorted(
+            (
+                (length, table[position], name)
+                for length, position, name in zip(
+                    self._name_lengths, self._name_order, self._names_by_length
+                )
+                if table[position] >= 0
+            ),
+            ((len(name), position, name) for position, name in enumerate(names, start)),
+        )
+        index._name_order = [position for _length, position, _name in by_name]
+        index._name_lengths = [length for length, _position, _name in by_name]
+        index._names_by_length = [name for _length, _position, name in by_name]
+        return index
+
+    def sharing_tokens(self, tokens: Iterable[str]) -> Set[int]:
+        """Positions of blobs containing at least one of ``tokens`` verbatim."""
+        positions: Set[int] = set()
+        for token in tokens:
+            positions.update(self._postings.get(token, ()))
+        return positions
+
+    def blob_candidates(self, query_length: int, cutoff: float) -> List[int]:
+        """Positions whose blob could reach ``cutoff`` without sharing a token."""
+        low, high = _length_window(query_length, cutoff)
+        start = bisect_left(self._blob_lengths, low)
+        stop = bisect_right(self._blob_lengths, high)
+        return self._blob_order[start:stop]
+
+    def name_candidates(self, query: str, cutoff: float) -> List[Tuple[int, float]]:
+        """``(position, score)`` for lowercase names scoring at least ``cutoff``."""
+        low, high = _length_window(len(query), cutoff)
+        start = bisect_left(self._name_lengths, low)
+        stop = bisect_right(self._name_lengths, high)
+        if start >= stop:
+            return []
+        matches = score_batch(query, self._names_by_length[start:stop], fuzz.ratio, cutoff)
+        return [(self._name_order[start + offset], score) for offset, score in matches]
+
+
+def bits_from_positions(positions: Iterable[int], size: int) -> int:
+    """Bitset (a Python int) with bit ``p`` set for every position ``p``."""
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def bit_positions(bits: int) -> List[int]:
+    """Set bit positions of ``bits`` in ascending order, in O(size / 8 + matches)."""
+    positions: List[int] = []
+    for offset, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+        while byte:
+            low = byte & -byte
+            positions.append(offset * 8 + low.bit_length() - 1)
+            byte ^= low
+    return positions
+
+
+class FacetIndex:
+    """One bitset per (facet, value) over dataset positions.
+
+    Filters on several facets intersect with a handful of big-integer ANDs,
+    so narrowing a large catalog costs a few microseconds before any tool
+    is scored. Values are matched case-insensitively.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.all = (1 << size) - 1
+        self._facets: Dict[str, Dict[str, int]] = {}
+        self._labels: Dict[str, Dict[str, str]] = {}
+
+    def add(self, facet: str, values: Sequence[Iterable[str]]) -> None:
+        """Index ``values[position]`` (one or more labels) under ``facet``."""
+        postings: Dict[str, List[int]] = {}
+        labels: Dict[str, str] = {}
+        for position, labels_at in enumerate(values):
+            for label in labels_at:
+                key = label.strip().lower()
+                labels.setdefault(key, label.strip())
+                postings.setdefault(key, []).append(position)
+        self._facets[facet] = {
+            key: bits_from_positions(positions, self.size) for key, positions in postings.items()
+        }
+        self._labels[facet] = labels
+
+    @property
+    def facets(self) -> List[str]:
+        return list(self._facets)
+
+    def mask(self, facet: str, value: str) -> int:
+        """Bitset for ``facet == value``; raises ``KeyError`` for an unknown facet."""
+        return self._facets[facet].get(value.strip().lower(), 0)
+
+    def counts(self, facet: str, within: int = -1) -> Dict[str, int]:
+        """Matching positions per value of ``facet``, optionally inside ``within``."""
+        labels = self._labels[facet]
+        return {
+            labels[key]: (bits & within).bit_count()
+            for key, bits in sorted(self._facets[facet].items())
+        }
+
+
+_ALIAS_PUNCTUATION = re.compile(r"[\s._-]+")
+
+
+def name_aliases(name: str, binary_path: str = "") -> Set[str]:
+    """Lowercase spellings a tool can be looked up by.
+
+    Covers the name itself, its binary's file name and both without
+    separators, so "aircrack ng", "aircrackng" and "aircrack-ng" all meet.
+    """
+    aliases = {name.lower().strip()}
+    if binary_path:
+        aliases.add(binary_path.rsplit("/", 1)[-1].lower())
+    aliases.update({_ALIAS_PUNCTUATION.sub("", alias) for alias in aliases})
+    aliases.discard("")
+    return aliases
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """``word`` plus every string reachable by deleting up to ``max_distance`` characters."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {
+            candidate[:index] + candidate[index + 1 :]
+            for candidate in frontier
+            for index in range(len(candidate))
+        }
+        variants |= frontier
+    return variants
+
+
+class NameIndex(_Snapshotable):
+    """Prefix and typo lookups over tool names and their aliases.
+
+    Terms live in one sorted list, so every completion of a prefix is a
+    contiguous bisect range. For near misses each term's first
+    ``prefix_length`` characters are indexed under every string left after
+    deleting up to ``max_distance`` characters (SymSpell's symmetric delete):
+    a misspelt query generates its own deletions and only the handful of terms
+    sharing one are checked with a real (optimal string alignment) distance.
+    """
+
+    def __init__(
+        self,
+        aliases: Sequence[Iterable[str]],
+        max_distance: int = 2,
+        prefix_length: int = 5,
+    ):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._size = len(aliases)
+        postings: Dict[str, List[int]] = {}
+        for position, terms in enumerate(aliases):
+            for term in set(terms):
+                postings.setdefault(term, []).append(position)
+        self._positions: Dict[str, Tuple[int, ...]] = {
+            term: tuple(positions) for term, positions in postings.items()
+        }
+        self._terms = sorted(self._positions)
+        # Most deletions belong to a single term, so store the bare term for those.
+        self._deletes: Dict[str, Union[str, Tuple[str, ...]]] = {}
+        self._add_deletes(self._terms)
+
+    def _add_deletes(self, terms: Iterable[str]) -> None:
+        for term in terms:
+            for variant in _deletes(term[: self.prefix_length], self.max_distance):
+                current = self._deletes.get(variant)
+                if current is None:
+                    self._deletes[variant] = term
+                elif isinstance(current, str):
+                    self._deletes[variant] = (current, term)
+                else:
+                    self._deletes[variant] = current + (term,)
+
+    def overlay(self, kept: Sequence[int], aliases: Sequence[Iterable[str]]) -> "NameIndex":
+        """Index over the ``kept`` positions (renumbered) followed by new entries.
+
+        Deletions are only generated for terms the new entries introduce;
+        entries left behind by dropped terms are skipped at lookup time.
+        """
+        table = position_table(kept, self._size)
+        index = NameIndex.__new__(NameIndex)
+        index.max_distance = self.max_distance
+        index.prefix_length = self.prefix_length
+        index._size = len(kept) + len(aliases)
+        index._positions = {}
+        for term, positions in self._positions.items():
+            moved = tuple(table[position] for position in positions if table[position] >= 0)
+            if moved:
+                index._positions[term] = moved
+        for position, terms in enumerate(aliases, len(kept)):
+            for term in set(terms):
+                index._positions[term] = index._positions.get(term, ()) + (position,)
+        index._terms = sorted(index._positions)
+        index._deletes = dict(self._deletes)
+        index._add_deletes(term for term in index._terms if term not in self._positions)
+        return index
+
+    def complete(self, prefix: str, limit: int = 10) -> List[int]:
+        """Positions whose name or alias starts with ``prefix``, alphabetically."""
+        prefix = prefix.lower().strip()
+        found: Dict[int, None] = {}
+        if not prefix:
+            return []
+        for term_id in range(bisect_left(self._terms, prefix), len(self._terms)):
+            term = self._terms[term_id]
+            if not term.startswith(prefix) or len(found) >= limit:
+                break
+            found.update(dict.fromkeys(self._positions[term]))
+        return list(found)[:limit]
+
+    def lookup(self, query: str, limit: int = 5) -> List[int]:
+        """Positions whose names are closest to ``query``, best first.
+
+        A name within ``max_distance`` edits ranks by its distance; a name
+        that merely extends the query ("aircrack" -> "aircrack-ng") ranks
+        as a single edit.
+        """
+        best: Dict[int, Tuple[int, int, str]] = {}
+
+        def offer(term: str, distance: int) -> None:
+            key = (distance, len(term), term)
+            for position in self._positions[term]:
+                current = best.get(position)
+                if current is None or key < current:
+                    best[position] = key
+
+        for spelling in sorted(name_aliases(query)):
+            self._near_misses(spelling, offer)
+            start = bisect_left(self._terms, spelling)
+            for term_id in range(start, min(start + 4 * limit, len(self._terms))):
+                term = self._terms[term_id]
+                if not term.startswith(spelling):
+                    break
+                offer(term, 0 if term == spelling else 1)
+        return sorted(best, key=best.__getitem__)[:limit]
+
+    def _near_misses(self, query: str, offer: Callable[[str, int], None]) -> None:
+        checked: Set[str] = set()
+        for variant in _deletes(query[: self.prefix_length], self.max_distance):
+            terms = self._deletes.get(variant, ())
+            for term in (terms,) if isinstance(terms, str) else terms:
+                if term in checked or term not in self._positions:
+                    continue
+                checked.add(term)
+                distance = OSA.distance(query, term, score_cutoff=self.max_distance)
+                if distance <= self.max_distance:
+                    offer(term, distance)
+
+
+_TERM_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in into is it me my of on or that the "
+    "this to use using want with".split()
+)
+_SUFFIXES = (
+    "ations", "ation", "ating", "ated", "ates", "ate",
+    "ings", "ing", "ions", "ion", "ers", "er", "es", "s",
+)
+
+
+def _stem(term: str) -> str:
+    """Strip one common English suffix so "scanner"/"scanning"/"scans" agree."""
+    for suffix in _SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            if suffix == "s" and term.endswith("ss"):
+                break
+            term = term[: -len(suffix)]
+            if len(term) > 3 and term[-1] == term[-2]:
+                term = term[:-1]
+            break
+    return term
+
+
+def analyze(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and stem."""
+    return [
+        _stem(term)
+        for term in _TERM_PATTERN.findall(text.lower())
+        if term not in _STOPWORDS
+    ]
+
+
+class BM25Index(_Snapshotable):
+    """Okapi BM25 over name/package/category/summary with precomputed weights.
+
+    Every term keeps an impact-ordered posting list (parallel arrays of
+    document ids and final BM25 contributions, heaviest first), and every
+    document keeps its own term weights for random access. Queries run the
+    threshold algorithm: walk the lists in lockstep, score each newly seen
+    document in full and stop once the k-th best score beats the sum of the
+    weights still ahead, so common terms rarely get walked to the end.
+
+    Name terms are counted ``name_boost`` times so that a tool called
+    "dnsenum" outranks one that merely mentions DNS enumeration.
+    """
+
+    def __init__(
+        self,
+        documents: Sequence[Tuple[str, str, str, str]],
+        k1: float = 1.2,
+        b: float = 0.75,
+        name_boost: int = 3,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.name_boost = name_boost
+        self._assemble([self._count_terms(document) for document in documents])
+
+    def _count_terms(self, document: Tuple[str, str, str, str]) -> Tuple[Dict[str, int], int]:
+        """Term frequencies and length of one document; the costly, per-entry step."""
+        name, package, category, summary = document
+        terms = analyze(" ".join((name, name.replace("-", " ")))) * self.name_boost
+        terms += analyze(package.replace("kali-tools-", ""))
+        terms += analyze(category)
+        terms += analyze(summary)
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        return counts, len(terms)
+
+    def _norm(self, length: int) -> float:
+        if not self._average_length:
+            return self.k1
+        return self.k1 * (1 - self.b + self.b * length / self._average_length)
+
+    def _assemble(self, analyzed: Sequence[Tuple[Dict[str, int], int]]) -> None:
+        """Derive collection statistics, weights and posting lists."""
+        document_counts: Dict[str, int] = {}
+        for counts, _length in analyzed:
+            for term in counts:
+                document_counts[term] = document_counts.get(term, 0) + 1
+        total = len(analyzed)
+        self._lengths = array("I", [length for _counts, length in analyzed])
+        self._average_length = (sum(self._lengths) / total) if total else 0.0
+        self._idf = {
+            term: math.log(1 + (total - count + 0.5) / (count + 0.5))
+            for term, count in document_counts.items()
+        }
+        k1 = self.k1
+        self._weights: List[Dict[str, float]] = []
+        postings: Dict[str, List[Tuple[float, int]]] = {term: [] for term in document_counts}
+        for document, (counts, length) in enumerate(analyzed):
+            norm = self._norm(length)
+            weights = {
+                term: self._idf[term] * count * (k1 + 1) / (count + norm)
+                for term, count in counts.items()
+            }
+            for term, weight in weights.items():
+                postings[term].append((-weight, document))
+            self._weights.append(weights)
+
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        for term, entries in postings.items():
+            entries.sort()
+            self._postings[term] = (
+                array("I", [document for _weight, document in entries]),
+                array("d", [-weight for weight, _document in entries]),
+            )
+
+    def _counts(self, document: int) -> Dict[str, int]:
+        """Recover the term frequencies behind ``document``'s stored weights.
+
+        Inverts ``w = idf * c * (k1 + 1) / (c + norm)`` so documents carried
+        into an overlay need not be analysed again.
+        """
+        norm = self._norm(self._lengths[document])
+        scale = self.k1 + 1
+        return {
+            term: round(weight * norm / (self._idf[term] * scale - weight))
+            for term, weight in self._weights[document].items()
+        }
+
+    def overlay(
+        self, kept: Sequence[int], documents: Sequence[Tuple[str, str, str, str]]
+    ) -> "BM25Index":
+        """Index over the ``kept`` documents (renumbered) followed by new ones.
+
+        Only the new documents are analysed. Collection statistics change with
+        every addition, so weights and posting lists are re-derived for all.
+        """
+        index = BM25Index.__new__(BM25Index)
+        index.k1 = self.k1
+        index.b = self.b
+        index.name_boost = self.name_boost
+        analyzed = [(self._counts(document), self._lengths[document]) for document in kept]
+        analyzed += [index._count_terms(document) for document in documents]
+        index._assemble(analyzed)
+        return index
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """Return up to ``limit`` ``(document, score)`` pairs, best first."""
+        limit = max(1, limit)
+        terms = [term for term in set(analyze(query)) if term in self._postings]
+        lists = [self._postings[term] for term in terms]
+        best: List[Tuple[float, int]] = []  # min-heap of (score, -document)
+        seen: Set[int] = set()
+        depth = 0
+        while True:
+            remaining = 0.0
+            exhausted = True
+            for ids, weights in lists:
+                if depth >= len(ids):
+                    continue
+                exhausted = False
+                remaining += weights[depth]
+                document = ids[depth]
+                if document in seen:
+                    continue
+                seen.add(document)
+                doc_weights = self._weights[document]
+                score = sum(doc_weights.get(term, 0.0) for term in terms)
+                entry = (score, -document)
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+            if exhausted or (len(best) >= limit and best[0][0] > remaining):
+                break
+            depth += 1
+        return [(-negated, score) for score, negated in sorted(best, reverse=True)]
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over analysed terms.
+
+    Phrases and texts both go through ``analyze``, so "port scanning" meets the
+    phrase "port scan". Every phrase occurring in a text is found in a single
+    pass over its terms, however many phrases there are.
+    """
+
+    def __init__(self, phrases: Sequence[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        for phrase_id, phrase in enumerate(phrases):
+            terms = analyze(phrase)
+            if not terms:
+                continue
+            state = 0
+            for term in terms:
+                following = self._goto[state].get(term)
+                if following is None:
+                    following = self._goto[state][term] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = following
+            self._output[state] += (phrase_id,)
+
+        # Breadth-first, so every failure target is final before it is used.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for term, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and term not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(term, 0)
+                self._output[following] += self._output[self._fail[following]]
+
+    def find(self, text: str) -> List[int]:
+        """Ids of the phrases found in ``text``, in the order they end."""
+        found: List[int] = []
+        state = 0
+        for term in analyze(text):
+            while state and term not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(term, 0)
+            found.extend(self._output[state])
+        return found
+
+
+class IntentIndex:
+    """Curated task phrases mapped to the tools that answer them.
+
+    A tool's strength is the summed term length of the distinct phrases
+    naming it, each divided by the tool's rank within that phrase, so
+    longer, more specific phrases and preferred tools come first.
+    """
+
+    def __init__(self, intents: Mapping[str, Sequence[str]]):
+        self._phrases = list(intents)
+        self._tools = [tuple(intents[phrase]) for phrase in self._phrases]
+        self._lengths = [len(analyze(phrase)) for phrase in self._phrases]
+        self._matcher = PhraseMatcher(self._phrases)
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def tools_for(self, text: str) -> List[str]:
+        """Names of the tools intended by ``text``, strongest first."""
+        strength: Dict[str, float] = {}
+        for phrase_id in dict.fromkeys(self._matcher.find(text)):
+            for rank, name in enumerate(self._tools[phrase_id], 1):
+                strength[name] = strength.get(name, 0.0) + self._lengths[phrase_id] / rank
+        return sorted(strength, key=lambda name: -strength[name])
@@ -0,0 +1,310 @@
+"""Background tool runs that clients poll instead of waiting on.
+
+``run_kali_tool`` keeps the MCP request open until the tool exits, so long
+scans tie up the client connection and run into client-side timeouts.
+``submit_job`` resolves the same ``ExecutionPlan`` and returns a job id at
+once. The run waits for a scheduler slot and executes as an ``asyncio`` task,
+its output captured with ``OutputCapture`` (spilled under
+``KALI_CAPTURE_DIR/jobs`` when large) so ``job_output`` can page through it.
+Finished jobs are kept until ``KALI_MAX_JOBS`` newer ones replace them; their
+buffered output moves to disk when they finish, so only excerpts stay in memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from contextlib import suppress
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .capture import OutputCapture, capture_dir
+from .dataset import ToolDataset, get_dataset
+from .env import env_int
+from .executor import (
+    DEFAULT_TIMEOUT_SECONDS,
+    ExecutionPlan,
+    _capture,
+    _record_run,
+    _resolve_execution,
+    _spawn,
+)
+
+ENV_MAX_JOBS = "KALI_MAX_JOBS"
+DEFAULT_MAX_JOBS = 100
+DEFAULT_OUTPUT_LENGTH = 64 * 1024
+MAX_OUTPUT_LENGTH = 1024 * 1024
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_TIMED_OUT = "timed out"
+JOB_CANCELLED = "cancelled"
+JOB_FAILED = "failed"
+FINISHED_STATES = frozenset({JOB_COMPLETED, JOB_TIMED_OUT, JOB_CANCELLED, JOB_FAILED})
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _utf8_prefix(data: bytes) -> bytes:
+    """``data`` without a trailing incomplete UTF-8 sequence."""
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte < 0x80:
+            return data
+        if byte >= 0xC0:
+            needed = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return data if back >= needed else data[:-back]
+    return data
+
+
+@dataclass
+class Job:
+    id: str
+    plan: ExecutionPlan
+    arguments: str
+    client: Optional[str]
+    stdout: OutputCapture
+    stderr: OutputCapture
+    state: str = JOB_QUEUED
+    submitted: datetime = field(default_factory=_now)
+    started: Optional[datetime] = None
+    finished: Optional[datetime] = None
+    exit_code: Optional[int] = None
+    error: Optional[str] = None
+    task: Optional["asyncio.Task[None]"] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def stream(self, name: str) -> Optional[OutputCapture]:
+        return {"stdout": self.stdout, "stderr": self.stderr}.get(name.strip().lower())
+
+    def describe(self) -> str:
+        lines = [
+            f"Job: {self.id}",
+            f"Command: {' '.join(self.plan.command)}",
+            f"State: {self.state}",
+            f"Submitted: {self.submitted.isoformat()}",
+        ]
+        if self.started:
+            lines.append(f"Started: {self.started.isoformat()}")
+        if self.finished:
+            lines.append(f"Finished: {self.finished.isoformat()}")
+            if self.started:
+                seconds = (self.finished - self.started).total_seconds()
+                lines.append(f"Duration: {seconds:.2f}s")
+        if self.exit_code is not None:
+            lines.append(f"Exit code: {self.exit_code}")
+        if self.error:
+            lines.append(f"Error: {self.error}")
+        lines.append(
+            f"Output bytes: stdout={self.stdout.total_bytes} stderr={self.stderr.total_bytes}"
+        )
+        return "\n".join(lines)
+
+
+class JobRegistry:
+    """In-process registry of submitted jobs.
+
+    At most ``max_jobs`` jobs are kept. Unfinished jobs are never evicted, so
+    a submit beyond that many queued or running jobs is refused; otherwise
+    the oldest finished jobs are dropped along with their spill files.
+    """
+
+    def __init__(self, max_jobs: Optional[int] = None):
+        if max_jobs is None:
+            max_jobs = env_int(ENV_MAX_JOBS, DEFAULT_MAX_JOBS)
+        self.max_jobs = max(1, max_jobs)
+        self.submitted = 0
+        self._jobs: Dict[str, Job] = {}
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id.strip())
+
+    def jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def _evict(self) -> None:
+        for job in [job for job in self._jobs.values() if job.done]:
+            if len(self._jobs) < self.max_jobs:
+                return
+            del self._jobs[job.id]
+            job.stdout.discard()
+            job.stderr.discard()
+
+    def submit(self, plan: ExecutionPlan, arguments: str, client: Optional[str] = None) -> Job:
+        """Start ``plan`` in the background; must be called on the event loop."""
+        self._evict()
+        if len(self._jobs) >= self.max_jobs:
+            raise RuntimeError(f"{self.max_jobs} jobs are already queued or running")
+        job_id = uuid.uuid4().hex[:12]
+        directory = capture_dir() / "jobs"
+        job = Job(
+            id=job_id,
+            plan=plan,
+            arguments=arguments,
+            client=client,
+            stdout=OutputCapture(f"{job_id}-stdout", directory=directory),
+            stderr=OutputCapture(f"{job_id}-stderr", directory=directory),
+        )
+        self._jobs[job_id] = job
+        self.submitted += 1
+        job.task = asyncio.create_task(self._run(job), name=f"kali-job-{job_id}")
+        return job
+
+    async def _run(self, job: Job) -> None:
+        plan = job.plan
+        try:
+            async with plan.slot(job.client):
+                job.state = JOB_RUNNING
+                job.started = _now()
+                try:
+                    process = await _spawn(plan)
+                except FileNotFoundError:
+                    job.state = JOB_FAILED
+                    job.error = f"Executable '{plan.command[0]}' not found inside the container."
+                    return
+                try:
+                    job.exit_code = await _capture(plan, process, job.stdout, job.stderr)
+                    job.state = JOB_COMPLETED
+                except asyncio.TimeoutError:
+                    job.state = JOB_TIMED_OUT
+                    job.error = f"Tool execution timed out after {int(plan.timeout)} seconds."
+        except asyncio.CancelledError:
+            job.state = JOB_CANCELLED
+            raise
+        except Exception as exc:  # nobody awaits the task; record why it failed
+            job.state = JOB_FAILED
+            job.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            for capture in (job.stdout, job.stderr):
+                with suppress(OSError):  # the buffer stays readable in memory
+                    capture.spill()
+                capture.close()
+            job.finished = _now()
+            _record_run(
+                {
+                    "tool": plan.tool.name,
+                    "arguments": job.arguments,
+                    "exit_code": job.exit_code if job.state == JOB_COMPLETED else job.state,
+                    "mode": "job",
+                    "job": job.id,
+                }
+            )
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job (killing its process) and wait for it."""
+        job = self.get(job_id)
+        if job is None or job.task is None or job.done:
+            return job
+        job.task.cancel()
+        await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    async def shutdown(self) -> None:
+        """Cancel every unfinished job, killing its process."""
+        for job in self.jobs():
+            await self.cancel(job.id)
+
+    def stats(self) -> Mapping[str, object]:
+        states: Dict[str, int] = {}
+        for job in self._jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        return {"submitted": self.submitted, "retained": len(self._jobs), **states}
+
+
+JOBS = JobRegistry()
+
+
+def submit_job(
+    tool_name: str,
+    arguments: str = "",
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    dataset: Optional[ToolDataset] = None,
+    client: Optional[str] = None,
+    registry: Optional[JobRegistry] = None,
+) -> str:
+    """Validate like ``run_tool``, start the job and return its id or an error."""
+    registry = registry or JOBS
+    plan, error = _resolve_execution(tool_name, arguments, timeout, dataset or get_dataset())
+    if error:
+        return error
+    assert plan is not None
+    try:
+        job = registry.submit(plan, arguments, client)
+    except RuntimeError as exc:
+        return f"Error: {exc}; wait for one to finish or cancel one."
+    return (
+        f"Submitted job {job.id} for {plan.tool.name}. "
+        f"Poll job_status('{job.id}') and read job_output('{job.id}')."
+    )
+
+
+def job_status(job_id: str = "", registry: Optional[JobRegistry] = None) -> str:
+    """Describe one job, or list the retained jobs when no id is given."""
+    registry = registry or JOBS
+    if not job_id.strip():
+        jobs = registry.jobs()
+        if not jobs:
+            return "No jobs submitted yet."
+        lines = ["Jobs:"]
+        lines.extend(
+            f"- {job.id} :: {job.plan.tool.name} :: {job.state} :: "
+            f"submitted {job.submitted.isoformat()}"
+            for job in jobs
+        )
+        return "\n".join(lines)
+    job = registry.get(job_id)
+    if job is None:
+        return f"Error: Unknown job '{job_id}'."
+    return job.describe()
+
+
+def _output_window(capture: OutputCapture, offset: int, length: int) -> Tuple[bytes, int]:
+    length = min(max(1, length), MAX_OUTPUT_LENGTH)
+    data = capture.read(offset, length)
+    if len(data) == length:  # more may follow; do not split a character
+        data = _utf8_prefix(data) or data
+    return data, offset + len(data)
+
+
+def job_output(
+    job_id: str,
+    stream: str = "stdout",
+    offset: int = 0,
+    length: int = DEFAULT_OUTPUT_LENGTH,
+    registry: Optional[JobRegistry] = None,
+) -> str:
+    """Return ``length`` bytes of a job's stdout or stderr starting at ``offset``."""
+    registry = registry or JOBS
+    job = registry.get(job_id)
+    if job is None:
+        return f"Error: Unknown job '{job_id}'."
+    capture = job.stream(stream)
+    if capture is None:
+        return "Error: stream must be 'stdout' or 'stderr'."
+    offset = max(0, offset)
+    data, next_offset = _output_window(capture, offset, length)
+    header = (
+        f"Job {job.id} {stream.strip().lower()} bytes {offset}-{next_offset} "
+        f"of {capture.total_bytes} ({job.state})."
+    )
+    if next_offset < capture.total_bytes or not job.done:
+        header += f" Next offset: {next_offset}."
+    return "\n".join((header, data.decode("utf-8", errors="replace")))
+
+
+async def cancel_job(job_id: str, registry: Optional[JobRegistry] = None) -> str:
+    registry = registry or JOBS
+    job = registry.get(job_id)
+    if job is None:
+        return f"Error: Unknown job '{job_id}'."
+    if job.done:
+        return f"Job {job.id} already finished ({job.state})."
+    await registry.cancel(job.id)
+    return f"Cancelled job {job.id}."
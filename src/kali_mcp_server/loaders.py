@@ -0,0 +1,180 @@
+"""Streaming loaders for JSONL and CSV tool datasets.
+
+``kali_tools.json`` is a single array that has to be parsed whole; these
+loaders read blocks of whole records instead (``BLOCK_SIZE`` bytes each). Each
+block is parsed, validated and normalised into plain field tuples, across a
+process pool once the input is large enough, and only the ``Tool`` records are
+kept, so peak memory stays close to the size of the loaded dataset.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Deque, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .catalog import CSV_OWNER_SEPARATOR
+from .dataset import Tool
+
+JSONL_SUFFIXES = frozenset({".jsonl", ".ndjson"})
+CSV_SUFFIXES = frozenset({".csv"})
+STREAMING_SUFFIXES = JSONL_SUFFIXES | CSV_SUFFIXES
+ENV_LOAD_WORKERS = "KALI_LOAD_WORKERS"
+BLOCK_SIZE = 1024 * 1024
+# Inputs smaller than this are validated inline; a pool costs more to start.
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+REQUIRED_FIELDS = ("name", "package", "category", "summary", "binary_path")
+
+Fields = Tuple[str, str, str, str, str, str, Tuple[str, ...], Tuple[str, ...]]
+
+
+def load_workers() -> int:
+    """Validation processes for large inputs; ``KALI_LOAD_WORKERS=1`` disables the pool."""
+    try:
+        configured = int(os.environ.get(ENV_LOAD_WORKERS, "0"))
+    except ValueError:
+        configured = 0
+    return configured if configured > 0 else min(4, os.cpu_count() or 1)
+
+
+def _owner_list(value: object, where: str, field: str) -> Tuple[str, ...]:
+    if value is None or value == "":
+        return ()
+    if isinstance(value, str):
+        value = value.split(CSV_OWNER_SEPARATOR)
+    if not isinstance(value, list) or not all(isinstance(owner, str) for owner in value):
+        raise ValueError(f"{where}: '{field}' must be a list of strings")
+    return tuple(owner.strip() for owner in value if owner.strip())
+
+
+def normalize_entry(entry: Mapping[str, object], where: str) -> Fields:
+    """Validate one raw record and return its ``Tool`` fields, whitespace-trimmed."""
+    if not isinstance(entry, Mapping):
+        raise ValueError(f"{where}: expected an object, got {type(entry).__name__}")
+    values = []
+    for field in REQUIRED_FIELDS:
+        value = entry.get(field)
+        if not isinstance(value, str) or (field != "summary" and not value.strip()):
+            raise ValueError(f"{where}: '{field}' must be a non-empty string")
+        values.append(value.strip())
+    default_args = entry.get("default_args") or ""
+    if not isinstance(default_args, str):
+        raise ValueError(f"{where}: 'default_args' must be a string")
+    return (
+        *values,
+        default_args.strip(),
+        _owner_list(entry.get("packages"), where, "packages"),
+        _owner_list(entry.get("categories"), where, "categories"),
+    )  # type: ignore[return-value]
+
+
+def _validate_jsonl(path: str, first_line: int, block: bytes) -> List[Fields]:
+    fields = []
+    for line_number, line in enumerate(block.decode("utf-8").split("\n"), first_line):
+        if not line.strip():
+            continue
+        where = f"{path}:{line_number}"
+        try:
+            entry = json.loads(line)
+        except ValueError as exc:
+            raise ValueError(f"{where}: {exc}") from None
+        fields.append(normalize_entry(entry, where))
+    return fields
+
+
+def _validate_csv(
+    path: str, header: Sequence[str], first_line: int, block: bytes
+) -> List[Fields]:
+    fields = []
+    reader = csv.reader(io.StringIO(block.decode("utf-8"), newline=""))
+    record_line = first_line
+    for row in reader:
+        if row:
+            entry = dict(zip(header, row))
+            fields.append(normalize_entry(entry, f"{path}:{record_line}"))
+        record_line = first_line + reader.line_num
+    return fields
+
+
+def _blocks(handle: BinaryIO, quoted: bool) -> Iterator[Tuple[int, bytes]]:
+    """``(first_line, block)`` pairs of about ``BLOCK_SIZE`` bytes of whole records.
+
+    Blocks end on a newline; with ``quoted`` (CSV) only on one outside a
+    quoted field, i.e. after an even number of double quotes.
+    """
+    line = 1
+    while True:
+        block = handle.read(BLOCK_SIZE)
+        if not block:
+            return
+        block += handle.readline()
+        if quoted:
+            odd = block.count(b'"') % 2
+            while odd:
+                more = handle.readline()
+                if not more:
+                    break
+                block += more
+                odd ^= more.count(b'"') % 2
+        yield line, block
+        line += block.count(b"\n")
+
+
+def _jobs(path: Path) -> Iterator[Tuple]:
+    """Validation calls for ``path``, one block at a time."""
+    name = str(path)
+    with path.open("rb") as handle:
+        if path.suffix.lower() in JSONL_SUFFIXES:
+            for first_line, block in _blocks(handle, quoted=False):
+                yield (_validate_jsonl, name, first_line, block)
+            return
+        header_line = handle.readline().decode("utf-8-sig")
+        header = [column.strip() for column in next(csv.reader([header_line]), [])]
+        missing = [field for field in REQUIRED_FIELDS if field not in header]
+        if missing:
+            raise ValueError(f"{path}: CSV header lacks {', '.join(missing)}")
+        for first_line, block in _blocks(handle, quoted=True):
+            yield (_validate_csv, name, header, first_line + 1, block)
+
+
+def _run(job: Tuple) -> List[Fields]:
+    func, *args = job
+    return func(*args)
+
+
+def iter_tools(path: Path, workers: Optional[int] = None) -> Iterator[Tool]:
+    """Yield ``Tool`` records from a JSONL or CSV file in input order.
+
+    The file is cut into blocks of whole records. Large inputs have their
+    blocks parsed and validated on ``workers`` processes, with at most two
+    blocks per worker in flight, so memory stays bounded however big the file
+    is. Invalid records raise ``ValueError`` naming their line.
+    """
+    path = Path(path)
+    if path.suffix.lower() not in STREAMING_SUFFIXES:
+        raise ValueError(f"{path}: not a JSONL or CSV dataset")
+    workers = load_workers() if workers is None else workers
+    if workers <= 1 or path.stat().st_size < PARALLEL_MIN_BYTES:
+        for job in _jobs(path):
+            for fields in _run(job):
+                yield Tool(*fields)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque["Future[List[Fields]]"] = deque()
+        for job in _jobs(path):
+            pending.append(pool.submit(_run, job))
+            if len(pending) >= 2 * workers:
+                for fields in pending.popleft().result():
+                    yield Tool(*fields)
+        while pending:
+            for fields in pending.popleft().result():
+                yield Tool(*fields)
+
+
+def load_tools(path: Path, workers: Optional[int] = None) -> List[Tool]:
+    return list(iter_tools(path, workers))
@@ -0,0 +1,135 @@
+"""Keep CPU-bound catalog queries off the asyncio event loop.
+
+Fuzzy search over a full catalog takes long enough to stall every coroutine on
+the loop, including the pumps behind ``run_kali_tool_stream``. ``run_query``
+runs queries on a small bounded thread pool once the catalog is large enough
+for that to matter (rapidfuzz releases the GIL while scoring), and
+``LoopLagMonitor`` measures how late the loop wakes up so stalls show up in
+``server_stats``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Sized, TypeVar
+
+from .env import env_int
+
+T = TypeVar("T")
+
+ENV_OFFLOAD_THRESHOLD = "KALI_SEARCH_OFFLOAD_THRESHOLD"
+ENV_SEARCH_THREADS = "KALI_SEARCH_THREADS"
+DEFAULT_OFFLOAD_THRESHOLD = 1000
+DEFAULT_SEARCH_THREADS = 2
+LAG_INTERVAL = 0.05
+STALL_MS = 100.0
+
+
+class QueryOffloader:
+    """Run queries inline or on a bounded pool, depending on their cost.
+
+    Cost is the number of records a query may have to score. Queries costing
+    at least ``threshold`` go to the pool; a negative threshold keeps every
+    query on the loop.
+    """
+
+    def __init__(self, threshold: int, threads: int):
+        self.threshold = threshold
+        self.threads = max(1, threads)
+        self.inline = 0
+        self.offloaded = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def should_offload(self, cost: int) -> bool:
+        return self.threshold >= 0 and cost >= self.threshold
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.threads, thread_name_prefix="kali-search"
+                )
+            return self._executor
+
+    async def run(self, cost: int, func: Callable[..., T], *args, **kwargs) -> T:
+        if not self.should_offload(cost):
+            self.inline += 1
+            return func(*args, **kwargs)
+        self.offloaded += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), functools.partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "threshold": self.threshold,
+            "threads": self.threads,
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+        }
+
+
+OFFLOADER = QueryOffloader(
+    env_int(ENV_OFFLOAD_THRESHOLD, DEFAULT_OFFLOAD_THRESHOLD),
+    env_int(ENV_SEARCH_THREADS, DEFAULT_SEARCH_THREADS),
+)
+
+
+async def run_query(dataset: Sized, func: Callable[..., T], *args, **kwargs) -> T:
+    """Call ``func(*args, **kwargs)``, off the loop when ``dataset`` is large."""
+    return await OFFLOADER.run(len(dataset), func, *args, **kwargs)
+
+
+class LoopLagMonitor:
+    """Sample how much later than scheduled the event loop resumes a sleeper.
+
+    Any synchronous work on the loop delays the wake-up by its own duration,
+    so the lag is an upper bound on how long concurrent streams were stalled.
+    """
+
+    def __init__(self, interval: float = LAG_INTERVAL, stall_ms: float = STALL_MS):
+        self.interval = interval
+        self.stall_ms = stall_ms
+        self.samples = 0
+        self.stalls = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self._total_ms = 0.0
+
+    def record(self, lag_ms: float) -> None:
+        self.samples += 1
+        self.last_ms = lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+        self._total_ms += lag_ms
+        if lag_ms >= self.stall_ms:
+            self.stalls += 1
+
+    async def run(self) -> None:
+        """Sample until cancelled."""
+        while True:
+            scheduled = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, (time.perf_counter() - scheduled) * 1000))
+
+    def stats(self) -> Dict[str, float]:
+        mean = self._total_ms / self.samples if self.samples else 0.0
+        return {
+            "samples": self.samples,
+            "last_ms": round(self.last_ms, 1),
+            "mean_ms": round(mean, 1),
+            "max_ms": round(self.max_ms, 1),
+            f"stalls_over_{self.stall_ms:g}ms": self.stalls,
+        }
+
+
+LOOP_LAG = LoopLagMonitor()
@@ -0,0 +1,183 @@
+"""Admission control for tool runs.
+
+A single ``asyncio.Semaphore`` made every run wait in one FIFO line, so a long
+``openvas`` scan could hold the slots a one-second lookup was waiting for.
+``RunScheduler`` keeps the global ``max_concurrent_runs`` cap and adds three
+things, all configured per tool in ``policy.yaml``:
+
+* ``priority`` -- ``high``, ``normal`` (default) or ``low``. A free slot goes
+  to the highest class with an eligible waiter.
+* ``weight`` -- within a class, runs are ordered by start-time fair queueing
+  over flows (the client when one is known, otherwise the tool), so a flow
+  with many queued runs cannot crowd out the others. A flow with weight 2
+  gets twice the slots of a flow with weight 1 while both are waiting.
+* ``max_concurrent_runs`` -- a per-tool cap under the global one; a capped
+  tool's waiters are skipped, not blocking the line.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Mapping, Optional
+
+PRIORITY_CLASSES = {"high": 0, "normal": 1, "low": 2}
+DEFAULT_PRIORITY = "normal"
+MAX_IDLE_FLOWS = 256
+
+
+def priority_level(name: object) -> int:
+    """Numeric level for a policy ``priority`` value; unknown values are normal."""
+    return PRIORITY_CLASSES.get(str(name).strip().lower(), PRIORITY_CLASSES[DEFAULT_PRIORITY])
+
+
+@dataclass
+class _Waiter:
+    tool: str
+    flow: str
+    level: int
+    tag: float
+    seq: int
+    cap: Optional[int]
+    enqueued: float
+    future: "asyncio.Future[None]" = field(repr=False)
+
+    def order(self):
+        return (self.level, self.tag, self.seq)
+
+
+@dataclass
+class _WaitStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+class RunScheduler:
+    """Grant run slots by priority class, fair share and per-tool cap."""
+
+    def __init__(self, max_concurrent: int, clock=time.monotonic):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._clock = clock
+        self._waiters: List[_Waiter] = []
+        self._running: Counter = Counter()
+        self._finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._waits = {level: _WaitStats() for level in PRIORITY_CLASSES.values()}
+        self._max_depth = 0
+
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    def _eligible(self, waiter: _Waiter) -> bool:
+        return waiter.cap is None or self._running[waiter.tool] < waiter.cap
+
+    def _dispatch(self) -> None:
+        # A waiter cancelled since it queued may still be listed until its task
+        # resumes; granting it a slot would leak that slot for good.
+        self._waiters = [waiter for waiter in self._waiters if not waiter.future.done()]
+        while self.running < self.max_concurrent:
+            eligible = [waiter for waiter in self._waiters if self._eligible(waiter)]
+            if not eligible:
+                return
+            waiter = min(eligible, key=_Waiter.order)
+            self._waiters.remove(waiter)
+            self._virtual_time = max(self._virtual_time, waiter.tag)
+            self._running[waiter.tool] += 1
+            self._waits[waiter.level].record(self._clock() - waiter.enqueued)
+            waiter.future.set_result(None)
+
+    def _release(self, tool: str) -> None:
+        self._running[tool] -= 1
+        if not self._running[tool]:
+            del self._running[tool]
+        self._dispatch()
+
+    async def acquire(
+        self,
+        tool: str,
+        priority: object = DEFAULT_PRIORITY,
+        weight: float = 1.0,
+        cap: Optional[int] = None,
+        client: Optional[str] = None,
+    ) -> None:
+        """Wait for a slot for ``tool``; pair with ``release``."""
+        flow = client or tool
+        if len(self._finish) > MAX_IDLE_FLOWS:
+            # Flows whose share is used up carry no state worth keeping.
+            self._finish = {
+                key: finish for key, finish in self._finish.items() if finish > self._virtual_time
+            }
+        start = max(self._virtual_time, self._finish.get(flow, 0.0))
+        self._finish[flow] = start + 1.0 / max(weight, 1e-6)
+        waiter = _Waiter(
+            tool=tool,
+            flow=flow,
+            level=priority_level(priority),
+            tag=start,
+            seq=next(self._seq),
+            cap=max(1, int(cap)) if cap else None,
+            enqueued=self._clock(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        self._max_depth = max(self._max_depth, len(self._waiters))
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self._release(tool)  # granted just as the caller gave up
+            raise
+
+    def release(self, tool: str) -> None:
+        self._release(tool)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        tool: str,
+        priority: object = DEFAULT_PRIORITY,
+        weight: float = 1.0,
+        cap: Optional[int] = None,
+        client: Optional[str] = None,
+    ) -> AsyncIterator[None]:
+        await self.acquire(tool, priority, weight=weight, cap=cap, client=client)
+        try:
+            yield
+        finally:
+            self.release(tool)
+
+    def stats(self) -> Mapping[str, object]:
+        depth = Counter(waiter.level for waiter in self._waiters)
+        stats: Dict[str, object] = {
+            "max_concurrent": self.max_concurrent,
+            "running": self.running,
+            "queued": len(self._waiters),
+            "max_queued": self._max_depth,
+        }
+        for name, level in PRIORITY_CLASSES.items():
+            waits = self._waits[level]
+            mean = waits.total / waits.count if waits.count else 0.0
+            stats[f"{name}_queued"] = depth[level]
+            stats[f"{name}_started"] = waits.count
+            stats[f"{name}_wait_mean_ms"] = round(mean * 1000, 1)
+            stats[f"{name}_wait_max_ms"] = round(waits.max * 1000, 1)
+        if self._running:
+            stats["running_by_tool"] = ", ".join(
+                f"{tool}={count}" for tool, count in sorted(self._running.items())
+            )
+        return stats
@@ -2,14 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import json
 import logging
 import sys
-from typing import List
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, TypeVar
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 
-from .dataset import Tool, get_dataset
-from .executor import get_run_history, run_tool, stream_tool
+from .dataset import DEFAULT_PAGE_SIZE, Page, Tool
+from .offload import LOOP_LAG, OFFLOADER, run_query
+from .warmup import STARTUP, ready_dataset, start_warmup
+from .watcher import poll_interval, reload_in_background, watch_dataset
+from .executor import get_run_history, get_scheduler, run_tool, stream_tool
+from . import jobs
 from .nvd import (
     NVDClientError,
     NVDHTTPError,
@@ -19,6 +28,8 @@ from .nvd import (
 
 logger = logging.getLogger("kali-security-server")
 
+T = TypeVar("T")
+
 
 def _format_tool(tool: Tool) -> str:
     lines = [
@@ -28,6 +39,9 @@ def _format_tool(tool: Tool) -> str:
         f"Binary: {tool.binary_path}",
         f"Summary: {tool.summary}",
     ]
+    if len(tool.packages) > 1 or len(tool.categories) > 1:
+        lines.append(f"Also in packages: {', '.join(tool.packages[1:]) or '-'}")
+        lines.append(f"Also in categories: {', '.join(tool.categories[1:]) or '-'}")
     if tool.default_args:
         lines.append(f"Default args: {tool.default_args}")
     return "\n".join(lines)
@@ -40,37 +54,147 @@ def _format_tool_list(title: str, tools: List[Tool]) -> str:
     return "\n".join(lines)
 
 
+def _format_page_footer(page: Page) -> List[str]:
+    if page.next_cursor is None:
+        return []
+    return [
+        f"Showing {len(page.items)} of {page.total}. "
+        f"Call again with cursor='{page.next_cursor}' for more."
+    ]
+
+
+def _page_json(key: str, page: Page, **extra: object) -> str:
+    items = [item.to_dict() if isinstance(item, Tool) else item for item in page.items]
+    payload = {**extra, key: items, "total": page.total, "next_cursor": page.next_cursor}
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def _search_filters(**filters: str) -> Dict[str, str]:
+    """Drop unset search_tools filters."""
+    return {facet: value.strip() for facet, value in filters.items() if value.strip()}
+
+
+def _format_stats(sections: Mapping[str, Mapping[str, object]]) -> str:
+    lines = ["Server statistics:"]
+    for title, stats in sections.items():
+        lines.append(f"{title}:")
+        lines.extend(f"- {key}: {value}" for key, value in stats.items())
+    return "\n".join(lines)
+
+
+def _client_key(ctx: Optional[Context]) -> Optional[str]:
+    """Fair-share flow for a request: the client id it sent, else its session."""
+    if ctx is None:
+        return None
+    try:
+        client_id, session = ctx.client_id, ctx.session
+    except ValueError:  # not inside a request
+        return None
+    return client_id or f"session-{id(session):x}"
+
+
+def _records_first_response(
+    func: Callable[..., Awaitable[T]],
+) -> Callable[..., Awaitable[T]]:
+    """Wrap a tool so the first reply of the process is recorded in ``STARTUP``."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> T:
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            STARTUP.mark_first_response()
+
+    return wrapper
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastMCP) -> AsyncIterator[None]:
+    interval = poll_interval()
+    tasks = [asyncio.create_task(LOOP_LAG.run())]
+    if interval:
+        tasks.append(asyncio.create_task(watch_dataset(interval)))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        await jobs.JOBS.shutdown()
+        OFFLOADER.shutdown()
+
+
 def create_app() -> FastMCP:
-    """Configure and return the FastMCP application."""
-    app = FastMCP("kali-security")
+    """Configure and return the FastMCP application.
+
+    The dataset and its indexes are built on a background thread so the
+    transport starts straight away; tools that need the catalog await it on
+    first use. Every tool takes one dataset snapshot when it starts, so a
+    reload that lands mid-request never mixes two datasets in a single response.
+    Searches over large catalogs run on a thread pool via ``run_query`` so
+    they do not stall concurrent streams.
+    """
+    app = FastMCP("kali-security", lifespan=_lifespan)
+
+    start_warmup()
 
-    dataset = get_dataset()
+    def tool() -> Callable[[Callable[..., Awaitable[T]]], object]:
+        register = app.tool()
+        return lambda func: register(_records_first_response(func))
 
-    @app.tool()
-    async def list_categories() -> str:
-        """List available Kali tool categories."""
+    @tool()
+    async def list_categories(
+        limit: int = DEFAULT_PAGE_SIZE, cursor: str = "", as_json: bool = False
+    ) -> str:
+        """List available Kali tool categories, a page at a time."""
+        dataset = await ready_dataset()
+        try:
+            page = dataset.page_categories(limit, cursor.strip())
+        except ValueError as exc:
+            return f"Error: {exc}"
+        if as_json:
+            return _page_json("categories", page)
         lines = ["Available Kali tool categories:"]
-        lines.extend(f"- {category}" for category in dataset.categories)
+        lines.extend(f"- {category}" for category in page.items)
+        lines.extend(_format_page_footer(page))
         return "\n".join(lines)
 
-    @app.tool()
-    async def list_tools(category: str = "") -> str:
-        """List tools available within a category."""
+    @tool()
+    async def list_tools(
+        category: str = "",
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str = "",
+        as_json: bool = False,
+    ) -> str:
+        """List tools in a category by name, a page at a time.
+
+        Pass the returned cursor to fetch the next page; set as_json for a
+        machine-readable payload.
+        """
         if not category.strip():
             return "Error: Provide the category parameter."
-        tools = dataset.by_category(category)
-        if not tools:
+        dataset = await ready_dataset()
+        try:
+            page = dataset.page_category(category, limit, cursor.strip())
+        except ValueError as exc:
+            return f"Error: {exc}"
+        if as_json:
+            return _page_json("tools", page, category=category)
+        if not page.items:
             return f"No tools found for category '{category}'."
-        return _format_tool_list(f"Tools in category '{category}':", tools)
+        rendered = _format_tool_list(f"Tools in category '{category}':", page.items)
+        return "\n".join([rendered, *_format_page_footer(page)])
 
-    @app.tool()
+    @tool()
     async def describe_tool(tool_name: str = "") -> str:
         """Describe a Kali tool and show its category."""
         if not tool_name.strip():
             return "Error: Provide the tool_name parameter."
+        dataset = await ready_dataset()
         tool = dataset.get(tool_name)
         if not tool:
-            matches = dataset.fuzzy_search(tool_name, limit=5)
+            matches = await run_query(dataset, dataset.did_you_mean, tool_name, limit=5)
             if matches:
                 suggestion_lines = ["Unknown tool. Did you mean:"]
                 suggestion_lines.extend(f"- {match.name}" for match in matches)
@@ -78,19 +202,33 @@ def create_app() -> FastMCP:
             return f"Error: Unknown tool '{tool_name}'."
         return _format_tool(tool)
 
-    @app.tool()
+    @tool()
+    async def autocomplete_tools(prefix: str = "", limit: int = 10) -> str:
+        """Complete a partial tool name from the name index."""
+        if not prefix.strip():
+            return "Error: Provide the prefix parameter."
+        dataset = await ready_dataset()
+        matches = dataset.complete(prefix, limit=min(max(1, limit), 50))
+        if not matches:
+            return f"No tool names start with '{prefix}'."
+        lines = [f"Tool names starting with '{prefix}':"]
+        lines.extend(f"- {match.name}" for match in matches)
+        return "\n".join(lines)
+
+    @tool()
     async def suggest_tools(task: str = "") -> str:
         """Suggest Kali tools for the supplied task description."""
         if not task.strip():
             return "Error: Provide the task parameter."
-        matches = dataset.fuzzy_search(task, limit=5)
+        dataset = await ready_dataset()
+        matches = await run_query(dataset, dataset.suggest, task, limit=5)
         if not matches:
             return (
                 f"No direct matches found for '{task}'. Try using more specific keywords."
             )
         return _format_tool_list(f"Suggested tools for '{task}':", matches)
 
-    @app.tool()
+    @tool()
     async def latest_cves(keyword: str = "") -> str:
         """Fetch recent CVE summaries from NVD matching a keyword."""
         if not keyword.strip():
@@ -105,36 +243,98 @@ def create_app() -> FastMCP:
             return "Error: Unable to reach the NVD service."
         return format_cve_lines(keyword, summaries)
 
-    @app.tool()
-    async def run_kali_tool(tool_name: str = "", arguments: str = "", timeout: int = 60) -> str:
+    @tool()
+    async def run_kali_tool(
+        tool_name: str = "", arguments: str = "", timeout: int = 60, ctx: Context = None
+    ) -> str:
         """Execute a Kali tool inside the container and return its output."""
-        return await run_tool(tool_name, arguments, timeout=timeout, dataset=dataset)
+        dataset = await ready_dataset()
+        return await run_tool(
+            tool_name, arguments, timeout=timeout, dataset=dataset, client=_client_key(ctx)
+        )
 
     @app.stream_tool()
-    async def run_kali_tool_stream(tool_name: str = "", arguments: str = "", timeout: int = 60):
+    async def run_kali_tool_stream(
+        tool_name: str = "", arguments: str = "", timeout: int = 60, ctx: Context = None
+    ):
         """Stream stdout/stderr from a Kali tool as it executes."""
-        async for chunk in stream_tool(tool_name, arguments, timeout=timeout, dataset=dataset):
+        dataset = await ready_dataset()
+        client = _client_key(ctx)
+        async for chunk in stream_tool(
+            tool_name, arguments, timeout=timeout, dataset=dataset, client=client
+        ):
             yield chunk
 
-    @app.tool()
+    @tool()
+    async def submit_kali_job(
+        tool_name: str = "", arguments: str = "", timeout: int = 0, ctx: Context = None
+    ) -> str:
+        """Start a Kali tool in the background and return a job id to poll."""
+        dataset = await ready_dataset()
+        return jobs.submit_job(
+            tool_name, arguments, timeout=timeout, dataset=dataset, client=_client_key(ctx)
+        )
+
+    @tool()
+    async def job_status(job_id: str = "") -> str:
+        """Report a background job's state, or list retained jobs when no id is given."""
+        return jobs.job_status(job_id)
+
+    @tool()
+    async def job_output(
+        job_id: str = "", stream: str = "stdout", offset: int = 0, length: int = 65536
+    ) -> str:
+        """Read part of a background job's stdout or stderr, starting at a byte offset."""
+        return jobs.job_output(job_id, stream=stream, offset=offset, length=length)
+
+    @tool()
+    async def cancel_job(job_id: str = "") -> str:
+        """Cancel a queued or running background job and kill its process."""
+        return await jobs.cancel_job(job_id)
+
+    @tool()
     async def tool_details(tool_name: str = "") -> str:
         """Return detailed metadata about a Kali tool."""
         if not tool_name.strip():
             return "Error: Provide the tool_name parameter."
+        dataset = await ready_dataset()
         tool = dataset.get(tool_name)
         if not tool:
             return f"Error: Unknown tool '{tool_name}'."
         return _format_tool(tool)
 
-    @app.tool()
-    async def search_tools(query: str = "", limit: int = 5) -> str:
-        """Search the Kali dataset using fuzzy matching."""
-        matches = dataset.fuzzy_search(query, limit=limit)
+    @tool()
+    async def search_tools(
+        query: str = "",
+        limit: int = 5,
+        category: str = "",
+        package: str = "",
+        binary: str = "",
+        policy: str = "",
+    ) -> str:
+        """Search the Kali dataset using fuzzy matching.
+
+        Optional filters narrow the catalog before scoring: category, package,
+        binary ("available" or "missing" on disk) and policy ("allowed" or
+        "target_confirmation"). With filters and no query, list the matches.
+        """
+        filters = _search_filters(category=category, package=package, binary=binary, policy=policy)
+        dataset = await ready_dataset()
+
+        def search() -> List[Tool]:
+            if query.strip() or not filters:
+                return dataset.fuzzy_search(query, limit=limit, filters=filters)
+            return dataset.filter_tools(filters)[: max(1, limit)]
+
+        try:
+            matches = await run_query(dataset, search)
+        except ValueError as exc:
+            return f"Error: {exc}"
         if not matches:
             return f"No matches found for '{query}'."
         return _format_tool_list(f"Search results for '{query}':", matches)
 
-    @app.tool()
+    @tool()
     async def export_run_history() -> str:
         """Return recent tool execution history for auditing."""
         history = get_run_history()
@@ -149,6 +349,35 @@ def create_app() -> FastMCP:
             )
         return "\n".join(lines)
 
+    @tool()
+    async def server_stats() -> str:
+        """Report startup timings, cache counters, search offload, loop lag and run queueing."""
+        dataset = await ready_dataset()
+        sections: Dict[str, Mapping[str, object]] = {
+            "Startup": STARTUP.stats(),
+            "Catalog query cache": dataset.cache_stats(),
+            "Search offload": OFFLOADER.stats(),
+            "Event loop lag": LOOP_LAG.stats(),
+            "Run scheduler": get_scheduler().stats(),
+            "Background jobs": jobs.JOBS.stats(),
+        }
+        return _format_stats(sections)
+
+    @tool()
+    async def reload_dataset() -> str:
+        """Reload the tool dataset from disk and swap it in atomically."""
+        start = time.perf_counter()
+        try:
+            dataset = await reload_in_background()
+        except Exception as exc:  # noqa: BLE001 - report and keep the old snapshot
+            logger.error("Dataset reload failed: %s", exc)
+            return f"Error: Dataset reload failed ({exc}); the previous dataset is still active."
+        elapsed = time.perf_counter() - start
+        return (
+            f"Reloaded {len(dataset)} tools in {len(dataset.categories)} categories "
+            f"from {dataset.source} in {elapsed:.2f}s."
+        )
+
     return app
 
 
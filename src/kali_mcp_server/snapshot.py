@@ -0,0 +1,222 @@
+"""Prebuilt search indexes for the Kali tool dataset.
+
+Building the token, name and BM25 indexes dominates ``ToolDataset`` start-up
+on a full catalog. ``build_index_snapshot`` persists them in a ``.index``
+sibling of ``kali_tools.json`` so a container can load them instead; the file
+records the SHA-256 of the JSON it was built from and of the code that builds
+the indexes (``code_digest``), and is ignored (the indexes are rebuilt)
+whenever either no longer matches, so an upgrade never restores stale state.
+
+Without a prebuilt sibling, ``load_indexed_dataset`` keeps the same files in a
+cache directory named by both hashes, written on the first start that builds the
+indexes, so later starts on an unchanged dataset skip index construction.
+
+Layout::
+
+    header    magic, version, source SHA-256, code SHA-256, payload length
+    payload   pickled ``ToolDataset.to_state()``; only plain containers,
+              numbers, strings and ``array.array`` are accepted when loading
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import logging
+import os
+import pickle
+import struct
+import sys
+import tempfile
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from .compiled import dataset_digest
+from .dataset import ToolDataset, _load_tools
+
+ENV_INDEX_CACHE_DIR = "KALI_INDEX_CACHE_DIR"
+CACHE_DISABLED = frozenset({"", "0", "off", "none"})
+MAX_CACHED_INDEXES = 8
+MAGIC = b"KMIX"
+FORMAT_VERSION = 3
+INDEX_SUFFIX = ".index"
+# Modules whose code decides what the index state contains.
+INDEX_MODULES = ("dataset.py", "index.py", "snapshot.py")
+_HEADER = struct.Struct("<4sH32s32sQ")
+_ALLOWED_GLOBALS = {
+    ("array", "array"),
+    ("array", "_array_reconstructor"),
+    ("builtins", "set"),
+    ("builtins", "frozenset"),
+}
+
+logger = logging.getLogger("kali-security-server")
+
+
+def index_path_for(json_path: Path) -> Path:
+    return Path(json_path).with_suffix(INDEX_SUFFIX)
+
+
+@lru_cache(maxsize=1)
+def code_digest() -> bytes:
+    """SHA-256 of the package version and the index-building module sources."""
+    digest = hashlib.sha256()
+    try:
+        digest.update(metadata.version("kali-mcp-server").encode())
+    except metadata.PackageNotFoundError:
+        pass
+    for name in INDEX_MODULES:
+        try:
+            digest.update(Path(__file__).with_name(name).read_bytes())
+        except OSError:  # bytecode-only install; the version has to do
+            digest.update(name.encode())
+    return digest.digest()
+
+
+class _StateUnpickler(pickle.Unpickler):
+    """Refuse anything but the types index state is made of."""
+
+    def find_class(self, module: str, name: str):
+        if (module, name) not in _ALLOWED_GLOBALS:
+            raise pickle.UnpicklingError(f"{module}.{name} is not allowed in an index snapshot")
+        return super().find_class(module, name)
+
+
+def write_index_snapshot(dataset: ToolDataset, digest: bytes, path: Path) -> Path:
+    """Write ``dataset``'s index state to ``path`` atomically."""
+    path = Path(path)
+    payload = pickle.dumps(dataset.to_state(), protocol=pickle.HIGHEST_PROTOCOL)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(
+                _HEADER.pack(MAGIC, FORMAT_VERSION, digest, code_digest(), len(payload))
+            )
+            handle.write(payload)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def read_index_snapshot(path: Path, digest: bytes) -> Optional[Dict[str, object]]:
+    """Return the state stored in ``path`` if built from ``digest`` by this code.
+
+    Missing, stale, truncated or otherwise unreadable files all yield ``None``.
+    """
+    try:
+        with Path(path).open("rb") as handle:
+            header = handle.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, version, source_digest, code, length = _HEADER.unpack(header)
+            if (magic, version, source_digest, code) != (
+                MAGIC,
+                FORMAT_VERSION,
+                digest,
+                code_digest(),
+            ):
+                return None
+            payload = handle.read(length)
+    except OSError:
+        return None
+    if len(payload) != length:
+        return None
+    try:
+        state = _StateUnpickler(io.BytesIO(payload)).load()
+    except Exception:  # noqa: BLE001 - any decoding failure means "rebuild"
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def load_index_state(json_path: Path) -> Optional[Dict[str, object]]:
+    """State from an up-to-date ``.index`` sibling of ``json_path``, if any."""
+    index_path = index_path_for(json_path)
+    if not index_path.exists():
+        return None
+    return read_index_snapshot(index_path, dataset_digest(json_path))
+
+
+def index_cache_dir() -> Optional[Path]:
+    """Directory for hash-keyed index snapshots, or ``None`` when caching is off."""
+    configured = os.environ.get(ENV_INDEX_CACHE_DIR)
+    if configured is not None:
+        if configured.strip().lower() in CACHE_DISABLED:
+            return None
+        return Path(configured).expanduser()
+    base = os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        try:
+            base = Path.home() / ".cache"
+        except RuntimeError:  # no resolvable home directory
+            return None
+    return Path(base) / "kali-mcp-server"
+
+
+def cached_index_path(digest: bytes) -> Optional[Path]:
+    cache_dir = index_cache_dir()
+    if cache_dir is None:
+        return None
+    return cache_dir / f"{digest.hex()}-{code_digest().hex()[:16]}{INDEX_SUFFIX}"
+
+
+def _prune_cache(keep: Path) -> None:
+    """Drop all but the most recently written snapshots next to ``keep``."""
+    snapshots = sorted(
+        keep.parent.glob(f"*{INDEX_SUFFIX}"),
+        key=lambda path: path.stat().st_mtime_ns,
+        reverse=True,
+    )
+    for stale in snapshots[MAX_CACHED_INDEXES:]:
+        if stale != keep:
+            stale.unlink(missing_ok=True)
+
+
+def load_indexed_dataset(json_path: Path) -> ToolDataset:
+    """Open ``json_path`` with indexes from a prebuilt sibling or the cache.
+
+    On a miss the indexes are built and the cache entry is written, so the
+    next start on the same dataset content restores them instead.
+    """
+    json_path = Path(json_path)
+    digest = dataset_digest(json_path)
+    state = read_index_snapshot(index_path_for(json_path), digest)
+    cache_path = cached_index_path(digest) if state is None else None
+    if cache_path is not None:
+        state = read_index_snapshot(cache_path, digest)
+    dataset = ToolDataset(_load_tools(json_path, digest), source=json_path, state=state)
+    if state is None and cache_path is not None:
+        try:
+            write_index_snapshot(dataset, digest, cache_path)
+            _prune_cache(cache_path)
+        except OSError as exc:
+            logger.warning("Could not cache dataset indexes in %s: %s", cache_path.parent, exc)
+    return dataset
+
+
+def build_index_snapshot(json_path: Path, output_path: Optional[Path] = None) -> Path:
+    """Build every index for ``json_path`` and write them next to it."""
+    json_path = Path(json_path)
+    output_path = Path(output_path) if output_path else index_path_for(json_path)
+    digest = dataset_digest(json_path)
+    dataset = ToolDataset(_load_tools(json_path, digest), source=json_path)
+    return write_index_snapshot(dataset, digest, output_path)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prebuild search indexes for kali_tools.json.")
+    parser.add_argument("dataset", type=Path, help="Path to kali_tools.json.")
+    parser.add_argument("--output", type=Path, default=None, help="Defaults to a .index sibling.")
+    args = parser.parse_args(argv)
+    output = build_index_snapshot(args.dataset, args.output)
+    print(output, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - module CLI
+    raise SystemExit(main())
@@ -0,0 +1,584 @@
+"""SQLite/FTS5 storage for very large Kali tool catalogs.
+
+The in-memory ``ToolDataset`` keeps every record and index in the server
+process, which is the right trade-off for a few thousand tools. For a full
+package-universe sync (tens of thousands of binaries with long apt
+descriptions) ``sync_tools.py --sqlite`` writes a ``kali_tools.sqlite``
+sibling instead, and ``KALI_DATASET_BACKEND=sqlite`` makes the server open it
+read-only through ``SQLiteToolDataset``, which answers the same queries as
+``ToolDataset`` from SQLite's B-tree and FTS5 indexes.
+
+Fuzzy search asks FTS5 (BM25) and a trigram index over names for a bounded
+candidate set and then ranks it with the same rapidfuzz scores as the
+in-memory backend, so results agree whenever the best matches share a term or
+a name trigram with the query.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from bisect import bisect_right
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from rapidfuzz import fuzz
+from rapidfuzz.distance import OSA
+
+from .cache import QueryCache
+from .catalog import load_task_intents
+from .compiled import dataset_digest
+from .dataset import (
+    BINARY_AVAILABLE,
+    BINARY_MISSING,
+    DEFAULT_PAGE_SIZE,
+    FACETS,
+    MATCH_THRESHOLD,
+    MAX_PAGE_SIZE,
+    POLICY_ALLOWED,
+    POLICY_TARGET_CONFIRMATION,
+    SUGGEST_MIN_TERMS,
+    Page,
+    Tool,
+    _default_cache,
+    _intent_first,
+    _load_tools,
+    _normalize_query,
+    decode_cursor,
+    deduplicate_tools,
+    encode_cursor,
+)
+from .index import IntentIndex, analyze, name_aliases
+from .policy import get_policy
+
+SQLITE_SUFFIX = ".sqlite"
+SCHEMA_VERSION = "1"
+# Upper bound on FTS/trigram candidates rescored per query.
+CANDIDATE_LIMIT = 200
+_OWNER_SEPARATOR = "\n"
+_MAX_DISTANCE = 2
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+")
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE tools (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_lc TEXT NOT NULL,
+    package TEXT NOT NULL,
+    category TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    binary_path TEXT NOT NULL,
+    default_args TEXT NOT NULL,
+    packages TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    binary_available INTEGER NOT NULL
+);
+CREATE INDEX tools_by_name ON tools (name_lc, name, binary_path);
+CREATE TABLE aliases (alias TEXT NOT NULL, tool_id INTEGER NOT NULL);
+CREATE INDEX aliases_by_alias ON aliases (alias);
+CREATE TABLE tool_categories (
+    category_lc TEXT NOT NULL,
+    category TEXT NOT NULL,
+    tool_id INTEGER NOT NULL,
+    name_lc TEXT NOT NULL,
+    name TEXT NOT NULL,
+    binary_path TEXT NOT NULL
+);
+CREATE INDEX tool_categories_page
+    ON tool_categories (category_lc, name_lc, name, binary_path);
+CREATE INDEX tool_categories_by_tool ON tool_categories (tool_id);
+CREATE TABLE tool_packages (package_lc TEXT NOT NULL, tool_id INTEGER NOT NULL);
+CREATE INDEX tool_packages_by_package ON tool_packages (package_lc, tool_id);
+CREATE VIRTUAL TABLE tools_fts USING fts5(
+    name, packages, categories, summary,
+    content='tools', content_rowid='id', tokenize='porter unicode61'
+);
+"""
+_TRIGRAM_SCHEMA = """
+CREATE VIRTUAL TABLE names_trigram USING fts5(
+    name_lc, content='tools', content_rowid='id', tokenize='trigram'
+);
+"""
+_COLUMNS = ", ".join(
+    f"tools.{column}"
+    for column in (
+        "id",
+        "name",
+        "package",
+        "category",
+        "summary",
+        "binary_path",
+        "default_args",
+        "packages",
+        "categories",
+    )
+)
+
+
+def sqlite_path_for(json_path: Path) -> Path:
+    return Path(json_path).with_suffix(SQLITE_SUFFIX)
+
+
+def build_sqlite_dataset(json_path: Path, output_path: Optional[Path] = None) -> Path:
+    """Write the SQLite/FTS5 form of ``json_path`` and return its path.
+
+    Binary availability is recorded at build time, so build the database on
+    the host that serves it (``sync_tools.py`` runs inside the container).
+    """
+    json_path = Path(json_path)
+    output_path = Path(output_path) if output_path else sqlite_path_for(json_path)
+    digest = dataset_digest(json_path)
+    tools = deduplicate_tools(_load_tools(json_path, digest))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, prefix=output_path.name, suffix=".tmp")
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(tmp_name)
+        try:
+            _populate(connection, tools, digest.hex())
+        finally:
+            connection.close()
+        os.replace(tmp_name, output_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return output_path
+
+
+def _populate(connection: sqlite3.Connection, tools: Sequence[Tool], digest: str) -> None:
+    with connection:
+        connection.executescript(_SCHEMA)
+        try:
+            connection.executescript(_TRIGRAM_SCHEMA)
+            trigram = "1"
+        except sqlite3.OperationalError:  # pragma: no cover - SQLite older than 3.34
+            trigram = "0"
+        connection.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ("schema_version", SCHEMA_VERSION),
+                ("source_sha256", digest),
+                ("trigram", trigram),
+                ("tool_count", str(len(tools))),
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO tools VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    tool_id,
+                    tool.name,
+                    tool.name_lc,
+                    tool.package,
+                    tool.category,
+                    tool.summary,
+                    tool.binary_path,
+                    tool.default_args,
+                    _OWNER_SEPARATOR.join(tool.packages),
+                    _OWNER_SEPARATOR.join(tool.categories),
+                    int(os.access(tool.binary_path, os.X_OK)),
+                )
+                for tool_id, tool in enumerate(tools)
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO aliases VALUES (?, ?)",
+            (
+                (alias, tool_id)
+                for tool_id, tool in enumerate(tools)
+                for alias in name_aliases(tool.name, tool.binary_path)
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO tool_categories VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (category.strip().lower(), category.strip(), tool_id, *tool.sort_key)
+                for tool_id, tool in enumerate(tools)
+                for category in tool.categories
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO tool_packages VALUES (?, ?)",
+            (
+                (package.strip().lower(), tool_id)
+                for tool_id, tool in enumerate(tools)
+                for package in tool.packages
+            ),
+        )
+        connection.execute(
+            "INSERT INTO tools_fts (rowid, name, packages, categories, summary) "
+            "SELECT id, name, packages, categories, summary FROM tools"
+        )
+        if trigram == "1":
+            connection.execute(
+                "INSERT INTO names_trigram (rowid, name_lc) SELECT id, name_lc FROM tools"
+            )
+    connection.execute("VACUUM")
+
+
+def _name_distance(spelling: str, alias: str) -> int:
+    """Edit distance, except that completing a truncated name counts as one edit."""
+    if alias == spelling:
+        return 0
+    if alias.startswith(spelling):
+        return 1
+    return OSA.distance(spelling, alias, score_cutoff=_MAX_DISTANCE)
+
+
+def _row_to_tool(row: Tuple) -> Tool:
+    _tool_id, name, package, category, summary, binary_path, default_args, packages, categories = row
+    return Tool(
+        name,
+        package,
+        category,
+        summary,
+        binary_path,
+        default_args,
+        packages=tuple(packages.split(_OWNER_SEPARATOR)),
+        categories=tuple(categories.split(_OWNER_SEPARATOR)),
+    )
+
+
+def _within(where: str) -> str:
+    """Restrict a full-text subquery to ``where`` before it is ranked and cut off."""
+    return "" if where == "1" else f" AND rowid IN (SELECT id FROM tools WHERE {where})"
+
+
+def _fts_query(text: str, operator: str = "OR") -> str:
+    """Quoted prefix terms of ``text`` joined by ``operator``; user syntax never reaches FTS5."""
+    terms = dict.fromkeys(token.lower() for token in _TOKEN_PATTERN.findall(text))
+    return f" {operator} ".join(f'"{term}"*' for term in terms)
+
+
+class SQLiteToolDataset:
+    """Read-only ``ToolDataset`` counterpart backed by a SQLite/FTS5 file.
+
+    Each thread gets its own read-only connection; nothing is loaded into
+    memory beyond the rows a query returns.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        cache: Optional[QueryCache] = None,
+        source: Optional[Path] = None,
+    ):
+        self.path = Path(path)
+        self.source = source or self.path
+        self._cache = cache if cache is not None else _default_cache()
+        self._local = threading.local()
+        meta = dict(self._connection().execute("SELECT key, value FROM meta"))
+        if meta.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError(f"{self.path} has an unsupported catalog schema")
+        self.source_digest = meta.get("source_sha256", "")
+        self._trigram = meta.get("trigram") == "1"
+        self._length = int(meta.get("tool_count", 0))
+        self._intents = IntentIndex(load_task_intents())
+        self._policy_seen: Optional[Mapping] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            uri = f"{self.path.resolve().as_uri()}?mode=ro"
+            connection = sqlite3.connect(uri, uri=True)
+            self._local.connection = connection
+        return connection
+
+    def _query(self, sql: str, parameters: Sequence = ()) -> List[Tuple]:
+        return self._connection().execute(sql, parameters).fetchall()
+
+    def _tools(self, sql: str, parameters: Sequence = ()) -> List[Tool]:
+        return [_row_to_tool(row) for row in self._query(sql, parameters)]
+
+    def is_current(self, json_path: Path) -> bool:
+        return self.source_digest == dataset_digest(json_path).hex()
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def categories(self) -> List[str]:
+        rows = self._query(
+            "SELECT MIN(category) FROM tool_categories GROUP BY category_lc ORDER BY 1"
+        )
+        return [category for (category,) in rows]
+
+    def iter_tools(self) -> Iterator[Tool]:
+        for row in self._connection().execute(f"SELECT {_COLUMNS} FROM tools ORDER BY id"):
+            yield _row_to_tool(row)
+
+    def by_category(self, category: str) -> List[Tool]:
+        """Tools in ``category`` (case-insensitive), ordered by name."""
+        return self._tools(
+            f"SELECT {_COLUMNS} FROM tool_categories JOIN tools ON tools.id = tool_id "
+            "WHERE category_lc = ? ORDER BY tool_categories.name_lc, "
+            "tool_categories.name, tool_categories.binary_path",
+            (category.strip().lower(),),
+        )
+
+    def page_category(
+        self, category: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str = ""
+    ) -> Page:
+        """Keyset-paginated ``by_category``; raises ``ValueError`` for a malformed cursor."""
+        limit = min(max(1, limit), MAX_PAGE_SIZE)
+        key = category.strip().lower()
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None and len(after) != 3:
+            raise ValueError(f"Invalid cursor '{cursor}'.")
+        where = "category_lc = ?"
+        parameters: List[object] = [key]
+        if after is not None:
+            where += (
+                " AND (tool_categories.name_lc, tool_categories.name,"
+                " tool_categories.binary_path) > (?, ?, ?)"
+            )
+            parameters.extend(after)
+        tools = self._tools(
+            f"SELECT {_COLUMNS} FROM tool_categories JOIN tools ON tools.id = tool_id "
+            f"WHERE {where} ORDER BY tool_categories.name_lc, tool_categories.name, "
+            "tool_categories.binary_path LIMIT ?",
+            (*parameters, limit + 1),
+        )
+        (total,) = self._query(
+            "SELECT COUNT(*) FROM tool_categories WHERE category_lc = ?", (key,)
+        )[0]
+        next_cursor = encode_cursor(tools[limit - 1].sort_key) if len(tools) > limit else None
+        return Page(items=tools[:limit], total=total, next_cursor=next_cursor)
+
+    def page_categories(self, limit: int = DEFAULT_PAGE_SIZE, cursor: str = "") -> Page:
+        names = self.categories
+        limit = min(max(1, limit), MAX_PAGE_SIZE)
+        start = bisect_right([(name,) for name in names], decode_cursor(cursor)) if cursor else 0
+        stop = min(start + limit, len(names))
+        next_cursor = encode_cursor((names[stop - 1],)) if stop < len(names) else None
+        return Page(items=names[start:stop], total=len(names), next_cursor=next_cursor)
+
+    def get(self, name: str) -> Optional[Tool]:
+        """Case-insensitive lookup; the first of ``get_all`` when names collide."""
+        matches = self.get_all(name)
+        return matches[0] if matches else None
+
+    def get_all(self, name: str) -> List[Tool]:
+        """Every record named ``name``, ordered by binary path."""
+        key = name.lower().strip()
+        for candidate in dict.fromkeys((key, key.replace(" ", "-"))):
+            tools = self._tools(
+                f"SELECT {_COLUMNS} FROM tools WHERE name_lc = ? ORDER BY name, binary_path",
+                (candidate,),
+            )
+            if tools:
+                return tools
+        return []
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Tool]:
+        """Tools whose name (or binary name) starts with ``prefix``, alphabetically."""
+        prefix = prefix.lower().strip()
+        if not prefix:
+            return []
+        return self._tools(
+            f"SELECT {_COLUMNS} FROM tools WHERE id IN ("
+            "SELECT tool_id FROM aliases WHERE alias >= ? AND alias < ? "
+            "ORDER BY alias LIMIT ?) ORDER BY name_lc, name, binary_path LIMIT ?",
+            (prefix, prefix + "\U0010ffff", 4 * max(1, limit), max(1, limit)),
+        )
+
+    def did_you_mean(self, name: str, limit: int = 5) -> List[Tool]:
+        """Closest names by edit distance among prefix and trigram candidates."""
+        query = name.lower().strip()
+        if not query:
+            return []
+        limit = max(1, limit)
+        candidates: Dict[int, Tool] = {}
+        spellings = sorted(name_aliases(query))
+        for spelling in spellings:
+            for row in self._query(
+                f"SELECT {_COLUMNS} FROM tools WHERE id IN ("
+                "SELECT tool_id FROM aliases WHERE alias >= ? AND alias < ? LIMIT ?)",
+                (spelling, spelling + "\U0010ffff", 4 * limit),
+            ):
+                candidates[row[0]] = _row_to_tool(row)
+            for row in self._trigram_rows(spelling):
+                candidates[row[0]] = _row_to_tool(row)
+
+        ranked = []
+        for tool_id, tool in candidates.items():
+            distance = min(
+                _name_distance(spelling, alias)
+                for alias in name_aliases(tool.name, tool.binary_path)
+                for spelling in spellings
+            )
+            if distance <= _MAX_DISTANCE:
+                ranked.append(((distance, len(tool.name), tool.name_lc, tool_id), tool))
+        if not ranked:
+            return self.fuzzy_search(name, limit)
+        ranked.sort(key=lambda item: item[0])
+        return [tool for _key, tool in ranked[:limit]]
+
+    def _trigram_rows(
+        self, text: str, where: str = "1", parameters: Sequence = ()
+    ) -> List[Tuple]:
+        if not self._trigram or len(text) < 3:
+            return []
+        grams = dict.fromkeys(text[index : index + 3] for index in range(len(text) - 2))
+        match = " OR ".join('"' + gram.replace('"', '""') + '"' for gram in grams)
+        return self._query(
+            f"SELECT {_COLUMNS} FROM tools WHERE id IN ("
+            f"SELECT rowid FROM names_trigram WHERE names_trigram MATCH ?{_within(where)} "
+            "ORDER BY rank LIMIT ?)",
+            (match, *parameters, CANDIDATE_LIMIT),
+        )
+
+    def _filter_clause(self, filters: Mapping[str, str]) -> Tuple[str, List[object]]:
+        clauses: List[str] = []
+        parameters: List[object] = []
+        for facet, value in filters.items():
+            value = value.strip().lower()
+            if facet not in FACETS:
+                raise ValueError(f"Unknown filter '{facet}'. Use one of: {', '.join(FACETS)}.")
+            if facet == "category":
+                clauses.append("id IN (SELECT tool_id FROM tool_categories WHERE category_lc = ?)")
+                parameters.append(value)
+            elif facet == "package":
+                clauses.append("id IN (SELECT tool_id FROM tool_packages WHERE package_lc = ?)")
+                parameters.append(value)
+            elif facet == "binary":
+                if value not in (BINARY_AVAILABLE, BINARY_MISSING):
+                    clauses.append("0")
+                    continue
+                clauses.append("binary_available = ?")
+                parameters.append(int(value == BINARY_AVAILABLE))
+            else:
+                if value not in (POLICY_ALLOWED, POLICY_TARGET_CONFIRMATION):
+                    clauses.append("0")
+                    continue
+                confirmed = sorted(
+                    name
+                    for name, rule in (self._current_policy().get("tools", {}) or {}).items()
+                    if (rule or {}).get("requires_target_confirmation")
+                )
+                operator = "IN" if value == POLICY_TARGET_CONFIRMATION else "NOT IN"
+                clauses.append(f"name_lc {operator} ({', '.join('?' * len(confirmed))})")
+                parameters.extend(confirmed)
+        return " AND ".join(clauses) or "1", parameters
+
+    def _current_policy(self) -> Mapping:
+        """The execution policy; cached searches are dropped once it was reloaded."""
+        policy = get_policy()
+        if policy is not self._policy_seen:
+            # Cached filtered searches may depend on the previous policy.
+            if self._policy_seen is not None:
+                self._cache.clear()
+            self._policy_seen = policy
+        return policy
+
+    def filter_tools(self, filters: Mapping[str, str]) -> List[Tool]:
+        """Every tool matching ``filters``, ordered by name."""
+        where, parameters = self._filter_clause(filters)
+        return self._tools(
+            f"SELECT {_COLUMNS} FROM tools WHERE {where} ORDER BY name_lc, name, binary_path",
+            parameters,
+        )
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def cache_stats(self) -> Dict[str, Optional[float]]:
+        """Hit/miss counters for the search and suggestion cache."""
+        return self._cache.stats()
+
+    def fuzzy_search(
+        self, query: str, limit: int = 10, filters: Optional[Mapping[str, str]] = None
+    ) -> List[Tool]:
+        """Rank FTS5 and name-trigram candidates with the in-memory fuzzy scores."""
+        query = _normalize_query(query)
+        if not query:
+            return []
+        limit = max(1, limit)
+        filters = {facet: value.strip().lower() for facet, value in (filters or {}).items()}
+        where, parameters = self._filter_clause(filters)
+        return list(
+            self._cache.get_or_compute(
+                ("search", query, limit, tuple(sorted(filters.items()))),
+                lambda: tuple(self._fuzzy_search(query, limit, where, parameters)),
+            )
+        )
+
+    def _fuzzy_search(
+        self, query: str, limit: int, where: str, parameters: List[object]
+    ) -> List[Tool]:
+        # Tools containing every term first: on a big catalog common words
+        # match a large share of rows, and ranking all of them dominates.
+        candidates: Dict[int, Tool] = {}
+        for operator in ("AND", "OR"):
+            match = _fts_query(query, operator)
+            if not match:
+                break
+            for row in self._query(
+                f"SELECT {_COLUMNS} FROM tools WHERE id IN ("
+                f"SELECT rowid FROM tools_fts WHERE tools_fts MATCH ?{_within(where)} "
+                "ORDER BY rank LIMIT ?)",
+                (match, *parameters, CANDIDATE_LIMIT),
+            ):
+                candidates[row[0]] = _row_to_tool(row)
+            if len(candidates) >= limit or " " not in match:
+                break
+        for row in self._trigram_rows(query.lower(), where, parameters):
+            candidates[row[0]] = _row_to_tool(row)
+
+        query_lc = query.lower()
+        scored = sorted(
+            (
+                -max(
+                    fuzz.token_set_ratio(query, tool.searchable_blob),
+                    fuzz.ratio(query_lc, tool.name_lc),
+                ),
+                tool_id,
+                tool,
+            )
+            for tool_id, tool in candidates.items()
+        )
+        matches = [tool for score, _id, tool in scored if -score > MATCH_THRESHOLD]
+        if not matches:
+            matches = [tool for score, _id, tool in scored if -score > 0]
+        return matches[:limit]
+
+    def suggest(self, task: str, limit: int = 5) -> List[Tool]:
+        """Rank tools for a task description: intent phrases first, then FTS5's BM25."""
+        task = _normalize_query(task)
+        limit = max(1, limit)
+        return list(
+            self._cache.get_or_compute(
+                ("suggest", task, limit),
+                lambda: tuple(_intent_first(self, self._intents, task, limit, self._ranked(task))),
+            )
+        )
+
+    def _ranked(self, task: str) -> Callable[[int], List[Tool]]:
+        if len(analyze(task)) < SUGGEST_MIN_TERMS:
+            return lambda limit: self.fuzzy_search(task, limit)
+        match = _fts_query(" ".join(analyze(task)))
+        return lambda limit: self._tools(
+            f"SELECT {_COLUMNS} FROM tools JOIN ("
+            "SELECT rowid, bm25(tools_fts, 3.0, 1.0, 1.0, 1.0) AS score "
+            "FROM tools_fts WHERE tools_fts MATCH ? ORDER BY score LIMIT ?"
+            ") AS ranked ON ranked.rowid = tools.id ORDER BY ranked.score, tools.id",
+            (match, limit),
+        ) or self.fuzzy_search(task, limit)
+
+
+def open_sqlite_dataset(json_path: Path) -> Optional[SQLiteToolDataset]:
+    """Open the up-to-date SQLite sibling of ``json_path``, if there is one."""
+    path = sqlite_path_for(json_path)
+    if not path.exists():
+        return None
+    try:
+        dataset = SQLiteToolDataset(path, source=Path(json_path))
+    except (sqlite3.Error, ValueError):
+        return None
+    if not dataset.is_current(json_path):
+        return None
+    return dataset
@@ -0,0 +1,197 @@
+"""Chunked output framing for ``stream_tool``.
+
+Reading a tool's pipes line by line and sending every line as its own stream
+message is slow for chatty tools, and ``StreamReader.readline`` fails on
+lines longer than its buffer limit. ``read_chunks`` reads fixed-size blocks
+through an incremental UTF-8 decoder instead. ``OutputFramer`` then coalesces
+the decoded text into frames of whole ``[label] line`` records, emitted once
+``FRAME_BYTES`` have accumulated or ``FRAME_INTERVAL`` seconds have passed
+since the frame's first record.
+
+``StreamQueue`` bounds the chunks waiting between the pipe readers and a slow
+consumer. When it is full, readers either wait (the pipe fills and the OS
+throttles the child) or, with ``drop_oldest``, discard the oldest chunks and
+leave a ``[meta] stdout: N lines dropped`` record in the stream.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+READ_CHUNK_BYTES = 64 * 1024
+FRAME_BYTES = 64 * 1024
+FRAME_INTERVAL = 0.05
+DEFAULT_QUEUE_SIZE = 64
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_MODES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST)
+
+# (label, text); ``None`` text marks the end of that label's stream.
+StreamItem = Tuple[str, Optional[str]]
+
+
+async def read_chunks(
+    reader: asyncio.StreamReader, chunk_bytes: int = READ_CHUNK_BYTES
+) -> AsyncIterator[str]:
+    """Yield decoded text from ``reader``; multi-byte characters never split."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        chunk = await reader.read(chunk_bytes)
+        text = decoder.decode(chunk, final=not chunk)
+        if text:
+            yield text
+        if not chunk:
+            return
+
+
+class StreamQueue:
+    """Bounded FIFO of decoded chunks between pipe readers and the consumer.
+
+    Only data chunks count towards ``maxsize``; end-of-stream markers always
+    fit and are never dropped.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE, drop_oldest: bool = False):
+        self.maxsize = max(1, maxsize)
+        self.drop_oldest = drop_oldest
+        self.high_water = 0
+        self.dropped_lines = 0
+        self._items: Deque[StreamItem] = deque()
+        self._chunks = 0
+        self._dropped: Dict[str, int] = {}
+        self._changed = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return self._chunks
+
+    def _drop_oldest_chunk(self) -> None:
+        for index, (label, text) in enumerate(self._items):
+            if text is not None:
+                del self._items[index]
+                self._chunks -= 1
+                # A chunk without a newline still loses (part of) a line.
+                lines = max(1, text.count("\n"))
+                self._dropped[label] = self._dropped.get(label, 0) + lines
+                self.dropped_lines += lines
+                return
+
+    async def put(self, label: str, text: Optional[str]) -> None:
+        """Queue a chunk, waiting for room (or dropping the oldest) when full."""
+        async with self._changed:
+            if text is not None:
+                if self.drop_oldest:
+                    while self._chunks >= self.maxsize:
+                        self._drop_oldest_chunk()
+                else:
+                    await self._changed.wait_for(lambda: self._chunks < self.maxsize)
+                self._chunks += 1
+                self.high_water = max(self.high_water, self._chunks)
+            self._items.append((label, text))
+            self._changed.notify_all()
+
+    async def get(self) -> StreamItem:
+        async with self._changed:
+            await self._changed.wait_for(lambda: bool(self._items))
+            label, text = self._items.popleft()
+            if text is not None:
+                self._chunks -= 1
+            self._changed.notify_all()
+            return label, text
+
+    def take_dropped(self) -> List[Tuple[str, int]]:
+        """Lines dropped per label since the last call.
+
+        Dropped chunks are older than anything still queued, so the consumer
+        reports these before the item it just got.
+        """
+        dropped, self._dropped = list(self._dropped.items()), {}
+        return dropped
+
+
+class OutputFramer:
+    """Coalesce labelled output into ``[label] line`` frames.
+
+    Text is split into lines per label, so interleaved stdout and stderr
+    chunks never mix within a line. A partial line is held until its newline
+    arrives or it reaches ``frame_bytes`` on its own; the consumer flushes it
+    with ``partials=True`` when the frame's window closes before more output
+    arrives, so progress prompts are not held back.
+    """
+
+    def __init__(self, frame_bytes: int = FRAME_BYTES, interval: float = FRAME_INTERVAL):
+        self.frame_bytes = frame_bytes
+        self.interval = interval
+        self.frames = 0
+        self.lines = 0
+        self._records: List[str] = []
+        self._size = 0
+        self._partial: Dict[str, str] = {}
+        self._opened: Optional[float] = None
+
+    def _append(self, label: str, line: str, now: float) -> None:
+        self._record(f"[{label}] {line.rstrip()}", now)
+        self.lines += 1
+
+    def _record(self, record: str, now: float) -> None:
+        self._records.append(record)
+        self._size += len(record) + 1
+        if self._opened is None:
+            self._opened = now
+
+    def add(self, label: str, text: str, now: float) -> None:
+        pieces = (self._partial.pop(label, "") + text).split("\n")
+        for line in pieces[:-1]:
+            self._append(label, line, now)
+        rest = pieces[-1]
+        while len(rest) >= self.frame_bytes:
+            self._append(label, rest[: self.frame_bytes], now)
+            rest = rest[self.frame_bytes :]
+        if rest:
+            self._partial[label] = rest
+            if self._opened is None:
+                self._opened = now
+
+    def finish(self, label: str, now: float) -> None:
+        """End of ``label``'s stream: its partial line becomes a record."""
+        rest = self._partial.pop(label, "")
+        if rest:
+            self._append(label, rest, now)
+
+    def dropped(self, label: str, lines: int, now: float) -> None:
+        """Mark a gap in ``label``'s output; its held partial line ends here."""
+        self.finish(label, now)
+        self._record(f"[meta] {label}: {lines} lines dropped", now)
+
+    @property
+    def pending(self) -> bool:
+        return self._opened is not None
+
+    def ready(self, now: float) -> bool:
+        """Whole lines are pending and the frame is full or its window has closed."""
+        if not self._records or self._opened is None:
+            return False
+        return self._size >= self.frame_bytes or now - self._opened >= self.interval
+
+    def time_left(self, now: float) -> Optional[float]:
+        """Seconds until the open frame's window closes; ``None`` when empty."""
+        if self._opened is None:
+            return None
+        return max(0.0, self._opened + self.interval - now)
+
+    def flush(self, now: float, partials: bool = False) -> str:
+        """Return the pending frame and start a new one.
+
+        Held partial lines stay for the next frame unless ``partials`` is set.
+        """
+        if partials:
+            for label in list(self._partial):
+                self.finish(label, now)
+        frame = "\n".join(self._records)
+        self._records = []
+        self._size = 0
+        self._opened = now if self._partial else None
+        self.frames += 1
+        return frame
@@ -0,0 +1,89 @@
+"""Background dataset warm-up so the server answers before its indexes exist."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+from .dataset import ToolDataset, current_dataset, get_dataset
+
+
+class StartupMetrics:
+    """Milestones measured from the moment ``create_app`` starts the warm-up."""
+
+    def __init__(self) -> None:
+        self.started: Optional[float] = None
+        self.first_response: Optional[float] = None
+        self.index_ready: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def mark_started(self) -> None:
+        with self._lock:
+            if self.started is None:
+                self.started = time.perf_counter()
+
+    def mark_first_response(self) -> None:
+        with self._lock:
+            if self.first_response is None:
+                self.first_response = time.perf_counter()
+
+    def mark_index_ready(self) -> None:
+        with self._lock:
+            if self.index_ready is None:
+                self.index_ready = time.perf_counter()
+
+    def _elapsed_ms(self, moment: Optional[float]) -> Optional[float]:
+        if self.started is None or moment is None:
+            return None
+        return round((moment - self.started) * 1000, 1)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "time_to_first_response_ms": self._elapsed_ms(self.first_response),
+            "time_to_index_ready_ms": self._elapsed_ms(self.index_ready),
+        }
+
+
+STARTUP = StartupMetrics()
+
+_WARMUP: Optional["Future[ToolDataset]"] = None
+_WARMUP_LOCK = threading.Lock()
+
+
+def _warm(future: "Future[ToolDataset]") -> None:
+    try:
+        dataset = get_dataset()
+    except BaseException as exc:  # noqa: BLE001 - surfaced to whoever awaits it
+        future.set_exception(exc)
+        return
+    STARTUP.mark_index_ready()
+    future.set_result(dataset)
+
+
+def start_warmup() -> "Future[ToolDataset]":
+    """Load the dataset and build its indexes on a daemon thread.
+
+    Idempotent: later calls return the same future unless the previous
+    attempt failed, in which case loading is retried.
+    """
+    global _WARMUP
+    STARTUP.mark_started()
+    with _WARMUP_LOCK:
+        warmup = _WARMUP
+        if warmup is None or (warmup.done() and warmup.exception() is not None):
+            warmup = _WARMUP = Future()
+            threading.Thread(
+                target=_warm, args=(warmup,), name="kali-dataset-warmup", daemon=True
+            ).start()
+    return warmup
+
+
+async def ready_dataset() -> ToolDataset:
+    """Return the current snapshot, waiting for the warm-up if it is still running."""
+    dataset = current_dataset()
+    if dataset is not None:
+        return dataset
+    return await asyncio.wrap_future(start_warmup())
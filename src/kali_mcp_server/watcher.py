@@ -0,0 +1,72 @@
+"""Hot reloading of the tool dataset when its source file changes."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from importlib.resources import abc as resources_abc
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+from .dataset import DEFAULT_DATASET_PATHS, ToolDataset, reload_dataset
+from .warmup import ready_dataset
+
+ENV_POLL_INTERVAL = "KALI_TOOL_DATA_POLL"
+DEFAULT_POLL_INTERVAL = 5.0
+
+logger = logging.getLogger("kali-security-server")
+
+
+def poll_interval() -> float:
+    """Seconds between dataset file checks; 0 disables the watcher."""
+    try:
+        return max(0.0, float(os.environ.get(ENV_POLL_INTERVAL, DEFAULT_POLL_INTERVAL)))
+    except ValueError:
+        return DEFAULT_POLL_INTERVAL
+
+
+def _fingerprint(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+async def reload_in_background(
+    paths: Iterable[Union[Path, resources_abc.Traversable]] = DEFAULT_DATASET_PATHS,
+) -> ToolDataset:
+    """Build the replacement dataset off the event loop, then swap it in."""
+    return await asyncio.to_thread(reload_dataset, paths)
+
+
+async def watch_dataset(interval: float) -> None:
+    """Poll the loaded dataset's source and overlay files; reload when any changes.
+
+    A file that fails to load (for example one still being written) is logged
+    and retried on its next change; the previous snapshot keeps serving.
+    """
+    if interval <= 0:
+        return
+    dataset = await ready_dataset()
+    source = dataset.source
+    if source is None:
+        return
+    watched = (source, *getattr(dataset, "overlays", ()))
+    last_seen = tuple(map(_fingerprint, watched))
+    while True:
+        await asyncio.sleep(interval)
+        current = tuple(map(_fingerprint, watched))
+        if None in current or current == last_seen:
+            continue
+        last_seen = current
+        try:
+            dataset = await reload_in_background([source])
+        except Exception as exc:  # noqa: BLE001 - keep serving the old snapshot
+            logger.error("Dataset reload from %s failed: %s", source, exc)
+            continue
+        logger.info("Reloaded dataset from %s (%d tools)", source, len(dataset))
+        source = dataset.source or source
+        watched = (source, *getattr(dataset, "overlays", ()))
+        last_seen = tuple(map(_fingerprint, watched))
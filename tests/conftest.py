@@ -1,7 +1,15 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_index_cache(tmp_path_factory, monkeypatch):
+    """Keep dataset index snapshots out of the developer's real cache directory."""
+    monkeypatch.setenv("KALI_INDEX_CACHE_DIR", str(tmp_path_factory.mktemp("index-cache")))
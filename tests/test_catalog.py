@@ -0,0 +1,23 @@
+import pytest
+
+from kali_mcp_server import catalog
+
+
+def test_find_tool_accepts_names_aliases_and_binaries():
+    assert catalog.find_tool(" Aircrack NG ") == catalog.find_tool("aircrack-ng")
+    assert catalog.lookup_tool("theHarvester").name == "theharvester"
+    assert catalog.lookup_tool("NMAP").binary == "nmap"
+    with pytest.raises(KeyError, match="Unknown tool: nope"):
+        catalog.find_tool("nope")
+
+
+def test_bulk_accessors_cover_the_library_once():
+    entries = catalog.catalog_entries()
+    assert [(entry.name, entry.category, entry.description) for entry in entries] == list(
+        catalog.iter_tools()
+    )
+    assert entries is catalog.catalog_entries()
+    for category, tools in catalog.KALI_TOOL_LIBRARY.items():
+        names = [entry.name for entry in catalog.tools_in_category(category.upper())]
+        assert names == list(tools)
+    assert catalog.tools_in_category("unknown") == ()
@@ -0,0 +1,91 @@
+import json
+import shutil
+from pathlib import Path
+
+import kali_mcp_server.compiled as compiled_module
+from kali_mcp_server import snapshot
+from kali_mcp_server.compiled import (
+    CompiledDataset,
+    compile_dataset,
+    compiled_path_for,
+    dataset_digest,
+    load_compiled_tools,
+)
+from kali_mcp_server.dataset import _load_tools_from_json, load_dataset
+
+DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "kali_tools.json"
+
+
+def _copy_dataset(tmp_path):
+    json_path = tmp_path / "kali_tools.json"
+    shutil.copy(DATA_PATH, json_path)
+    return json_path
+
+
+def test_compiled_dataset_round_trips_json(tmp_path):
+    json_path = _copy_dataset(tmp_path)
+    compiled = CompiledDataset(compile_dataset(json_path))
+    tools = compiled.tools()
+    assert tools == _load_tools_from_json(json_path)
+    packages = {id(tool.package) for tool in tools if tool.package == tools[0].package}
+    assert len(packages) == 1
+
+
+def test_compiled_name_index_is_case_insensitive(tmp_path):
+    compiled = CompiledDataset(compile_dataset(_copy_dataset(tmp_path)))
+    tool = compiled.find("THEHARVESTER")
+    assert tool is not None and tool.name == "theHarvester"
+    assert compiled.find("not-a-tool") is None
+
+
+def test_stale_compiled_dataset_is_ignored(tmp_path):
+    json_path = _copy_dataset(tmp_path)
+    compile_dataset(json_path)
+    assert load_compiled_tools(json_path) is not None
+
+    entries = json.loads(json_path.read_text())
+    entries[0]["summary"] = "Edited after compiling."
+    json_path.write_text(json.dumps(entries))
+    assert load_compiled_tools(json_path) is None
+    dataset = load_dataset([json_path])
+    assert dataset.get(entries[0]["name"]).summary == "Edited after compiling."
+
+
+def test_corrupt_compiled_dataset_falls_back_to_json(tmp_path):
+    json_path = _copy_dataset(tmp_path)
+    compiled_path_for(json_path).write_bytes(b"garbage")
+    assert load_compiled_tools(json_path) is None
+    assert load_dataset([json_path]).get("nmap") is not None
+
+
+def test_compiled_dataset_keeps_owner_lists(tmp_path):
+    json_path = _copy_dataset(tmp_path)
+    entries = json.loads(json_path.read_text())
+    entries[0]["packages"] = [entries[0]["package"], "kali-tools-top10"]
+    entries[0]["categories"] = [entries[0]["category"], "Top 10"]
+    json_path.write_text(json.dumps(entries))
+    tools = CompiledDataset(compile_dataset(json_path)).tools()
+    assert tools == _load_tools_from_json(json_path)
+    assert tools[0].packages == (entries[0]["package"], "kali-tools-top10")
+    assert tools[1].packages == (entries[1]["package"],)
+
+
+def test_compiled_load_hashes_the_json_once_and_unmaps_the_file(tmp_path, monkeypatch):
+    json_path = _copy_dataset(tmp_path)
+    compile_dataset(json_path)
+    monkeypatch.setenv("KALI_INDEX_CACHE_DIR", "off")
+    calls = []
+
+    def counting_digest(path):
+        calls.append(path)
+        return dataset_digest(path)
+
+    monkeypatch.setattr(compiled_module, "dataset_digest", counting_digest)
+    monkeypatch.setattr(snapshot, "dataset_digest", counting_digest)
+    assert len(snapshot.load_indexed_dataset(json_path)) > 0
+    assert calls == [json_path]
+
+    with CompiledDataset(compiled_path_for(json_path)) as compiled:
+        tools = compiled.tools()
+    assert compiled._map.closed
+    assert tools == _load_tools_from_json(json_path)
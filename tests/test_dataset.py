@@ -1,6 +1,64 @@
+import json
+import logging
+import os
+import random
 from pathlib import Path
 
-from kali_mcp_server.dataset import ToolDataset, get_dataset, load_dataset
+import pytest
+import yaml
+from rapidfuzz import fuzz
+
+from kali_mcp_server import dataset as dataset_module
+from kali_mcp_server.cache import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL, QueryCache
+from kali_mcp_server.catalog import ENV_TASK_INTENTS, KALI_TASK_INTENTS, load_task_intents
+from kali_mcp_server.dataset import (
+    Overlay,
+    Tool,
+    ToolDataset,
+    get_dataset,
+    load_dataset,
+    reload_dataset,
+)
+from kali_mcp_server.index import PhraseMatcher
+
+WORDS = (
+    "network scan scanner port web sql injection wireless crack password hash dns "
+    "subdomain exploit payload brute force wifi wpa handshake forensic memory reverse"
+).split()
+
+
+def _reference_search(tools, query, limit):
+    """The original full-scan scorer that the indexed search must reproduce."""
+    scored = []
+    for tool in tools:
+        blob_score = fuzz.token_set_ratio(query, tool.searchable_blob)
+        name_score = fuzz.ratio(query.lower(), tool.name.lower())
+        scored.append((max(blob_score, name_score), tool))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    filtered = [tool for score, tool in scored if score > 40]
+    if not filtered:
+        filtered = [tool for score, tool in scored if score > 0]
+    if not filtered:
+        filtered = [tool for _score, tool in scored]
+    return filtered[:limit]
+
+
+def _synthetic_tools(count, seed=7):
+    rng = random.Random(seed)
+    tools = []
+    for _ in range(count):
+        name = "".join(rng.sample("abcdefghijklmnop", rng.randint(2, 9)))
+        tools.append(
+            Tool(
+                name=name + rng.choice(["", "-ng", "map"]),
+                package="kali-tools-" + rng.choice(WORDS),
+                category=rng.choice(["Web Applications", "Information Gathering"]),
+                summary=" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 10))),
+                binary_path=f"/usr/bin/{name}",
+                default_args="",
+            )
+        )
+    return tools
 
 
 def test_load_dataset_from_repo_root():
@@ -29,3 +87,358 @@ def test_by_category_case_insensitive():
     tools = dataset.by_category("information gathering")
     assert tools
     assert any(tool.name == "nmap" for tool in tools)
+
+
+def test_fuzzy_search_matches_full_scan():
+    tools = _synthetic_tools(300)
+    dataset = ToolDataset(tools)
+    rng = random.Random(11)
+    queries = [" ".join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(40)]
+    queries += ["".join(rng.sample("abcdefghijklmnop", rng.randint(1, 6))) for _ in range(40)]
+    queries += [tool.name for tool in tools[:10]] + ["Network Scan", "zzzz"]
+    for query in queries:
+        for limit in (1, 5):
+            assert dataset.fuzzy_search(query, limit) == _reference_search(tools, query, limit)
+
+
+def test_fuzzy_search_matches_full_scan_on_bundled_dataset():
+    dataset = get_dataset()
+    tools = list(dataset.iter_tools())
+    for query in ("network scan", "nmapp", "sql injection", "Wi-Fi cracking", "x"):
+        assert dataset.fuzzy_search(query, 5) == _reference_search(tools, query, 5)
+
+
+def test_suggest_ranks_task_descriptions_by_relevance():
+    dataset = get_dataset()
+    names = [tool.name for tool in dataset.suggest("enumerate subdomains for a web app", limit=2)]
+    assert set(names) == {"dnsenum", "theHarvester"}
+    assert dataset.suggest("port scanning of a host", limit=1)[0].name == "nmap"
+
+
+def test_suggest_uses_fuzzy_search_for_name_like_queries():
+    dataset = get_dataset()
+    assert dataset.suggest("nmapp", limit=3) == dataset.fuzzy_search("nmapp", limit=3)
+
+
+def test_phrase_matcher_finds_overlapping_phrases_in_one_pass():
+    matcher = PhraseMatcher(["port scan", "scan", "web app scan", "app"])
+    assert matcher.find("Port scanning of a web app, then scan it") == [0, 1, 3, 1]
+    assert matcher.find("nothing relevant") == []
+
+
+def test_suggest_ranks_intent_matches_above_fuzzy_hits():
+    dataset = get_dataset()
+    for task, expected in (
+        ("port scanning on a subnet", "nmap"),
+        ("find sql injection in a login form", "sqlmap"),
+        ("crack a WPA handshake", "aircrack-ng"),
+    ):
+        names = [tool.name for tool in dataset.suggest(task, limit=3)]
+        assert names[0] == expected
+        assert len(names) == len(set(names))
+
+
+def test_task_intents_file_extends_and_removes_phrases(tmp_path, monkeypatch):
+    intents = tmp_path / "intents.yaml"
+    intents.write_text("port scan: []\nrogue access point: [reaver, aircrack-ng]\n")
+    monkeypatch.setenv(ENV_TASK_INTENTS, str(intents))
+    loaded = load_task_intents()
+    assert "port scan" not in loaded
+    assert loaded["rogue access point"] == ("reaver", "aircrack-ng")
+
+    dataset = ToolDataset(list(get_dataset().iter_tools()))
+    assert dataset.suggest("set up a rogue access point", limit=1)[0].name == "reaver"
+
+
+def test_task_intents_file_is_parsed_once_and_skips_bad_entries(tmp_path, monkeypatch, caplog):
+    intents = tmp_path / "intents.yaml"
+    intents.write_text("port scan: 3\nrogue access point: [reaver]\n")
+    monkeypatch.setenv(ENV_TASK_INTENTS, str(intents))
+    with caplog.at_level(logging.WARNING, logger="kali-security-server"):
+        loaded = load_task_intents()
+    assert loaded["port scan"] == KALI_TASK_INTENTS["port scan"]
+    assert loaded["rogue access point"] == ("reaver",)
+    assert "port scan" in caplog.text
+
+    loads = []
+    safe_load = yaml.safe_load
+    monkeypatch.setattr(yaml, "safe_load", lambda handle: loads.append(1) or safe_load(handle))
+    load_task_intents()
+    ToolDataset(list(get_dataset().iter_tools()))
+    assert loads == []
+
+    intents.write_text(": [\n")
+    os.utime(intents, ns=(1, 1))
+    assert load_task_intents() == KALI_TASK_INTENTS
+    assert loads == [1]
+    ToolDataset(list(get_dataset().iter_tools()))
+
+
+def test_fuzzy_search_results_are_cached():
+    dataset = ToolDataset(_synthetic_tools(50))
+    first = dataset.fuzzy_search("wifi  crack", limit=3)
+    second = dataset.fuzzy_search(" wifi crack ", limit=3)
+    assert first == second
+    stats = dataset.cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+    dataset.fuzzy_search("wifi crack", limit=4)
+    assert dataset.cache_stats()["misses"] == 2
+
+
+def test_fuzzy_search_scores_the_whitespace_normalized_query():
+    tools = _synthetic_tools(50)
+    padded, plain = ToolDataset(tools), ToolDataset(tools)
+    for query in ("ma ", "  wifi   crack", "nmap\t"):
+        # Separate caches, so equal results come from scoring, not a shared entry.
+        assert padded.fuzzy_search(query, limit=5) == plain.fuzzy_search(
+            " ".join(query.split()), limit=5
+        )
+
+
+def test_query_cache_evicts_and_expires():
+    now = [0.0]
+    cache = QueryCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    cache.get_or_compute("a", lambda: 0)
+    cache.get_or_compute("c", lambda: 3)
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+    now[0] = 11.0
+    assert cache.get_or_compute("c", lambda: "expired") == "expired"
+
+
+def test_malformed_cache_settings_fall_back_to_defaults(monkeypatch):
+    monkeypatch.setenv("KALI_SEARCH_CACHE_SIZE", "lots")
+    monkeypatch.setenv("KALI_SEARCH_CACHE_TTL", "5m")
+    dataset = ToolDataset(_synthetic_tools(5))
+    assert (dataset._cache.maxsize, dataset._cache.ttl) == (DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL)
+
+
+def test_reload_dataset_clears_cache():
+    dataset = get_dataset()
+    dataset.fuzzy_search("nmap", limit=1)
+    reload_dataset()
+    assert dataset.cache_stats()["size"] == 0
+    assert get_dataset() is not dataset
+
+
+def test_tool_records_are_slotted_and_interned():
+    package = "".join(["kali-tools-", "web"])
+    first = Tool("a", package, "Web", "Alpha", "/usr/bin/a", "")
+    second = Tool("b", "kali-tools-web", "Web", "Beta", "/usr/bin/b", "")
+    assert not hasattr(first, "__dict__")
+    assert first.package is second.package
+    assert first.searchable_blob == "a kali-tools-web web alpha"
+    assert first == Tool("a", "kali-tools-web", "Web", "Alpha", "/usr/bin/a", "")
+
+
+def test_page_category_walks_stable_order():
+    tools = _synthetic_tools(250)
+    dataset = ToolDataset(tools)
+    expected = dataset.by_category("web applications")
+    assert [tool.sort_key for tool in expected] == sorted(tool.sort_key for tool in expected)
+
+    seen, cursor = [], ""
+    while True:
+        page = dataset.page_category("Web Applications", limit=17, cursor=cursor)
+        assert page.total == len(expected)
+        assert len(page.items) <= 17
+        seen.extend(page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert seen == expected
+
+
+def test_page_cursor_survives_reordered_reload():
+    tools = _synthetic_tools(60)
+    first_page = ToolDataset(tools).page_category("Information Gathering", limit=5)
+    shuffled = ToolDataset(list(reversed(tools)))
+    resumed = shuffled.page_category("Information Gathering", limit=5, cursor=first_page.next_cursor)
+    expected = shuffled.by_category("Information Gathering")[5:10]
+    assert resumed.items == expected
+
+
+def test_page_categories_and_invalid_cursor():
+    dataset = get_dataset()
+    page = dataset.page_categories(limit=2)
+    assert page.items == dataset.categories[:2]
+    rest = dataset.page_categories(limit=200, cursor=page.next_cursor)
+    assert page.items + rest.items == dataset.categories
+    assert rest.next_cursor is None
+    with pytest.raises(ValueError):
+        dataset.page_category("Information Gathering", cursor="not-a-cursor")
+
+
+def test_duplicate_binaries_collapse_into_one_record():
+    shared = dict(name="nmap", summary="", binary_path="/usr/bin/nmap", default_args="")
+    tools = [
+        Tool(package="kali-tools-top10", category="Top 10", **{**shared, "summary": "Top"}),
+        Tool(package="kali-tools-information-gathering", category="Information Gathering", **shared),
+        Tool(package="kali-tools-web", category="Web Applications", **shared),
+        Tool("NMAP", "kali-tools-extra", "Extra", "Other build", "/opt/nmap/nmap", ""),
+    ]
+    dataset = ToolDataset(tools)
+    assert len(dataset) == 2
+    merged = dataset.get_all("nmap")
+    assert [tool.binary_path for tool in merged] == ["/opt/nmap/nmap", "/usr/bin/nmap"]
+    canonical = merged[1]
+    assert canonical.package == "kali-tools-information-gathering"
+    # Aggregate meta-packages such as top10 come last, as in sync_tools.py.
+    assert canonical.packages == (
+        "kali-tools-information-gathering",
+        "kali-tools-web",
+        "kali-tools-top10",
+    )
+    assert canonical.categories == ("Information Gathering", "Web Applications", "Top 10")
+    assert ToolDataset(list(reversed(tools))).get("nmap") == dataset.get("nmap")
+    for category in canonical.categories:
+        assert canonical in dataset.by_category(category)
+    assert ToolDataset([tools[0], tools[2]]).get("nmap").package == "kali-tools-web"
+
+
+def test_did_you_mean_handles_near_misses_and_truncations():
+    dataset = get_dataset()
+    assert dataset.did_you_mean("aircrack", limit=1)[0].name == "aircrack-ng"
+    assert dataset.did_you_mean("aircrack ng", limit=1)[0].name == "aircrack-ng"
+    assert dataset.did_you_mean("theharvest", limit=1)[0].name == "theHarvester"
+    assert dataset.did_you_mean("sqlmpa", limit=1)[0].name == "sqlmap"
+    # Nothing name-like: fall back to full fuzzy scoring.
+    assert dataset.did_you_mean("network scanner") == dataset.fuzzy_search("network scanner", 5)
+
+
+def test_complete_lists_names_by_prefix():
+    dataset = get_dataset()
+    assert [tool.name for tool in dataset.complete("m")] == ["metasploit-framework", "mimikatz"]
+    assert [tool.name for tool in dataset.complete("THEH")] == ["theHarvester"]
+    assert dataset.complete("zzz") == []
+    assert dataset.complete("", limit=3) == []
+
+
+@pytest.mark.parametrize("direct_limit", [0, 10_000])
+def test_filtered_search_matches_full_scan_of_subset(monkeypatch, direct_limit):
+    monkeypatch.setattr(dataset_module, "FACET_DIRECT_SCORE_MAX", direct_limit)
+    tools = _synthetic_tools(300)
+    dataset = ToolDataset(tools)
+    package = tools[0].package
+    subset = [
+        tool for tool in dataset.iter_tools()
+        if tool.category == "Web Applications" and tool.package == package
+    ]
+    filters = {"category": "web applications", "package": package}
+    for query in ("network scan", "sql", tools[3].name, "zzzz"):
+        expected = _reference_search(subset, query, 5)
+        assert dataset.fuzzy_search(query, 5, filters=filters) == expected
+
+
+def test_facets_cover_binary_and_policy_status():
+    dataset = get_dataset()
+    binary_counts = dataset.facet_counts("binary")
+    assert set(binary_counts) <= {"available", "missing"}
+    assert sum(binary_counts.values()) == len(dataset)
+    confirmed = dataset.filter_tools({"policy": "target_confirmation"})
+    assert [tool.name for tool in confirmed] == ["nmap"]
+    assert dataset.fuzzy_search("nmap", 3, filters={"policy": "allowed"})[0].name != "nmap"
+    counts = dataset.facet_counts("category", {"policy": "allowed"})
+    assert counts["Information Gathering"] == len(dataset.by_category("Information Gathering")) - 1
+    with pytest.raises(ValueError):
+        dataset.fuzzy_search("nmap", filters={"colour": "red"})
+
+
+def test_cached_filtered_search_skips_the_facet_mask(monkeypatch):
+    dataset = ToolDataset(_synthetic_tools(50))
+    filters = {"category": " Web Applications "}
+    first = dataset.fuzzy_search("sql", 3, filters=filters)
+    monkeypatch.setattr(dataset, "facet_mask", None)
+    assert dataset.fuzzy_search("sql", 3, filters={"category": "web applications"}) == first
+    assert dataset.cache_stats()["hits"] == 1
+    with pytest.raises(ValueError):
+        dataset.fuzzy_search("sql", 3, filters={"colour": "red"})
+
+
+def test_overlay_reuses_binary_probes_of_kept_tools(monkeypatch):
+    tools = _synthetic_tools(30)
+    probed = []
+    monkeypatch.setattr(
+        dataset_module, "_binary_available", lambda tool: probed.append(tool.name) or True
+    )
+    base = ToolDataset(tools)
+    assert len(probed) == len(base)
+
+    probed.clear()
+    added = _synthetic_tools(3, seed=7)
+    layered = base.overlay(Overlay(tools=tuple(added), hide=frozenset({tools[0].name_lc})))
+    assert sorted(probed) == sorted(tool.name for tool in added)
+    assert layered.facet_counts("binary") == {"available": len(layered)}
+
+
+def test_overlay_indexes_match_a_full_build():
+    tools = _synthetic_tools(300)
+    base = ToolDataset(tools)
+    replaced = tools[10]
+    added = _synthetic_tools(20, seed=11) + [
+        Tool(replaced.name, "site-tools", "Site", "patched build", "/opt/site/bin/x", "")
+    ]
+    overlay = Overlay(tools=tuple(added), hide=frozenset({tools[0].name_lc, tools[5].name_lc}))
+    layered = base.overlay(overlay)
+
+    removed = overlay.hide | {tool.name_lc for tool in added}
+    rebuilt = ToolDataset(
+        [tool for tool in base.iter_tools() if tool.name_lc not in removed] + added
+    )
+    layered_state, rebuilt_state = layered.to_state(), rebuilt.to_state()
+    # Deletions of dropped names linger in the overlay's typo map; lookups skip them.
+    layered_state["name_index"].pop("_deletes")
+    rebuilt_state["name_index"].pop("_deletes")
+    assert layered_state == rebuilt_state
+    for query in ("network scan", "sql injection", added[0].name, tools[5].name):
+        assert layered.fuzzy_search(query, 5) == rebuilt.fuzzy_search(query, 5)
+        assert layered.suggest(query, 5) == rebuilt.suggest(query, 5)
+        assert layered.did_you_mean(query) == rebuilt.did_you_mean(query)
+    for hidden in overlay.hide - {tool.name_lc for tool in added}:
+        assert layered.get(hidden) is None
+    assert layered.get(replaced.name).package == "site-tools"
+    assert layered.facet_counts("category")["Site"] == 1
+
+
+def test_load_dataset_applies_overlays_in_order(tmp_path):
+    repo_root = Path(__file__).resolve().parents[1]
+    base_path = repo_root / "data" / "kali_tools.json"
+    first = tmp_path / "site.json"
+    first.write_text(
+        json.dumps(
+            {
+                "tools": [
+                    {"name": "nmap", "default_args": "-sT"},
+                    {
+                        "name": "sitescan",
+                        "package": "site-tools",
+                        "category": "Site",
+                        "summary": "In-house network scanner",
+                        "binary_path": "/opt/site/bin/sitescan",
+                    },
+                ],
+                "hide": ["beef", "Empire"],
+            }
+        )
+    )
+    second = tmp_path / "team.json"
+    second.write_text(json.dumps([{"name": "sitescan", "summary": "Team build of sitescan"}]))
+
+    dataset = load_dataset([base_path], overlays=[first, second])
+    base = load_dataset([base_path], overlays=[])
+    assert dataset.overlays == (first, second)
+    assert len(dataset) == len(base) - 1
+    assert dataset.get("beef") is None and dataset.get("empire") is None
+    nmap = dataset.get("nmap")
+    assert nmap.default_args == "-sT" and nmap.summary == base.get("nmap").summary
+    assert dataset.get("sitescan").summary == "Team build of sitescan"
+    assert dataset.get("sitescan").package == "site-tools"
+    assert dataset.fuzzy_search("sitescan", 1)[0].name == "sitescan"
+    assert "Site" in dataset.categories
+
+    broken = tmp_path / "broken.json"
+    broken.write_text(json.dumps([{"name": "brandnew", "summary": "no package"}]))
+    with pytest.raises(ValueError, match="brandnew"):
+        load_dataset([base_path], overlays=[broken])
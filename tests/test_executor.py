@@ -1,13 +1,27 @@
 import asyncio
+import shlex
+import sys
+import tracemalloc
+from pathlib import Path
 from types import SimpleNamespace
 
 import pytest
 
+import kali_mcp_server.capture as capture_module
 import kali_mcp_server.executor as executor
-from kali_mcp_server.dataset import get_dataset
+from kali_mcp_server.capture import OutputCapture
+from kali_mcp_server.dataset import Tool, ToolDataset, get_dataset
+from kali_mcp_server.streaming import OutputFramer, StreamQueue
 from kali_mcp_server import policy
 
 
+def _reader(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
 @pytest.mark.asyncio
 async def test_run_tool_rejects_unknown_tool():
     dataset = get_dataset()
@@ -27,11 +41,13 @@ async def test_run_tool_times_out(monkeypatch):
     dataset = get_dataset()
 
     async def fake_create_process(*_args, **_kwargs):
-        async def communicate():
+        async def wait():
             await asyncio.sleep(0.01)
-            return b"", b""
+            return 0
 
-        return SimpleNamespace(communicate=communicate, kill=lambda: None, returncode=0)
+        return SimpleNamespace(
+            stdout=_reader(b""), stderr=_reader(b""), wait=wait, kill=lambda: None, returncode=0
+        )
 
     async def fake_wait_for(awaitable, timeout):  # pragma: no cover - helper
         closer = getattr(awaitable, "close", None)
@@ -83,14 +99,13 @@ async def test_run_tool_records_history(monkeypatch):
     dataset = get_dataset()
 
     async def fake_create_process(*_args, **_kwargs):
-        async def communicate():
-            return b"done", b""
-
         async def wait():
             return 0
 
         return SimpleNamespace(
-            communicate=communicate,
+            stdout=_reader(b"done"),
+            stderr=_reader(b""),
+            wait=wait,
             kill=lambda: None,
             returncode=0,
         )
@@ -138,14 +153,12 @@ tools:
         if preexec_fn:
             preexec_fn()
 
-        async def communicate():
-            return b"done", b""
-
         async def wait():
             return 0
 
         return SimpleNamespace(
-            communicate=communicate,
+            stdout=_reader(b"done"),
+            stderr=_reader(b""),
             wait=wait,
             kill=lambda: None,
             returncode=0,
@@ -172,3 +185,208 @@ tools:
     monkeypatch.delenv("KALI_POLICY_FILE", raising=False)
     policy.reload_policy()
     executor.reset_runtime_limits()
+
+
+def test_output_capture_spills_past_its_memory_budget(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALI_CAPTURE_DIR", str(tmp_path))
+    small = OutputCapture("stdout", memory_bytes=64, excerpt_bytes=8)
+    small.write(b"short")
+    assert small.text() == "short" and not small.spilled
+
+    capture = OutputCapture("stdout", memory_bytes=64, excerpt_bytes=8)
+    data = b"".join(b"line %03d\n" % number for number in range(100))
+    for start in range(0, len(data), 7):
+        capture.write(data[start : start + 7])
+    capture.close()
+    assert capture.total_bytes == len(data)
+    assert capture.spill_path.parent == tmp_path
+    assert capture.spill_path.read_bytes() == data
+    text = capture.text()
+    assert text.startswith("line 000") and text.endswith("\nine 099\n")
+    assert f"[{len(data) - 16} bytes omitted; full output in {capture.spill_path}]" in text
+    capture.discard()
+    assert not capture.spill_path.exists()
+
+
+def test_output_capture_tolerates_spills_pruned_by_another_process(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALI_CAPTURE_DIR", str(tmp_path))
+    for number in range(40):
+        (tmp_path / f"stdout-old{number}.log").write_bytes(b"old")
+    vanished = tmp_path / "stdout-old7.log"
+    real_stat = Path.stat
+
+    def stat(path, *args, **kwargs):
+        if path == vanished:
+            raise FileNotFoundError(path)
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "stat", stat)
+    capture = OutputCapture("stdout", memory_bytes=4, excerpt_bytes=4)
+    capture.write(b"spilled output")
+    capture.close()
+    monkeypatch.undo()
+    assert capture.spill_path.read_bytes() == b"spilled output"
+    assert len(list(tmp_path.glob("*.log"))) == capture_module.MAX_SPILL_FILES
+
+
+@pytest.mark.asyncio
+async def test_run_tool_memory_stays_flat_for_large_output(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALI_CAPTURE_DIR", str(tmp_path))
+    monkeypatch.setenv("KALI_CAPTURE_MEMORY_BYTES", str(256 * 1024))
+    tool = Tool("chatty", "kali-tools-test", "Testing", "Prints a lot", sys.executable, "")
+    script = "import sys\nfor _ in range(20000): sys.stdout.write('x' * 1023 + '\\n')"
+
+    tracemalloc.start()
+    try:
+        result = await executor.run_tool(
+            "chatty", arguments=shlex.join(["-c", script]), dataset=ToolDataset([tool])
+        )
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert "Exit code: 0" in result
+    assert "--- stdout (20480000 bytes; first 16384 and last 16384 shown) ---" in result
+    assert peak < 4 * 1024 * 1024
+    spilled = list(tmp_path.glob("stdout-*.log"))
+    assert len(spilled) == 1 and spilled[0].stat().st_size == 20480000
+
+
+def test_output_framer_coalesces_lines_per_label():
+    framer = OutputFramer(frame_bytes=40, interval=0.05)
+    framer.add("stdout", "one\ntw", now=0.0)
+    framer.add("stderr", "warn", now=0.01)
+    framer.add("stdout", "o\n", now=0.02)
+    assert not framer.ready(0.03)
+    assert framer.ready(0.05)
+    assert framer.flush(0.05) == "[stdout] one\n[stdout] two"
+    assert framer.pending and not framer.ready(0.2)
+    assert framer.time_left(0.06) == pytest.approx(0.04)
+    assert framer.flush(0.1, partials=True) == "[stderr] warn"
+    assert not framer.pending
+
+    framer.add("stdout", "x" * 90, now=1.0)
+    assert framer.ready(1.0)
+    assert framer.flush(1.0).split("\n") == ["[stdout] " + "x" * 40] * 2
+    framer.finish("stdout", now=1.01)
+    assert framer.flush(1.01) == "[stdout] " + "x" * 10
+    assert (framer.frames, framer.lines) == (4, 6)
+
+
+@pytest.mark.asyncio
+async def test_stream_tool_frames_long_lines_and_multibyte_output():
+    tool = Tool("chatty", "kali-tools-test", "Testing", "Prints a lot", sys.executable, "")
+    script = (
+        "import sys\n"
+        "sys.stdout.write('é' * 100000 + '\\n')\n"
+        "for number in range(5000): print(number)\n"
+        "sys.stderr.write('done')\n"
+    )
+    frames = [
+        frame
+        async for frame in executor.stream_tool(
+            "chatty", arguments=shlex.join(["-c", script]), dataset=ToolDataset([tool])
+        )
+    ]
+    assert frames[-1] == "[meta] exit_code=0"
+    lines = "\n".join(frames[:-1]).split("\n")
+    stdout = [line for line in lines if line.startswith("[stdout] ")]
+    assert "".join(line[len("[stdout] ") :] for line in stdout[:-5000]) == "é" * 100000
+    assert stdout[-5000:] == [f"[stdout] {number}" for number in range(5000)]
+    assert "[stderr] done" in lines
+    assert len(frames) < 20
+    assert executor.get_run_history()[-1]["lines"] == len(lines)
+
+
+@pytest.mark.asyncio
+async def test_stream_tool_reports_idle_timeout():
+    tool = Tool("sleepy", "kali-tools-test", "Testing", "Goes quiet", sys.executable, "")
+    script = "import time\nprint('started', flush=True)\ntime.sleep(30)\n"
+    frames = [
+        frame
+        async for frame in executor.stream_tool(
+            "sleepy", arguments=shlex.join(["-c", script]), timeout=1, dataset=ToolDataset([tool])
+        )
+    ]
+    assert frames[0] == "[stdout] started"
+    assert frames[-1] == "Error: Tool execution timed out after 1 seconds."
+    assert executor.get_run_history()[-1]["exit_code"] == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_stream_queue_blocks_producers_when_full():
+    queue = StreamQueue(maxsize=2)
+    await queue.put("stdout", "a\n")
+    await queue.put("stdout", "b\n")
+    blocked = asyncio.create_task(queue.put("stdout", "c\n"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done() and len(queue) == 2
+    await queue.put("stdout", None)  # end markers never wait
+    assert await queue.get() == ("stdout", "a\n")
+    await asyncio.wait_for(blocked, timeout=1)
+    assert [await queue.get() for _ in range(3)] == [
+        ("stdout", "b\n"),
+        ("stdout", None),
+        ("stdout", "c\n"),
+    ]
+    assert queue.high_water == 2 and queue.dropped_lines == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_queue_drop_oldest_reports_dropped_lines():
+    queue = StreamQueue(maxsize=2, drop_oldest=True)
+    await queue.put("stderr", None)
+    for text in ("1\n2\n", "3\n", "partial", "4\n"):
+        await queue.put("stdout", text)
+    assert queue.take_dropped() == [("stdout", 3)]
+    assert queue.take_dropped() == []
+    assert [await queue.get() for _ in range(3)] == [
+        ("stderr", None),
+        ("stdout", "partial"),
+        ("stdout", "4\n"),
+    ]
+
+    framer = OutputFramer()
+    framer.add("stdout", "held", now=0.0)
+    framer.dropped("stdout", 3, now=0.0)
+    assert framer.flush(0.0) == "[stdout] held\n[meta] stdout: 3 lines dropped"
+
+
+@pytest.mark.asyncio
+async def test_stream_tool_queue_settings_come_from_policy(tmp_path, monkeypatch):
+    policy_path = tmp_path / "policy.yaml"
+    policy_path.write_text(
+        """
+global:
+  stream_queue_size: 4
+tools:
+  chatty:
+    stream_overflow: drop_oldest
+""",
+        encoding="utf-8",
+    )
+    monkeypatch.setenv("KALI_POLICY_FILE", str(policy_path))
+    policy.reload_policy()
+    tool = Tool("chatty", "kali-tools-test", "Testing", "Prints a lot", sys.executable, "")
+    script = "import sys\nfor _ in range(5000): sys.stdout.write('x' * 1023 + '\\n')"
+    try:
+        plan, _error = executor._resolve_execution("chatty", "", 10, ToolDataset([tool]))
+        assert (plan.stream_queue_size, plan.stream_overflow) == (4, "drop_oldest")
+
+        stream = executor.stream_tool(
+            "chatty", arguments=shlex.join(["-c", script]), dataset=ToolDataset([tool])
+        )
+        frames = [await stream.__anext__()]
+        await asyncio.sleep(0.5)  # a slow client: the child keeps writing meanwhile
+        frames += [frame async for frame in stream]
+    finally:
+        monkeypatch.delenv("KALI_POLICY_FILE", raising=False)
+        policy.reload_policy()
+
+    assert frames[-1] == "[meta] exit_code=0"
+    lines = "\n".join(frames[:-1]).split("\n")
+    dropped = executor.get_run_history()[-1]["dropped_lines"]
+    assert dropped > 0
+    markers = [line for line in lines if line.startswith("[meta] stdout:")]
+    assert sum(int(marker.split()[2]) for marker in markers) == dropped
+    assert executor.get_run_history()[-1]["queue_high_water"] <= 4
@@ -0,0 +1,139 @@
+import asyncio
+import shlex
+import sys
+
+import pytest
+
+from kali_mcp_server import jobs
+from kali_mcp_server.dataset import Tool, ToolDataset
+
+TOOL = Tool("chatty", "kali-tools-test", "Testing", "Prints a lot", sys.executable, "")
+
+
+def _arguments(script: str) -> str:
+    return shlex.join(["-c", script])
+
+
+async def _wait_until_done(registry, job_id):
+    job = registry.get(job_id)
+    await asyncio.wait_for(asyncio.gather(job.task, return_exceptions=True), timeout=10)
+    return job
+
+
+def _submitted_id(reply: str) -> str:
+    assert reply.startswith("Submitted job "), reply
+    return reply.split()[2]
+
+
+@pytest.mark.asyncio
+async def test_submitted_job_runs_in_the_background_and_pages_output(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALI_CAPTURE_DIR", str(tmp_path))
+    monkeypatch.setenv("KALI_CAPTURE_MEMORY_BYTES", "1024")
+    registry = jobs.JobRegistry(max_jobs=4)
+    script = "import sys\nsys.stdout.write('é' * 3000)\nsys.stderr.write('warning')\n"
+    reply = jobs.submit_job(
+        "chatty", _arguments(script), dataset=ToolDataset([TOOL]), registry=registry
+    )
+    job_id = _submitted_id(reply)
+    assert "State: " in jobs.job_status(job_id, registry=registry)
+
+    job = await _wait_until_done(registry, job_id)
+    status = jobs.job_status(job_id, registry=registry)
+    assert "State: completed" in status and "Exit code: 0" in status
+    assert "stdout=6000 stderr=7" in status
+    assert job.stdout.spill_path.parent == tmp_path / "jobs"
+
+    text, offset = "", 0
+    while True:
+        page = jobs.job_output(job_id, offset=offset, length=1001, registry=registry)
+        header, _, body = page.partition("\n")
+        text += body
+        if "Next offset:" not in header:
+            break
+        offset = int(header.rsplit(" ", 1)[1].rstrip("."))
+    assert text == "é" * 3000  # pages never split a character
+    assert jobs.job_output(job_id, stream="stderr", registry=registry).endswith("\nwarning")
+    assert jobs.job_output(job_id, stream="both", registry=registry).startswith("Error:")
+    assert job_id in jobs.job_status(registry=registry)
+
+
+@pytest.mark.asyncio
+async def test_cancel_job_kills_the_running_process(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALI_CAPTURE_DIR", str(tmp_path))
+    registry = jobs.JobRegistry(max_jobs=4)
+    script = "import time\nprint('started', flush=True)\ntime.sleep(30)\n"
+    job_id = _submitted_id(
+        jobs.submit_job(
+            "chatty", _arguments(script), timeout=60, dataset=ToolDataset([TOOL]), registry=registry
+        )
+    )
+    job = registry.get(job_id)
+    for _ in range(200):
+        if job.stdout.total_bytes:
+            break
+        await asyncio.sleep(0.02)
+    assert job.state == jobs.JOB_RUNNING
+
+    assert await jobs.cancel_job(job_id, registry=registry) == f"Cancelled job {job_id}."
+    assert job.state == jobs.JOB_CANCELLED and job.finished is not None
+    assert "already finished" in await jobs.cancel_job(job_id, registry=registry)
+    assert jobs.job_output(job_id, registry=registry).endswith("\nstarted\n")
+    assert (await jobs.cancel_job("missing", registry=registry)).startswith("Error: Unknown job")
+
+
+@pytest.mark.asyncio
+async def test_registry_evicts_finished_jobs_and_refuses_when_full(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALI_CAPTURE_DIR", str(tmp_path))
+    registry = jobs.JobRegistry(max_jobs=1)
+    dataset = ToolDataset([TOOL])
+    first = _submitted_id(
+        jobs.submit_job("chatty", _arguments("pass"), dataset=dataset, registry=registry)
+    )
+    refused = jobs.submit_job("chatty", _arguments("pass"), dataset=dataset, registry=registry)
+    assert refused.startswith("Error: 1 jobs are already queued or running")
+
+    await _wait_until_done(registry, first)
+    second = _submitted_id(
+        jobs.submit_job("chatty", _arguments("pass"), dataset=dataset, registry=registry)
+    )
+    assert registry.get(first) is None and registry.get(second) is not None
+    await _wait_until_done(registry, second)
+    assert registry.stats() == {"submitted": 2, "retained": 1, "completed": 1}
+    assert jobs.submit_job("unknown", dataset=dataset, registry=registry).startswith(
+        "Error: Unknown tool"
+    )
+
+
+@pytest.mark.asyncio
+async def test_job_that_cannot_start_is_marked_failed(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALI_CAPTURE_DIR", str(tmp_path))
+    script = tmp_path / "not-executable"
+    script.write_text("#!/bin/sh\necho hi\n", encoding="utf-8")
+    script.chmod(0o644)
+    tool = Tool("locked", "kali-tools-test", "Testing", "Not executable", str(script), "")
+    registry = jobs.JobRegistry(max_jobs=1)
+    dataset = ToolDataset([tool])
+    job_id = _submitted_id(jobs.submit_job("locked", dataset=dataset, registry=registry))
+
+    job = await _wait_until_done(registry, job_id)
+    assert job.task.exception() is None
+    status = jobs.job_status(job_id, registry=registry)
+    assert "State: failed" in status and "Error: PermissionError" in status
+    # A failed job is finished, so it is evicted rather than filling the registry.
+    assert jobs.submit_job("locked", dataset=dataset, registry=registry).startswith("Submitted")
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_move_buffered_output_to_disk(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALI_CAPTURE_DIR", str(tmp_path))
+    monkeypatch.setenv("KALI_CAPTURE_EXCERPT_BYTES", "64")
+    registry = jobs.JobRegistry(max_jobs=2)
+    script = "print('x' * 999)\n"
+    dataset = ToolDataset([TOOL])
+    job_id = _submitted_id(
+        jobs.submit_job("chatty", _arguments(script), dataset=dataset, registry=registry)
+    )
+    job = await _wait_until_done(registry, job_id)
+    assert job.stdout.spilled and not job.stderr.spilled
+    assert len(job.stdout._buffer) == 0
+    assert jobs.job_output(job_id, registry=registry).endswith("\n" + "x" * 999 + "\n")
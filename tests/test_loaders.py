@@ -0,0 +1,72 @@
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+from kali_mcp_server import loaders
+from kali_mcp_server.dataset import _load_tools_from_json, load_dataset
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+
+def _write_jsonl(path, entries):
+    path.write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+    return path
+
+
+def _write_csv(path, entries):
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(entries[0]))
+        writer.writeheader()
+        writer.writerows(entries)
+    return path
+
+
+def test_shipped_csv_streams_the_same_tools_as_json():
+    expected = _load_tools_from_json(DATA_DIR / "kali_tools.json")
+    assert loaders.load_tools(DATA_DIR / "kali_tools.csv", workers=1) == expected
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_streaming_loaders_keep_order_across_blocks(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(loaders, "BLOCK_SIZE", 64)
+    monkeypatch.setattr(loaders, "PARALLEL_MIN_BYTES", 0)
+    entries = json.loads((DATA_DIR / "kali_tools.json").read_text())
+    entries[1]["summary"] = 'Spans\nseveral "quoted" lines,\nwith commas'
+    entries[2]["packages"] = [entries[2]["package"], "kali-tools-extra"]
+    json_path = tmp_path / "kali_tools.json"
+    json_path.write_text(json.dumps(entries))
+    expected = _load_tools_from_json(json_path)
+
+    jsonl_path = _write_jsonl(tmp_path / "kali_tools.jsonl", entries)
+    assert loaders.load_tools(jsonl_path, workers=workers) == expected
+    rows = [
+        {**entry, "packages": ";".join(entry.get("packages", ()))} for entry in entries
+    ]
+    csv_path = _write_csv(tmp_path / "kali_tools.csv", rows)
+    assert loaders.load_tools(csv_path, workers=workers) == expected
+
+
+def test_invalid_records_name_their_line(tmp_path):
+    entries = json.loads((DATA_DIR / "kali_tools.json").read_text())[:3]
+    jsonl_path = _write_jsonl(tmp_path / "tools.jsonl", entries + [{"name": "x"}])
+    with pytest.raises(ValueError, match=r"tools\.jsonl:4: 'package'"):
+        loaders.load_tools(jsonl_path, workers=1)
+    broken = tmp_path / "broken.jsonl"
+    broken.write_text(json.dumps(entries[0]) + "\n\n{not json\n")
+    with pytest.raises(ValueError, match=r"broken\.jsonl:3:"):
+        loaders.load_tools(broken, workers=1)
+    csv_path = _write_csv(tmp_path / "tools.csv", entries)
+    csv_path.write_text(csv_path.read_text().replace("/usr/bin/nmap", ""))
+    with pytest.raises(ValueError, match=r"tools\.csv:2: 'binary_path'"):
+        loaders.load_tools(csv_path, workers=1)
+
+
+def test_load_dataset_accepts_jsonl(tmp_path):
+    entries = json.loads((DATA_DIR / "kali_tools.json").read_text())
+    jsonl_path = _write_jsonl(tmp_path / "kali_tools.jsonl", entries)
+    dataset = load_dataset([jsonl_path], overlays=[])
+    assert dataset.source == jsonl_path
+    assert dataset.get("nmap") is not None
+    assert len(dataset) == len(entries)
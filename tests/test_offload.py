@@ -0,0 +1,40 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from kali_mcp_server.offload import LoopLagMonitor, QueryOffloader
+
+
+def _thread_name() -> str:
+    return threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_only_costly_queries_leave_the_event_loop():
+    offloader = QueryOffloader(threshold=100, threads=1)
+    try:
+        assert await offloader.run(99, _thread_name) == threading.current_thread().name
+        assert (await offloader.run(100, _thread_name)).startswith("kali-search")
+    finally:
+        offloader.shutdown()
+    assert offloader.stats()["inline"] == 1
+    assert offloader.stats()["offloaded"] == 1
+
+    never = QueryOffloader(threshold=-1, threads=1)
+    assert await never.run(10**9, _thread_name) == threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_reports_blocking_work():
+    monitor = LoopLagMonitor(interval=0.01, stall_ms=50)
+    sampler = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.03)
+    time.sleep(0.08)
+    await asyncio.sleep(0.03)
+    sampler.cancel()
+    stats = monitor.stats()
+    assert stats["samples"] >= 2
+    assert stats["max_ms"] >= 50
+    assert stats["stalls_over_50ms"] == 1
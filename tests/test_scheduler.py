@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+import kali_mcp_server.executor as executor
+from kali_mcp_server import policy
+from kali_mcp_server.scheduler import RunScheduler
+
+
+async def _admission_order(scheduler, requests):
+    """Queue ``requests`` behind a held slot and return the order they start in."""
+    started = []
+    await scheduler.acquire("blocker")
+
+    async def run(tool, **options):
+        async with scheduler.slot(tool, **options):
+            started.append(tool)
+            await asyncio.sleep(0)
+
+    tasks = [asyncio.create_task(run(tool, **options)) for tool, options in requests]
+    await asyncio.sleep(0)
+    scheduler.release("blocker")
+    await asyncio.gather(*tasks)
+    return started
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_runs_start_first():
+    scheduler = RunScheduler(max_concurrent=1)
+    order = await _admission_order(
+        scheduler,
+        [
+            ("openvas", {"priority": "low"}),
+            ("nmap", {}),
+            ("dnsenum", {"priority": "high"}),
+        ],
+    )
+    assert order == ["dnsenum", "nmap", "openvas"]
+    stats = scheduler.stats()
+    assert stats["queued"] == 0 and stats["max_queued"] == 3
+    assert stats["low_started"] == 1 and stats["low_wait_max_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_flows_share_slots_by_weight():
+    scheduler = RunScheduler(max_concurrent=1)
+    requests = [("sqlmap", {}) for _ in range(4)] + [("nikto", {}) for _ in range(2)]
+    order = await _admission_order(scheduler, requests)
+    assert order == ["sqlmap", "nikto", "sqlmap", "nikto", "sqlmap", "sqlmap"]
+
+    scheduler = RunScheduler(max_concurrent=1)
+    requests = [("a", {"client": "alice", "weight": 2}) for _ in range(4)]
+    requests += [("b", {"client": "bob"}) for _ in range(2)]
+    order = await _admission_order(scheduler, requests)
+    assert order == ["a", "b", "a", "a", "b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_tool_caps_do_not_block_other_tools():
+    scheduler = RunScheduler(max_concurrent=3)
+    await scheduler.acquire("openvas", cap=1)
+    waiting = asyncio.create_task(scheduler.acquire("openvas", cap=1))
+    await asyncio.sleep(0)
+    await asyncio.wait_for(scheduler.acquire("nmap"), timeout=1)
+    assert not waiting.done()
+    assert scheduler.stats()["running_by_tool"] == "nmap=1, openvas=1"
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert scheduler.stats()["queued"] == 0
+    scheduler.release("openvas")
+    scheduler.release("nmap")
+    assert scheduler.running == 0
+
+
+@pytest.mark.asyncio
+async def test_execution_plan_reads_scheduling_policy(tmp_path, monkeypatch):
+    policy_path = tmp_path / "policy.yaml"
+    policy_path.write_text(
+        """
+global:
+  max_concurrent_runs: 3
+tools:
+  nikto:
+    priority: low
+    weight: 0.5
+    max_concurrent_runs: 1
+""",
+        encoding="utf-8",
+    )
+    monkeypatch.setenv("KALI_POLICY_FILE", str(policy_path))
+    policy.reload_policy()
+    try:
+        plan, error = executor._resolve_execution(
+            "nikto", "-host 127.0.0.1", 10, executor.get_dataset()
+        )
+        assert error is None
+        assert (plan.priority, plan.weight, plan.max_concurrent) == ("low", 0.5, 1)
+        async with plan.slot():
+            assert executor.get_scheduler().stats()["running_by_tool"] == "nikto=1"
+        assert executor.get_scheduler().max_concurrent == 3
+    finally:
+        monkeypatch.delenv("KALI_POLICY_FILE", raising=False)
+        policy.reload_policy()
+
+
+@pytest.mark.asyncio
+async def test_waiter_cancelled_before_a_release_does_not_leak_the_slot():
+    scheduler = RunScheduler(max_concurrent=1)
+    await scheduler.acquire("nmap")
+    waiting = asyncio.create_task(scheduler.acquire("nikto"))
+    await asyncio.sleep(0)
+
+    # Cancel and release in the same tick, before the waiter's task resumes.
+    waiting.cancel()
+    scheduler.release("nmap")
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert scheduler.running == 0 and scheduler.stats()["queued"] == 0
+
+    await asyncio.wait_for(scheduler.acquire("sqlmap"), timeout=1)
+    assert scheduler.stats()["running_by_tool"] == "sqlmap=1"
+    scheduler.release("sqlmap")
@@ -1,7 +1,17 @@
+import json
+
 import pytest
 
 from kali_mcp_server.dataset import get_dataset
-from kali_mcp_server.server import _format_tool, _format_tool_list
+from kali_mcp_server.server import (
+    _client_key,
+    _format_page_footer,
+    _format_stats,
+    _format_tool,
+    _format_tool_list,
+    _page_json,
+    _search_filters,
+)
 
 
 def test_format_tool_includes_core_fields():
@@ -27,3 +37,43 @@ async def test_dataset_unknown_tool_suggestions():
     dataset = get_dataset()
     suggestions = dataset.fuzzy_search("nmapp", limit=3)
     assert any(tool.name == "nmap" for tool in suggestions)
+
+
+def test_format_stats_renders_sections():
+    rendered = _format_stats({"Catalog query cache": {"hits": 3, "misses": 1}})
+    assert rendered.splitlines() == [
+        "Server statistics:",
+        "Catalog query cache:",
+        "- hits: 3",
+        "- misses: 1",
+    ]
+
+
+def test_page_helpers_render_cursor_and_json():
+    dataset = get_dataset()
+    page = dataset.page_category("Information Gathering", limit=1)
+    footer = _format_page_footer(page)
+    assert footer and page.next_cursor in footer[0]
+    payload = json.loads(_page_json("tools", page, category="Information Gathering"))
+    assert payload["tools"][0]["name"] == page.items[0].name
+    assert payload["total"] == page.total
+    assert payload["next_cursor"] == page.next_cursor
+    assert _format_page_footer(dataset.page_category("Information Gathering", limit=200)) == []
+
+
+def test_search_filters_drop_blank_values():
+    assert _search_filters(category=" Web Applications ", package="", policy="  ") == {
+        "category": "Web Applications"
+    }
+
+
+def test_client_key_prefers_client_id_then_session():
+    class FakeContext:
+        def __init__(self, client_id, session):
+            self.client_id = client_id
+            self.session = session
+
+    session = object()
+    assert _client_key(FakeContext("alice", session)) == "alice"
+    assert _client_key(FakeContext(None, session)) == f"session-{id(session):x}"
+    assert _client_key(None) is None
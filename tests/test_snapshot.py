@@ -0,0 +1,113 @@
+import json
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+from kali_mcp_server import snapshot
+from kali_mcp_server.compiled import dataset_digest
+from kali_mcp_server.dataset import _load_tools_from_json, load_dataset
+from kali_mcp_server.snapshot import (
+    _HEADER,
+    MAX_CACHED_INDEXES,
+    build_index_snapshot,
+    cached_index_path,
+    index_path_for,
+    load_index_state,
+)
+
+DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "kali_tools.json"
+QUERIES = ("nmap", "aircrak", "sql injection", "theharvest", "wireless password")
+
+
+def _copy_dataset(tmp_path):
+    json_path = tmp_path / "kali_tools.json"
+    shutil.copy(DATA_PATH, json_path)
+    return json_path
+
+
+def _answers(dataset):
+    return [
+        (
+            [tool.name for tool in dataset.fuzzy_search(query, limit=5)],
+            [tool.name for tool in dataset.suggest(query, limit=5)],
+            [tool.name for tool in dataset.complete(query[:3])],
+            dataset.did_you_mean(query),
+        )
+        for query in QUERIES
+    ]
+
+
+def test_prebuilt_indexes_answer_like_freshly_built_ones(tmp_path, monkeypatch):
+    json_path = _copy_dataset(tmp_path)
+    fresh = load_dataset([json_path])
+    build_index_snapshot(json_path)
+    assert load_index_state(json_path) is not None
+
+    # Restored indexes must not be rebuilt.
+    monkeypatch.setattr("kali_mcp_server.dataset.BM25Index.__init__", None)
+    restored = load_dataset([json_path])
+    assert _answers(restored) == _answers(fresh)
+    assert restored.categories == fresh.categories
+
+
+def test_stale_or_corrupt_index_falls_back_to_building(tmp_path):
+    json_path = _copy_dataset(tmp_path)
+    index_path = build_index_snapshot(json_path)
+    expected = _answers(load_dataset([json_path]))
+
+    original = json_path.read_bytes()
+    json_path.write_text(json.dumps(json.loads(original)[:-1]))
+    assert load_index_state(json_path) is None
+    assert len(load_dataset([json_path])) == len(_load_tools_from_json(json_path))
+
+    json_path.write_bytes(original)
+    assert load_index_state(json_path) is not None
+    data = index_path.read_bytes()
+    index_path.write_bytes(data[: _HEADER.size + 10])
+    assert load_index_state(json_path) is None
+    *fields, _ = _HEADER.unpack_from(data)
+    hostile = pickle.dumps(os.getcwd)
+    index_path.write_bytes(_HEADER.pack(*fields, len(hostile)) + hostile)
+    assert load_index_state(json_path) is None
+    assert _answers(load_dataset([json_path])) == expected
+    assert index_path_for(json_path) == index_path
+
+
+def test_cold_start_writes_hash_keyed_cache_that_later_starts_reuse(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("KALI_INDEX_CACHE_DIR", str(cache_dir))
+    json_path = _copy_dataset(tmp_path)
+    for stale in range(MAX_CACHED_INDEXES + 2):
+        cache_dir.mkdir(exist_ok=True)
+        (cache_dir / f"{stale:064x}.index").write_bytes(b"old")
+        os.utime(cache_dir / f"{stale:064x}.index", ns=(stale, stale))
+
+    expected = _answers(load_dataset([json_path]))
+    cache_path = cached_index_path(dataset_digest(json_path))
+    assert cache_path is not None and cache_path.exists()
+    assert len(list(cache_dir.glob("*.index"))) == MAX_CACHED_INDEXES
+
+    monkeypatch.setattr("kali_mcp_server.dataset.BM25Index.__init__", None)
+    assert _answers(load_dataset([json_path])) == expected
+
+
+def test_index_cache_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALI_INDEX_CACHE_DIR", "off")
+    json_path = _copy_dataset(tmp_path)
+    load_dataset([json_path])
+    assert cached_index_path(dataset_digest(json_path)) is None
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["kali_tools.json"]
+
+
+def test_index_built_by_other_code_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALI_INDEX_CACHE_DIR", str(tmp_path / "cache"))
+    json_path = _copy_dataset(tmp_path)
+    build_index_snapshot(json_path)
+    cache_path = cached_index_path(dataset_digest(json_path))
+    assert load_index_state(json_path) is not None
+
+    # An upgrade that changes the index code must not restore the old state.
+    monkeypatch.setattr(snapshot, "code_digest", lambda: b"\x01" * 32)
+    assert load_index_state(json_path) is None
+    assert cached_index_path(dataset_digest(json_path)) != cache_path
@@ -0,0 +1,103 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from kali_mcp_server import policy
+from kali_mcp_server.dataset import ENV_DATASET_BACKEND, load_dataset
+from kali_mcp_server.sqlite_backend import (
+    SQLiteToolDataset,
+    build_sqlite_dataset,
+    open_sqlite_dataset,
+    sqlite_path_for,
+)
+
+DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "kali_tools.json"
+
+
+@pytest.fixture
+def json_path(tmp_path):
+    path = tmp_path / "kali_tools.json"
+    shutil.copy(DATA_PATH, path)
+    build_sqlite_dataset(path)
+    return path
+
+
+def test_sqlite_backend_matches_in_memory_dataset(json_path):
+    store = open_sqlite_dataset(json_path)
+    memory = load_dataset([json_path])
+    assert isinstance(store, SQLiteToolDataset)
+    assert len(store) == len(memory)
+    assert store.categories == memory.categories
+    assert store.get("NMAP") == memory.get("nmap")
+    assert store.by_category("information gathering") == memory.by_category("Information Gathering")
+    for query in ("nmapp", "network scan", "sql injection", "wireless password"):
+        assert store.fuzzy_search(query, 5) == memory.fuzzy_search(query, 5)
+    for name in ("aircrack", "theharvest", "sqlmpa"):
+        assert store.did_you_mean(name, 1) == memory.did_you_mean(name, 1)
+    task = "enumerate subdomains for a web app"
+    assert {tool.name for tool in store.suggest(task, 2)} == {"dnsenum", "theHarvester"}
+    assert store.filter_tools({"policy": "target_confirmation"}) == [memory.get("nmap")]
+
+
+def test_sqlite_pages_follow_cursor(json_path):
+    store = open_sqlite_dataset(json_path)
+    first = store.page_category("Information Gathering", limit=2)
+    rest = store.page_category("Information Gathering", limit=2, cursor=first.next_cursor)
+    assert first.items + rest.items == store.by_category("Information Gathering")
+    assert rest.next_cursor is None and first.total == 3
+    with pytest.raises(ValueError):
+        store.fuzzy_search("nmap", filters={"colour": "red"})
+
+
+def test_backend_selection_falls_back_when_database_is_stale(json_path, monkeypatch):
+    monkeypatch.setenv(ENV_DATASET_BACKEND, "sqlite")
+    assert isinstance(load_dataset([json_path]), SQLiteToolDataset)
+    json_path.write_text(json_path.read_text().replace("Network scanner", "Port scanner"))
+    assert open_sqlite_dataset(json_path) is None
+    assert not isinstance(load_dataset([json_path]), SQLiteToolDataset)
+    sqlite_path_for(json_path).unlink()
+    assert load_dataset([json_path]).get("nmap") is not None
+
+
+def test_sqlite_filters_apply_before_candidates_are_cut_off(tmp_path):
+    tools = [
+        {
+            "name": f"scanner{number}",
+            "package": "kali-tools-big",
+            "category": "Big",
+            "summary": "network scanner tool",
+            "binary_path": f"/usr/bin/scanner{number}",
+            "default_args": "",
+        }
+        for number in range(1000)
+    ]
+    tools.append({**tools[0], "name": "rare", "category": "Small", "binary_path": "/usr/bin/rare"})
+    path = tmp_path / "kali_tools.json"
+    path.write_text(json.dumps(tools), encoding="utf-8")
+    build_sqlite_dataset(path)
+    store = open_sqlite_dataset(path)
+    memory = load_dataset([path])
+    for query in ("network scanner tool", "rare"):
+        expected = memory.fuzzy_search(query, 5, filters={"category": "small"})
+        assert [tool.name for tool in expected] == ["rare"]
+        assert store.fuzzy_search(query, 5, filters={"category": "small"}) == expected
+
+
+def test_sqlite_policy_filter_follows_policy_reload(json_path, tmp_path, monkeypatch):
+    store = open_sqlite_dataset(json_path)
+    confirmed = store.fuzzy_search("network scanner", 5, filters={"policy": "target_confirmation"})
+    assert [tool.name for tool in confirmed] == ["nmap"]
+
+    policy_path = tmp_path / "policy.yaml"
+    policy_path.write_text("tools:\n  nmap:\n    default_timeout: 60\n", encoding="utf-8")
+    monkeypatch.setenv("KALI_POLICY_FILE", str(policy_path))
+    policy.reload_policy()
+    try:
+        assert store.fuzzy_search(
+            "network scanner", 5, filters={"policy": "target_confirmation"}
+        ) == []
+    finally:
+        monkeypatch.delenv("KALI_POLICY_FILE", raising=False)
+        policy.reload_policy()
@@ -0,0 +1,55 @@
+import pytest
+
+from kali_mcp_server import dataset as dataset_module
+from kali_mcp_server import warmup
+
+
+@pytest.fixture
+def cold_start(monkeypatch):
+    monkeypatch.setattr(dataset_module, "_DATASET", None)
+    monkeypatch.setattr(warmup, "_WARMUP", None)
+    monkeypatch.setattr(warmup, "STARTUP", warmup.StartupMetrics())
+    return warmup.STARTUP
+
+
+@pytest.mark.asyncio
+async def test_ready_dataset_awaits_background_warmup(cold_start):
+    future = warmup.start_warmup()
+    assert warmup.start_warmup() is future
+    dataset = await warmup.ready_dataset()
+    assert dataset is future.result()
+    assert dataset.get("nmap") is not None
+    assert cold_start.stats()["time_to_index_ready_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_warmup_is_retried(cold_start, monkeypatch):
+    attempts = []
+    real_get_dataset = warmup.get_dataset
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("dataset unavailable")
+        return real_get_dataset()
+
+    monkeypatch.setattr(warmup, "get_dataset", flaky)
+    with pytest.raises(RuntimeError):
+        await warmup.ready_dataset()
+    assert cold_start.index_ready is None
+    assert (await warmup.ready_dataset()).get("nmap") is not None
+    assert len(attempts) == 2
+
+
+def test_startup_metrics_record_first_milestone_only():
+    metrics = warmup.StartupMetrics()
+    assert metrics.stats() == {
+        "time_to_first_response_ms": None,
+        "time_to_index_ready_ms": None,
+    }
+    metrics.mark_started()
+    metrics.mark_first_response()
+    first = metrics.first_response
+    metrics.mark_first_response()
+    assert metrics.first_response == first
+    assert metrics.stats()["time_to_first_response_ms"] >= 0
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from kali_mcp_server import watcher
+from kali_mcp_server.dataset import get_dataset, reload_dataset
+
+DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "kali_tools.json"
+
+
+@pytest.fixture
+def watched_dataset(tmp_path):
+    json_path = tmp_path / "kali_tools.json"
+    shutil.copy(DATA_PATH, json_path)
+    reload_dataset([json_path])
+    try:
+        yield json_path
+    finally:
+        reload_dataset()
+
+
+def _append_tool(json_path, name):
+    entries = json.loads(json_path.read_text())
+    entries.append({**entries[0], "name": name})
+    json_path.write_text(json.dumps(entries))
+    stat = json_path.stat()
+    os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.mark.asyncio
+async def test_watcher_swaps_in_changed_dataset(watched_dataset):
+    snapshot = get_dataset()
+    task = asyncio.create_task(watcher.watch_dataset(0.01))
+    try:
+        await asyncio.sleep(0.05)
+        _append_tool(watched_dataset, "freshtool")
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if get_dataset() is not snapshot:
+                break
+    finally:
+        task.cancel()
+    assert get_dataset().get("freshtool") is not None
+    # Requests already holding the old snapshot keep a consistent view.
+    assert snapshot.get("freshtool") is None
+    assert snapshot.get("nmap") is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_reload_keeps_previous_snapshot(watched_dataset):
+    snapshot = get_dataset()
+    watched_dataset.write_text("[{\"name\": ")
+    with pytest.raises(ValueError):
+        await watcher.reload_in_background([watched_dataset])
+    assert get_dataset() is snapshot
+
+
+def test_poll_interval_reads_environment(monkeypatch):
+    monkeypatch.setenv(watcher.ENV_POLL_INTERVAL, "0")
+    assert watcher.poll_interval() == 0
+    monkeypatch.setenv(watcher.ENV_POLL_INTERVAL, "bogus")
+    assert watcher.poll_interval() == watcher.DEFAULT_POLL_INTERVAL